@@ -1,6 +1,11 @@
 from .airwave import AirWave
 #from .clearpass import ClearPass, ClearPassDB
 from .mmclient import MMClient
+from .fleet import MMFleet
+from .tokencache import TokenCache
+from .metrics import Metrics, MetricsSink, PrometheusTextSink
+from .retry import CircuitBreaker, CircuitOpenError, RetryPolicy
+from .filters import Filter
 
 from ._version import get_versions
 __version__ = get_versions()['version']
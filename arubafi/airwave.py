@@ -2,11 +2,21 @@ import requests
 import xmltodict
 import socket
 import getpass
+import threading
+import time
+from urllib.parse import urlsplit
 
 import logging
 import logzero
 from logzero import logger
 
+from .governor import Governor
+from .metrics import Metrics
+from .pool import PoolingAdapter
+from . import retry
+from .retry import CircuitBreaker, RetryPolicy
+from .singleflight import SingleFlight
+
 class OnlyOneInstance(type):
     """Metaclass that allows only one class instance to be created
     """
@@ -49,7 +59,50 @@ class AirWave(metaclass=OnlyOneInstance):
         - specify path to a cert file to enable
 
     timeout: `int` optional, default 30s
-        The timeout for the connection.
+        The timeout for the connection. Used as the `connect_timeout` if
+        that is not set.
+
+    metrics: `Metrics`, optional
+        Where request counts, latencies, response sizes and errors are
+        recorded per endpoint. A new one is created if not passed in and is
+        available as the `metrics` attribute.
+
+    rate: `float`, optional
+        The maximum number of requests per second sent to AirWave by all
+        clients of it. Not limited by default.
+
+    max_in_flight: `int`, optional
+        The maximum number of requests in flight to AirWave at the same
+        time, shared like `rate`. Not limited by default.
+
+    retry_policy: `RetryPolicy`, optional
+        When and after how long failed requests are retried. Defaults to
+        `RetryPolicy()`, which retries GETs up to 3 times with a jittered
+        exponential backoff. Pass in False to never retry.
+
+    circuit_breaker: bool or `CircuitBreaker`, optional, default None
+        Fail requests fast with `CircuitOpenError` while AirWave is
+        unhealthy. Off by default. If True the circuit breaker is shared by
+        all clients of the same AirWave that pass in True, otherwise pass in
+        a `CircuitBreaker` to share it only between the clients given it.
+
+    pool_size: `int`, optional, default 10
+        The maximum number of connections kept open to AirWave.
+
+    pool_block: bool, optional, default False
+        Make threads wait for a free connection once `pool_size` of them are
+        in use, instead of opening and closing extra connections.
+
+    connect_timeout: `float`, optional
+        Seconds to wait for a connection to AirWave. Defaults to `timeout`.
+
+    read_timeout: `float`, optional
+        Seconds to wait for AirWave between bytes of a response, for requests
+        made without their own timeout. Not limited by default.
+
+    tls_session_reuse: bool, optional, default True
+        Resume the TLS session on new connections, which skips most of the
+        TLS handshake.
 
     Examples:
     ---------
@@ -73,12 +126,32 @@ class AirWave(metaclass=OnlyOneInstance):
     AirWave Password required:
     <arubatools.airwave.AirWave at 0x112a92dd0>
     """
-    def __init__(self, aw_url, aw_username=str(), aw_password=str(), proxy=str(), verify=False, timeout=30):
+    def __init__(self, aw_url, aw_username=str(), aw_password=str(), proxy=str(), verify=False, timeout=30, metrics=None, rate=None, max_in_flight=None, retry_policy=None, circuit_breaker=None, pool_size=10, pool_block=False, connect_timeout=None, read_timeout=None, tls_session_reuse=True):
         self.aw_url = str(aw_url)
         self.aw_username = str(aw_username)
         self.aw_password = str(aw_password)
         self.verify = verify
         self.timeout = timeout
+        self.metrics = metrics if metrics is not None else Metrics()
+
+        # Threads that need the inventory at the same time share one fetch
+        self._inventory_flight = SingleFlight(copy=False)
+
+        # Opt-in request limits, shared with all clients of the same AirWave
+        self.rate = rate
+        self.max_in_flight = max_in_flight
+        self.governor = None
+
+        self.retry_policy = RetryPolicy() if retry_policy is None else (retry_policy or None)
+        self.circuit_breaker = circuit_breaker
+
+        # The connection pool, created with the session
+        self.adapter = None
+        self.pool_size = pool_size
+        self.pool_block = pool_block
+        self.connect_timeout = connect_timeout or self.timeout
+        self.read_timeout = read_timeout
+        self.tls_session_reuse = tls_session_reuse
 
         self.proxy = {}
         if proxy:
@@ -88,7 +161,7 @@ class AirWave(metaclass=OnlyOneInstance):
                 }
 
         # URLs used with AirWave to get client data and to login
-        if "https://" not in self.aw_url:
+        if not self.aw_url.startswith(('https://', 'http://')):
             self.aw_url = f"https://{self.aw_url}"
         self.login_url = self.aw_url + '/LOGIN'
 
@@ -134,17 +207,34 @@ class AirWave(metaclass=OnlyOneInstance):
         self.session = requests.Session()
         self.session.proxies = self.proxy
         self.session.verify = self.verify
-        self.session.timeout = self.timeout
+
+        # Requests ignores a session timeout, so the timeouts are set on the
+        # adapter
+        self.adapter = PoolingAdapter(
+            pool_size=self.pool_size,
+            pool_block=self.pool_block,
+            connect_timeout=self.connect_timeout,
+            read_timeout=self.read_timeout,
+            tls_session_reuse=self.tls_session_reuse,
+        )
+        self.session.mount(self.aw_url, self.adapter)
 
         if self.verify == False:
             # Disable warnings that come up, as we're not checking the cert
             requests.packages.urllib3.disable_warnings()
             logger.info("Not verifying SSL")
 
+        if self.rate or self.max_in_flight:
+            self.governor = Governor.for_host(urlsplit(self.aw_url).netloc, self.rate, self.max_in_flight)
+
+        if self.circuit_breaker is True:
+            self.circuit_breaker = CircuitBreaker.for_host(urlsplit(self.aw_url).netloc)
+
         error_msg = f'Logging into {self.login_url} with username: {self.aw_username}'
 
         try:
-            login_resp = self.session.post(
+            login_resp = self._request(
+                'post',
                 self.login_url,
                 data=self.login_payload,
                 )
@@ -153,34 +243,50 @@ class AirWave(metaclass=OnlyOneInstance):
             # If there is no raise response you're authenticated!
 
         except requests.exceptions.ConnectionError as exc:
-            logger.exception(f'Got a {exc.__class__.__name__} exception\n')
+            logger.exception('Got a %s exception\n', exc.__class__.__name__)
             logger.error(error_msg)
-            exit(0)
+            return self._login_failed(exc)
         except requests.RequestException as exc:
-            logger.exception(f'Got a {exc.__class__.__name__} exception\n')
+            logger.exception('Got a %s exception\n', exc.__class__.__name__)
             logger.error(error_msg)
-            exit(0)
+            return self._login_failed(exc)
         except requests.HTTPError as exc:
-            logger.exception(f'Got a {exc.__class__.__name__} exception\n')
+            logger.exception('Got a %s exception\n', exc.__class__.__name__)
             logger.error(error_msg)
-            exit(0)
+            return self._login_failed(exc)
         except requests.URLRequired as exc:
-            logger.exception(f'Got a {exc.__class__.__name__} exception\n')
+            logger.exception('Got a %s exception\n', exc.__class__.__name__)
             logger.error(error_msg)
-            exit(0)
+            return self._login_failed(exc)
         except requests.TooManyRedirects as exc:
-            logger.exception(f'Got a {exc.__class__.__name__} exception\n')
+            logger.exception('Got a %s exception\n', exc.__class__.__name__)
             logger.error(error_msg)
-            exit(0)
+            return self._login_failed(exc)
         except requests.ConnectTimeout as exc:
-            logger.exception(f'Got a {exc.__class__.__name__} exception\n')
+            logger.exception('Got a %s exception\n', exc.__class__.__name__)
             logger.error(error_msg)
-            exit(0)
+            return self._login_failed(exc)
         except requests.ReadTimeout as exc:
-            logger.exception(f'Got a {exc.__class__.__name__} exception\n')
+            logger.exception('Got a %s exception\n', exc.__class__.__name__)
             logger.error(error_msg)
-            exit(0)
+            return self._login_failed(exc)
+
 
+    def _login_failed(self, exc):
+        """Exits with status 1 after the login request failed with the `exc`,
+        but only in the main thread. Exiting a worker thread would silently
+        end only that thread, so there the error is returned instead, like
+        `MMClient` does.
+
+        Returns:
+        --------
+        The error dict, with a `status` of -1 and the exception as the
+        `status_str`.
+        """
+        if threading.current_thread() is threading.main_thread():
+            exit(1)
+
+        return {'status': -1, 'status_str': f"{exc.__class__.__name__}: {exc}"}
 
     #
     ##
@@ -194,10 +300,51 @@ class AirWave(metaclass=OnlyOneInstance):
         logger.info('Calling close()')
         self.session.close()
 
+    def connection_stats(self):
+        """Returns the counters of the connections to AirWave, see
+        `PoolingAdapter`
+        """
+        if self.adapter is None:
+            return None
+
+        return self.adapter.stats.snapshot()
+
+    def _request(self, method, url, **kwargs):
+        """Makes the request with the session, retrying it as the retry policy
+        says, and records every attempt with the metrics
+        """
+        endpoint = urlsplit(url).path
+        governor = self.governor
+
+        def attempt():
+            if governor is not None:
+                self.metrics.observe_queued(self.aw_url, governor.acquire())
+
+            start = time.perf_counter()
+
+            try:
+                response = getattr(self.session, method)(url, **kwargs)
+            except requests.RequestException as exc:
+                self.metrics.observe(self.aw_url, endpoint, time.perf_counter() - start, status=exc.__class__.__name__)
+                raise
+            finally:
+                if governor is not None:
+                    governor.release()
+
+            status = response.status_code if response.status_code >= 400 else None
+            self.metrics.observe(self.aw_url, endpoint, time.perf_counter() - start, len(response.content), status)
+
+            return response
+
+        def on_retry(retry_number, delay):
+            self.metrics.inc_retries(self.aw_url, endpoint)
+
+        return retry.send(method, attempt, self.retry_policy, self.circuit_breaker or None, on_retry)
+
     def _dns_ptr_check(self, addr):
         """Returns either `FQDN` of an IP or `None` which signifies missing PTR
         """
-        logger.info(f'Calling _dns_ptr_check({addr})')
+        logger.info('Calling _dns_ptr_check(%s)', addr)
         try:
             get_response = socket.gethostbyaddr(addr)
             logging.debug(get_response)
@@ -229,18 +376,25 @@ class AirWave(metaclass=OnlyOneInstance):
 
             ap_list_url = self.aw_url + '/ap_list.xml'
 
-            response = self.session.get(ap_list_url, timeout=30)
-            # Raise an exception if the status code != 2xx
-            response.raise_for_status()
-
-            # Convert the XML client_detail_resp into a dictionary
-            self._inventory = xmltodict.parse(response.content)
+            response = self._inventory_flight.do(ap_list_url, self._fetch_inventory, ap_list_url)
 
             if return_in_dict:
                 return self._inventory
             else:
                 return response
 
+    def _fetch_inventory(self, ap_list_url):
+        """GETs and parses the inventory for `_full_raw_airwave_inventory()`
+        """
+        response = self._request('get', ap_list_url, timeout=30)
+        # Raise an exception if the status code != 2xx
+        response.raise_for_status()
+
+        # Convert the XML client_detail_resp into a dictionary
+        self._inventory = xmltodict.parse(response.content)
+
+        return response
+
     def _create_inventory_dbs(self):
         """Creates inventory dictionaries (DBs), split into dicts for APs/IAPs,
         controllers and virtual cotrollers
@@ -356,7 +510,7 @@ class AirWave(metaclass=OnlyOneInstance):
         if not hasattr(self, '_controllers_db') or not self._controllers_db:
             self._create_inventory_dbs()
 
-        logger.debug(f'Data returned\n{self._controllers_db}')
+        logger.debug('Data returned\n%s', self._controllers_db)
         logzero.loglevel(logging.ERROR)
 
         return self._controllers_db
@@ -372,7 +526,7 @@ class AirWave(metaclass=OnlyOneInstance):
         if not hasattr(self, '_no_ptr_controllers_db') or not self._no_ptr_controllers_db:
             self._create_inventory_dbs()
 
-        logger.debug(f'Data returned\n{self._no_ptr_controllers_db}')
+        logger.debug('Data returned\n%s', self._no_ptr_controllers_db)
         logzero.loglevel(logging.ERROR)
 
         return self._no_ptr_controllers_db
@@ -388,7 +542,7 @@ class AirWave(metaclass=OnlyOneInstance):
         if not hasattr(self, '_iapvc_db') or not self._iapvc_db:
             self._create_inventory_dbs()
 
-        logger.debug(f'Data returned\n{self._iapvc_db}')
+        logger.debug('Data returned\n%s', self._iapvc_db)
         logzero.loglevel(logging.ERROR)
 
         return self._iapvc_db
@@ -404,7 +558,7 @@ class AirWave(metaclass=OnlyOneInstance):
         if not hasattr(self, '_contrlollerid_to_ap_db') or not self._contrlollerid_to_ap_db:
             self._create_inventory_dbs()
 
-        logger.debug(f'Data returned\n{self._contrlollerid_to_ap_db}')
+        logger.debug('Data returned\n%s', self._contrlollerid_to_ap_db)
         logzero.loglevel(logging.ERROR)
 
         return self._contrlollerid_to_ap_db
@@ -420,7 +574,7 @@ class AirWave(metaclass=OnlyOneInstance):
         if not hasattr(self, '_apname_to_controllerid_db') or not self._apname_to_controllerid_db:
             self._create_inventory_dbs()
 
-        logger.debug(f'Data returned\n{self._apname_to_controllerid_db}')
+        logger.debug('Data returned\n%s', self._apname_to_controllerid_db)
         logzero.loglevel(logging.ERROR)
 
         return self._apname_to_controllerid_db
@@ -435,7 +589,7 @@ class AirWave(metaclass=OnlyOneInstance):
         if not hasattr(self, '_controllerless_ap_db') or not self._controllerless_ap_db:
             self._create_inventory_dbs()
 
-        logger.debug(f'Data returned\n{self._controllerless_ap_db}')
+        logger.debug('Data returned\n%s', self._controllerless_ap_db)
         logzero.loglevel(logging.ERROR)
 
         return self._controllerless_ap_db
@@ -450,7 +604,7 @@ class AirWave(metaclass=OnlyOneInstance):
         if not hasattr(self, '_all_items_db') or not self._all_items_db:
             self._create_inventory_dbs()
 
-        logger.debug(f'Data returned\n{self._all_items_db}')
+        logger.debug('Data returned\n%s', self._all_items_db)
         logzero.loglevel(logging.ERROR)
 
         return self._all_items_db
@@ -639,7 +793,7 @@ class AirWave(metaclass=OnlyOneInstance):
         self.user_mac = {'mac': users_mac.upper()}
 
         # Make a call to AW with users MAC address
-        client_detail_resp = self.session.get(client_detail_url, params=self.user_mac, timeout=30)
+        client_detail_resp = self._request('get', client_detail_url, params=self.user_mac, timeout=30)
         logger.debug(client_detail_resp.request.url)
         logger.debug(client_detail_resp.content)
         client_detail_resp.raise_for_status()
@@ -665,14 +819,14 @@ class AirWave(metaclass=OnlyOneInstance):
 
             # Make another call to AW, this time with the ID of the AP to get more info
             # on it including the controllers FQDN and ID
-            ap_detail_response = self.session.get(ap_list_url, params={'id': self.users_ap_info['ap_id']}, timeout=30)
-            logger.debug(f"Called URL: {ap_detail_response.request.url}")
-            logger.debug(f"The response: {ap_detail_response.content}")
+            ap_detail_response = self._request('get', ap_list_url, params={'id': self.users_ap_info['ap_id']}, timeout=30)
+            logger.debug("Called URL: %s", ap_detail_response.request.url)
+            logger.debug("The response: %s", ap_detail_response.content)
             ap_detail_response.raise_for_status()
 
             # Convert the XML ap_detail_response into a dictionary
             ap_detail = xmltodict.parse(ap_detail_response.content)['amp:amp_ap_list']['ap']
-            logger.debug(f"AP detail info:\n{ap_detail}")
+            logger.debug("AP detail info:\n%s", ap_detail)
 
             self.users_ap_info['controller_id']  = ap_detail.get('controller_id')
             self.users_ap_info['client_count']   = ap_detail.get('client_count')
@@ -685,20 +839,20 @@ class AirWave(metaclass=OnlyOneInstance):
             self.users_ap_info['serial_number']  = ap_detail.get('serial_number')
             self.users_ap_info['ap_aw_url']      = ap_detail_response.request.url
 
-            logger.info(f"AirWave Client's URL:\n{self.users_ap_info['client_aw_url']}")
-            logger.info(f"AirWave client's associated AP:\n{self.users_ap_info['name']}")
-            logger.info(f"AirWave client's ESSID: {self.users_ap_info['essid']}")
-            logger.info(f"AirWave client's radio: {self.users_ap_info['radio']}")
-            logger.info(f"AirWave client's VLAN: {self.users_ap_info['vlan']}")
+            logger.info("AirWave Client's URL:\n%s", self.users_ap_info['client_aw_url'])
+            logger.info("AirWave client's associated AP:\n%s", self.users_ap_info['name'])
+            logger.info("AirWave client's ESSID: %s", self.users_ap_info['essid'])
+            logger.info("AirWave client's radio: %s", self.users_ap_info['radio'])
+            logger.info("AirWave client's VLAN: %s", self.users_ap_info['vlan'])
 
         elif 'error' in amp_client_detail['amp:amp_client_detail']:
-            logger.error(f"This MAC {users_mac} is not valid!")
-            logger.error(f"Error output:\n{amp_client_detail['amp:amp_client_detail']['error']}")
+            logger.error("This MAC %s is not valid!", users_mac)
+            logger.error("Error output:\n%s", amp_client_detail['amp:amp_client_detail']['error'])
 
         else:
-            logger.error(f"Couldn't get data from AirWave for client: {users_mac}")
+            logger.error("Couldn't get data from AirWave for client: %s", users_mac)
 
-        logger.debug(f"User's info:\n{self.users_ap_info}")
+        logger.debug("User's info:\n%s", self.users_ap_info)
         return self.users_ap_info
 
     def get_users_controller_info(self, users_mac=str(), users_controller_id=str()):
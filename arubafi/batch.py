@@ -0,0 +1,107 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from logzero import logger
+
+
+class WriteBatch:
+    """Defers saving the config of the config paths written to until the
+    batch exits, then saves each of them once.
+
+    Use it with `MMClient.batch()`. While the batch is open, every
+    successful POST made from the thread that opened it records its config
+    path, unless the MM says nothing is pending with `_pending` in its
+    `_global_result`, and `write_mem()` only records the path it's called
+    with. On exit `write_memory` is POSTed once per recorded path. Paths at
+    the same depth of the hierarchy can't contain each other, so they are
+    saved concurrently, deepest first.
+
+    If the `with` block raises, nothing is saved and the changes are left
+    pending on the MM.
+
+    Params
+    ------
+    client: `MMClient`
+        The client the batch is for.
+
+    max_workers: `int`, optional, default: None
+        The maximum number of paths saved at the same time. Defaults to the
+        number of paths at that depth, capped at 8.
+
+    Examples
+    --------
+    >>> with mmc.batch() as batch:
+            mmc.ap_group(data=lab_group, config_path='/md/EU/lab')
+            mmc.write_mem('/md/EU/lab')
+            mmc.ap_group(data=office_group, config_path='/md/EU/office')
+    >>> batch.results
+    {'/md/EU/lab': ({'_global_result': ...}, None), '/md/EU/office': ({'_global_result': ...}, None)}
+    """
+
+    def __init__(self, client, max_workers=None):
+        self.client = client
+        self.max_workers = max_workers
+        self.paths = set()
+        # Config path to what `write_mem()` returned for it
+        self.results = dict()
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        if self.client._batch is not None:
+            raise RuntimeError("A write batch is already open for this client in this thread")
+
+        self.client._batch = self
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.client._batch = None
+
+        if exc_type is not None:
+            logger.error("Write batch failed, not saving the config of: %s", sorted(self.paths))
+            return False
+
+        self.write()
+        return False
+
+    def add(self, config_path, jresp=None):
+        '''Records the `config_path` as written to.
+
+        Args:
+        -----
+        config_path: `str`
+            The config path, `None` for the default '/md'.
+        jresp: dict, optional
+            The POST response. The path isn't recorded if its `_global_result`
+            says there's nothing pending.
+        '''
+        if isinstance(jresp, dict) and not jresp.get('_global_result', dict()).get('_pending', True):
+            return
+
+        with self._lock:
+            self.paths.add(config_path or '/md')
+
+    def write(self):
+        '''Saves the config of every recorded path, deepest paths first.
+
+        Returns:
+        --------
+        The `results` dict of config path to what `write_mem()` returned.
+        '''
+        with self._lock:
+            paths, self.paths = self.paths, set()
+
+        waves = dict()
+        for path in paths:
+            waves.setdefault(path.rstrip('/').count('/'), list()).append(path)
+
+        for depth in sorted(waves, reverse=True):
+            wave = sorted(waves[depth])
+            logger.debug("Saving the config of: %s", wave)
+
+            with ThreadPoolExecutor(max_workers=self.max_workers or min(8, len(wave))) as executor:
+                saves = {path: executor.submit(self.client.write_mem, path) for path in wave}
+
+            for path, save in saves.items():
+                self.results[path] = save.result()
+
+        return self.results
@@ -0,0 +1,116 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from logzero import logger
+
+
+class ResponseCache:
+    """A TTL and size bound cache for Mobility Master GET responses.
+
+    Entries are keyed on the endpoint and the request parameters that change
+    what the MM returns (config_path, filter, limit, offset, sort, count and
+    total), so the `UIDARUBA` token is not part of the key. Once `maxsize`
+    is reached the least recently used entry is dropped.
+
+    Responses are copied going in and out of the cache, so callers are free
+    to modify what they get back.
+
+    Params
+    ------
+    ttl: `int` or `float`, optional, default: 60
+        Number of seconds a response is served from the cache.
+
+    maxsize: `int`, optional, default: 256
+        The maximum number of responses kept in the cache.
+    """
+
+    # Request parameters that change the MM response
+    KEY_PARAMS = ('config_path', 'filter', 'limit', 'offset', 'sort', 'count', 'total')
+
+    def __init__(self, ttl=60, maxsize=256):
+        self.ttl = ttl
+        self.maxsize = maxsize
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def _endpoint(endpoint):
+        '''Strips the leading `/` so both forms of an endpoint share entries
+        '''
+        return endpoint.lstrip('/')
+
+    def key(self, endpoint, params):
+        '''Returns the cache key for an `endpoint` and its request `params`
+        '''
+        return (self._endpoint(endpoint),) + tuple(params.get(p) for p in self.KEY_PARAMS)
+
+    def get(self, key):
+        '''Returns a copy of the cached response or `None` if it isn't cached
+        or has expired.
+        '''
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            value = entry[1]
+
+        logger.debug("Cache hit for %s", key)
+        return copy.deepcopy(value)
+
+    def set(self, key, value):
+        '''Caches a copy of the `value` response under the `key`
+        '''
+        value = copy.deepcopy(value)
+
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, endpoint, config_path):
+        '''Drops the `endpoint` entries at the `config_path` and every config
+        path below it.
+
+        Returns:
+        --------
+        The number of dropped entries.
+        '''
+        endpoint = self._endpoint(endpoint)
+        config_path = config_path or '/md'
+        subtree = config_path.rstrip('/') + '/'
+
+        with self._lock:
+            stale = [
+                key for key in self._entries
+                if key[0] == endpoint and key[1] is not None
+                and (key[1] == config_path or key[1].startswith(subtree))
+            ]
+            for key in stale:
+                del self._entries[key]
+
+        logger.debug("Invalidated %s cache entries for %s at %s", len(stale), endpoint, config_path)
+        return len(stale)
+
+    def clear(self):
+        '''Drops every entry from the cache
+        '''
+        with self._lock:
+            self._entries.clear()
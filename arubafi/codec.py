@@ -0,0 +1,89 @@
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class JSONCodec:
+    """JSON codec using the standard library `json` module.
+
+    Used for decoding the API responses and encoding request payloads and
+    filters. Decoding errors are raised as `json.JSONDecodeError`.
+    """
+    name = 'json'
+
+    def loads(self, data):
+        '''Decodes `str` or `bytes` JSON `data`
+        '''
+        return json.loads(data)
+
+    def dumps(self, obj):
+        '''Encodes `obj` into a JSON `str`
+        '''
+        return json.dumps(obj)
+
+    def dumpb(self, obj):
+        '''Encodes `obj` into UTF-8 JSON `bytes`, ready to be sent as a
+        request body.
+        '''
+        return json.dumps(obj).encode('utf-8')
+
+
+class OrjsonCodec(JSONCodec):
+    """JSON codec using `orjson`, which is several times faster than `json`.
+
+    Its output is compact, ex. '{"a":1}' instead of '{"a": 1}'. Objects
+    orjson can't encode, like integers over 64 bits, are encoded with
+    `json` instead. `orjson.JSONDecodeError` is a subclass of
+    `json.JSONDecodeError`, so errors can be handled the same way.
+    """
+    name = 'orjson'
+
+    def __init__(self):
+        if orjson is None:
+            raise ImportError("orjson is not installed. Install it with `pip install orjson`")
+
+    def loads(self, data):
+        return orjson.loads(data)
+
+    def dumps(self, obj):
+        return self.dumpb(obj).decode('utf-8')
+
+    def dumpb(self, obj):
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+        except orjson.JSONEncodeError:
+            return super().dumpb(obj)
+
+
+CODECS = {
+    JSONCodec.name: JSONCodec,
+    OrjsonCodec.name: OrjsonCodec,
+}
+
+
+def get_codec(codec=None):
+    '''Returns a JSON codec instance.
+
+    Args:
+    -----
+    codec: `str` or codec instance, optional, default: None
+        Either the name of a codec ('json' or 'orjson') or a codec instance,
+        which is returned as is. If `None`, orjson is used if installed,
+        otherwise json.
+
+    Returns:
+    --------
+    The codec instance.
+    '''
+    if codec is None:
+        codec = OrjsonCodec.name if orjson is not None else JSONCodec.name
+
+    if isinstance(codec, str):
+        if codec not in CODECS:
+            raise ValueError(f"Unknown JSON codec '{codec}'. Use one of: {', '.join(CODECS)}")
+        return CODECS[codec]()
+
+    return codec
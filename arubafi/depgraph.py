@@ -0,0 +1,313 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from logzero import logger
+
+from . import endpoints
+from .filters import text, values_at
+from .reconcile import normalise
+
+# Object name to the (keys, referenced object name) of the attributes
+# referencing other objects by name, ex. the `profile-name` in the
+# `ssid_prof` attribute of a `virtual_ap`
+REFERENCES = {
+    'ap_group': [
+        (('virtual_ap', 'profile-name'), 'virtual_ap'),
+        (('ap_sys_prof', 'profile-name'), 'ap_sys_prof'),
+        (('dot11a_prof', 'profile-name'), 'ap_a_radio_prof'),
+        (('dot11g_prof', 'profile-name'), 'ap_g_radio_prof'),
+        (('reg_domain_prof', 'profile-name'), 'reg_domain_prof'),
+    ],
+    'virtual_ap': [
+        (('ssid_prof', 'profile-name'), 'ssid_prof'),
+        (('aaa_prof', 'profile-name'), 'aaa_prof'),
+        (('dot11k_prof', 'profile-name'), 'dot11k_prof'),
+        (('dot11r_prof', 'profile-name'), 'dot11r_prof'),
+    ],
+    'ssid_prof': [
+        (('ht_ssid_prof', 'profile-name'), 'ht_ssid_prof'),
+    ],
+    'aaa_prof': [
+        (('dot1x_server_group', 'srv-group'), 'server_group_prof'),
+        (('mac_server_group', 'srv-group'), 'server_group_prof'),
+        (('default_user_role', 'role'), 'role'),
+        (('dot1x_default_role', 'role'), 'role'),
+        (('mac_default_role', 'role'), 'role'),
+    ],
+    'server_group_prof': [
+        (('auth_server', 'name'), 'rad_server'),
+    ],
+    'role': [
+        (('role__acl', 'pname'), 'acl_sess'),
+    ],
+    'acl_sess': [
+        (('acl_sess__v4policy', 'src-alias'), 'netdst'),
+        (('acl_sess__v4policy', 'dst-alias'), 'netdst'),
+        (('acl_sess__v4policy', 'service-name'), 'netsvc'),
+    ],
+}
+
+# `_flags` of the objects built into the MM, which are never POSTed
+PREDEFINED_FLAGS = ('default', 'predefined')
+
+_lock = threading.Lock()
+
+
+def register_reference(name, keys, target):
+    '''Registers an attribute of the `name` objects referencing `target`
+    objects.
+
+    Args:
+    -----
+    name: `str`
+        The referencing object name, ex. 'ap_group'.
+    keys: `str`
+        The dotted keys of the attribute in the object, ex.
+        'virtual_ap.profile-name'. Lists along the keys are walked into.
+    target: `str`
+        The referenced object name, ex. 'virtual_ap'.
+    '''
+    reference = (tuple(keys.split('.')), target)
+
+    with _lock:
+        references = REFERENCES.setdefault(name, list())
+        if reference not in references:
+            references.append(reference)
+
+
+def references(name, obj):
+    '''Returns the (object name, object id) of the objects referenced by the
+    `name` object, in the order they are referenced.
+    '''
+    found = dict()
+
+    for keys, target in REFERENCES.get(name, ()):
+        for value in values_at(obj, keys):
+            if value not in (None, ''):
+                found[(target, text(value))] = None
+
+    return list(found)
+
+
+def is_predefined(obj):
+    '''Checks whether the object is built into the MM
+    '''
+    flags = obj.get('_flags') or dict()
+    return any(flags.get(flag) for flag in PREDEFINED_FLAGS)
+
+
+class DependencyGraph:
+    """Objects and the objects they reference, like `virtual_ap` to
+    `ssid_prof` to `aaa_prof` to `server_group_prof` to `rad_server`, or
+    `role` to `acl_sess` to `netdst` and `netsvc`.
+
+    The references are found with `REFERENCES`, and more can be added with
+    `register_reference()`. Objects are identified by their object name and
+    the value of the attribute naming them, ex. ('netdst', 'dns').
+
+    Examples
+    --------
+    >>> graph = mmc.dependencies('virtual_ap', 'corp', config_path='/md/EU')
+    >>> graph.levels()
+    [[('rad_server', 'radius1')], [('server_group_prof', 'corp')], [('aaa_prof', 'corp'), ('ssid_prof', 'corp')], [('virtual_ap', 'corp')]]
+    >>> report = graph.push(mmc, config_path='/md/US')
+    """
+
+    def __init__(self):
+        # (object name, object id) to the object
+        self.objects = dict()
+        # (object name, object id) to the objects it references
+        self.edges = dict()
+        # The referenced objects that weren't found
+        self.missing = set()
+        # (object name, object ids, error) of the failed GETs
+        self.errors = list()
+
+    def __contains__(self, node):
+        return node in self.objects
+
+    def __len__(self):
+        return len(self.objects)
+
+    def add(self, name, obj):
+        '''Adds the object and its references.
+
+        Returns:
+        --------
+        The (object name, object id) of the object.
+        '''
+        node = (name, text(obj.get(endpoints.object_key(name))))
+        self.objects[node] = obj
+        self.edges[node] = references(name, obj)
+        self.missing.discard(node)
+
+        return node
+
+    def levels(self):
+        '''Returns the objects by level, where every object only references
+        objects of the levels before it, or that aren't in the graph.
+
+        Raises:
+        -------
+        ValueError if objects reference each other in a cycle.
+        '''
+        # Object to the number of its references still to be placed
+        remaining = {node: sum(1 for ref in refs if ref in self.objects) for node, refs in self.edges.items()}
+        referenced_by = {node: list() for node in self.objects}
+        for node, refs in self.edges.items():
+            for ref in refs:
+                if ref in referenced_by:
+                    referenced_by[ref].append(node)
+
+        levels = list()
+        level = sorted(node for node, count in remaining.items() if count == 0)
+
+        while level:
+            levels.append(level)
+            next_level = list()
+            for node in level:
+                for referencing in referenced_by[node]:
+                    remaining[referencing] -= 1
+                    if remaining[referencing] == 0:
+                        next_level.append(referencing)
+            level = sorted(next_level)
+
+        if sum(len(level) for level in levels) != len(self.objects):
+            cycle = sorted(node for node, count in remaining.items() if count > 0)
+            raise ValueError(f"Objects reference each other in a cycle: {cycle}")
+
+        return levels
+
+    def fetch(self, client, name, ids, config_path=None, max_workers=8):
+        '''GETs the objects and everything they reference, one level of
+        references at a time. The objects of each level are fetched with one
+        GET per object name, all at once.
+
+        Args:
+        -----
+        client: `MMClient`
+            The client to GET the objects with.
+        name: `str`
+            The object name, ex. 'virtual_ap'.
+        ids: `str` or `list`
+            The object ids, ex. 'corp' or ['corp', 'guest'].
+        config_path: `str`, optional, default: None
+            The config path to GET the objects at, '/md' if `None`.
+        max_workers: `int`, optional, default: 8
+            The maximum number of GETs made at the same time.
+
+        Returns:
+        --------
+        The graph.
+        '''
+        if not isinstance(ids, list):
+            ids = [ids]
+
+        level = {(name, text(obj_id)) for obj_id in ids}
+        seen = set(level)
+
+        while level:
+            # Object name to the ids to GET
+            wanted = dict()
+            for obj_name, obj_id in sorted(level):
+                wanted.setdefault(obj_name, list()).append(obj_id)
+
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(wanted))) as executor:
+                results = {
+                    obj_name: executor.submit(self._get, client, obj_name, obj_ids, config_path)
+                    for obj_name, obj_ids in wanted.items()}
+
+            next_level = set()
+            for obj_name, future in results.items():
+                objs, err = future.result()
+                if err is not None:
+                    logger.error("Could not GET the %s objects %s: %s", obj_name, wanted[obj_name], err)
+                    self.errors.append((obj_name, wanted[obj_name], err))
+                    continue
+
+                found = {self.add(obj_name, obj) for obj in objs if isinstance(obj, dict)}
+                self.missing.update((obj_name, obj_id) for obj_id in wanted[obj_name] if (obj_name, obj_id) not in found)
+
+                for node in found:
+                    next_level.update(ref for ref in self.edges[node] if ref not in seen)
+
+            seen.update(next_level)
+            level = next_level
+
+        return self
+
+    @staticmethod
+    def _get(client, name, ids, config_path):
+        '''GETs the `name` objects with the `ids`
+        '''
+        key = endpoints.object_key(name)
+        params = dict(filter=[{f'{name}.{key}': {'$eq': ids}}])
+        if config_path is not None:
+            params['config_path'] = config_path
+
+        jresp, err = client.resource('GET', f'configuration/object/{name}', **params)
+        if err is not None or not isinstance(jresp, dict):
+            return list(), err or jresp
+
+        return jresp.get('_data', dict()).get(name, list()), None
+
+    def push(self, client, config_path=None, max_workers=8):
+        '''POSTs the objects, one level at a time so every object is POSTed
+        after the objects it references. The objects of a level are POSTed
+        concurrently. Predefined objects are left out, as are the objects
+        referencing objects that failed to be POSTed.
+
+        Args:
+        -----
+        client: `MMClient`
+            The client to POST the objects with.
+        config_path: `str`, optional, default: None
+            The config path to POST the objects to, '/md' if `None`.
+        max_workers: `int`, optional, default: 8
+            The maximum number of POSTs made at the same time.
+
+        Returns:
+        --------
+        The report dict with the 'posted' and 'skipped' lists of (object
+        name, object id), and the 'errors' list of (object name, object id,
+        error).
+        '''
+        report = {'posted': list(), 'skipped': list(), 'errors': list()}
+        failed = set()
+        # The POSTs are part of the caller's write batch, if one is open
+        post = client.in_batch(self._post)
+
+        for level in self.levels():
+            posts = list()
+            for node in level:
+                if is_predefined(self.objects[node]):
+                    continue
+                if any(ref in failed for ref in self.edges[node]):
+                    report['skipped'].append(node)
+                    failed.add(node)
+                    continue
+                posts.append(node)
+
+            if not posts:
+                continue
+
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(posts))) as executor:
+                results = {node: executor.submit(post, client, node, config_path) for node in posts}
+
+            for node, future in results.items():
+                jresp, err = future.result()
+                if err:
+                    logger.error("Could not POST the %s object %s: %s", *node, err)
+                    report['errors'].append((*node, err))
+                    failed.add(node)
+                else:
+                    report['posted'].append(node)
+
+        return report
+
+    def _post(self, client, node, config_path):
+        params = dict()
+        if config_path is not None:
+            params['config_path'] = config_path
+
+        return client.resource('POST', f'configuration/object/{node[0]}', jpayload=normalise(self.objects[node]), **params)
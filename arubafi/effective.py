@@ -0,0 +1,178 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from logzero import logger
+
+from . import endpoints
+from .reconcile import IGNORED_KEYS
+
+
+def is_local(obj):
+    '''Checks whether the object is configured at the config path it was
+    returned for, rather than inherited from a node above it.
+    '''
+    return not (obj.get('_flags') or dict()).get('inherited', False)
+
+
+def merge(inherited, local):
+    '''Returns the `inherited` object with the attributes of the `local`
+    object of the same name set over it.
+    '''
+    merged = dict(inherited)
+    merged.update((key, value) for key, value in local.items() if key not in IGNORED_KEYS)
+    return merged
+
+
+class EffectiveConfig:
+    """The configuration that applies at every node below a config path,
+    worked out from one GET per node and object type.
+
+    Each GET returns the objects inherited from the nodes above too, so only
+    the objects configured locally at a node are kept. The effective objects
+    of a node are those of its parent with the local ones merged over them,
+    attribute by attribute, so any number of nodes are queried without
+    another request. The objects of the top node are all kept, as that's
+    where the ones inherited from above it come in.
+
+    Use it with `MMClient.effective_config()`.
+
+    Params
+    ------
+    client: `MMClient`
+        The client to GET the objects with.
+
+    names: `list`
+        The object names, ex. ['ap_sys_prof', 'virtual_ap'].
+
+    tree: `NodeTree`
+        The node hierarchy of the MM.
+
+    root: `str`, optional, default: '/md'
+        The config path to resolve the config below.
+
+    include_devices: bool, optional, default: True
+        Also GET the objects configured at the devices.
+
+    max_workers: `int`, optional, default: None
+        The maximum number of GETs made at the same time. Defaults to the
+        number of GETs, capped at 8.
+
+    Examples
+    --------
+    >>> config = mmc.effective_config(['ap_sys_prof', 'virtual_ap'], root='/md/EU')
+    >>> config.get('/md/EU/DE/site-01', 'ap_sys_prof', 'default')['ap_console_protect']
+    >>> config.sources('/md/EU/DE/site-01', 'ap_sys_prof', 'default')
+    ['/md/EU', '/md/EU/DE/site-01']
+    """
+
+    def __init__(self, client, names, tree, root='/md', include_devices=True, max_workers=None):
+        for name in names:
+            if endpoints.object_key(name) is None:
+                raise ValueError(f"The effective config of '{name}' objects can't be resolved as they aren't named")
+
+        self.client = client
+        self.names = list(names)
+        self.tree = tree
+        self.root = tree.normalise(root)
+        self.paths = tree.subtree(self.root, include_devices=include_devices)
+        self.max_workers = max_workers
+        # (config path, object name) to the local objects by their key
+        self.local = dict()
+        # (config path, object name) to the error of its GET
+        self.errors = dict()
+        # (config path, object name) to the effective objects by their key
+        self._effective = dict()
+
+    def fetch(self):
+        '''GETs the objects at every node concurrently and keeps the local
+        ones, dropping any effective config worked out before.
+
+        Returns:
+        --------
+        The dict of (config path, object name) to the error of its GET. The
+        effective config of nodes at or below a failed GET is incomplete.
+        '''
+        fetches = [(path, name) for path in self.paths for name in self.names]
+        self.local.clear()
+        self.errors.clear()
+        self._effective.clear()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers or min(8, len(fetches))) as executor:
+            results = {fetch_args: executor.submit(self.client._fetch_objects, *fetch_args) for fetch_args in fetches}
+
+        for (path, name), future in results.items():
+            objs, err = future.result()
+
+            if err is not None:
+                logger.error("Could not GET the %s objects at %s: %s", name, path, err)
+                self.errors[(path, name)] = err
+                objs = list()
+
+            key = endpoints.object_key(name)
+            self.local[(path, name)] = {
+                obj.get(key): obj for obj in objs
+                if isinstance(obj, dict) and (path == self.root or is_local(obj))}
+
+        return self.errors
+
+    def effective(self, config_path, name):
+        '''Returns the objects that apply at the `config_path`.
+
+        The objects are shared with the effective config of other nodes and
+        must not be modified.
+
+        Args:
+        -----
+        config_path: `str`
+            The config path at or below the `root`.
+        name: `str`
+            The object name.
+
+        Returns:
+        --------
+        A dict of the objects by their key, ex. `profile-name`.
+
+        Raises:
+        -------
+        KeyError if the `config_path` or `name` weren't fetched.
+        '''
+        config_path = self.tree.normalise(config_path)
+        if (config_path, name) not in self.local:
+            raise KeyError((config_path, name))
+
+        # The nodes from the path up to the closest one already worked out
+        chain = list()
+        node = self.tree.get(config_path)
+        while (node.path, name) not in self._effective:
+            chain.append(node.path)
+            if node.path == self.root:
+                objs = dict()
+                break
+            node = node.parent
+        else:
+            objs = self._effective[(node.path, name)]
+
+        for path in reversed(chain):
+            local = self.local[(path, name)]
+            if local:
+                objs = dict(objs)
+                for key, obj in local.items():
+                    objs[key] = merge(objs[key], obj) if key in objs else obj
+
+            self._effective[(path, name)] = objs
+
+        return objs
+
+    def get(self, config_path, name, key):
+        '''Returns the object named `key` that applies at the `config_path`,
+        or `None`.
+        '''
+        return self.effective(config_path, name).get(key)
+
+    def sources(self, config_path, name, key):
+        '''Returns the config paths the attributes of the object named `key`
+        at the `config_path` come from, top first.
+        '''
+        config_path = self.tree.normalise(config_path)
+        paths = [path for path in self.tree.ancestors(config_path) if (path, name) in self.local] + [config_path]
+
+        return [path for path in paths if key in self.local.get((path, name), dict())]
@@ -0,0 +1,155 @@
+import threading
+
+
+class Endpoint:
+    """An AOS8 API endpoint with everything derived from its path worked out
+    once.
+
+    Params
+    ------
+    path: `str`
+        The endpoint resource path, ex. 'configuration/object/ap_group'. Can
+        be with or without the leading `/`.
+
+    key: `str`, optional, default: 'profile-name'
+        The object attribute that names, and so identifies, an object at a
+        config path. `None` for endpoints that aren't named objects.
+
+    data_required: bool, optional, default: False
+        True for endpoints that can only be POSTed to.
+    """
+    __slots__ = ('path', 'url_path', 'search', 'key', 'data_required')
+
+    def __init__(self, path, key='profile-name', data_required=False):
+        self.path = path.lstrip('/')
+        # Appended to the MM's base API URL to get the resource URL
+        self.url_path = f'/{self.path}'
+        # The object name used in filters and in the response `_data`
+        self.search = self.path.rsplit('/', 1)[-1]
+        self.key = key
+        self.data_required = data_required
+
+    def __repr__(self):
+        return f"Endpoint('{self.path}')"
+
+
+# The AOS8 configuration objects and the attribute that names them
+OBJECTS = {
+    'aaa_prof': 'profile-name',
+    'acl_sess': 'accname',
+    'add_configuration_device': None,
+    'ap_a_radio_prof': 'profile-name',
+    'ap_g_radio_prof': 'profile-name',
+    'ap_group': 'profile-name',
+    'ap_sys_prof': 'profile-name',
+    'dot11k_prof': 'profile-name',
+    'dot11r_prof': 'profile-name',
+    'ht_radio_prof': 'profile-name',
+    'ht_ssid_prof': 'profile-name',
+    'netdst': 'dstname',
+    'netsvc': 'name',
+    'node_hierarchy': None,
+    'rad_server': 'rad_server_name',
+    'reg_domain_prof': 'profile-name',
+    'role': 'rname',
+    'rrm_ie_prof': 'profile-name',
+    'server_group_prof': 'sg_name',
+    'ssid_prof': 'profile-name',
+    'virtual_ap': 'profile-name',
+}
+
+# Objects that can only be POSTed to
+POST_ONLY = {'add_configuration_device'}
+
+# Resource methods not named after their object
+METHOD_ALIASES = {
+    'ap_sys_profile': 'ap_sys_prof',
+    'wlan_ssid_profile': 'ssid_prof',
+}
+
+# Object names that are not configuration, so are left out of bulk features
+# like snapshots
+NON_CONFIG = {'add_configuration_device', 'node_hierarchy'}
+
+_lock = threading.Lock()
+
+# Endpoint path to `Endpoint`, including the ones only used with `resource()`
+_endpoints = dict()
+
+# Resource method name to its `Endpoint`
+RESOURCE_METHODS = dict()
+
+
+def get_endpoint(path):
+    '''Returns the `Endpoint` for the `path`, creating it on first use.
+    '''
+    endpoint = _endpoints.get(path)
+
+    if endpoint is None:
+        with _lock:
+            endpoint = _endpoints.get(path)
+            if endpoint is None:
+                endpoint = Endpoint(path)
+                # Cache it under the path both with and without the leading /
+                _endpoints[endpoint.path] = _endpoints[endpoint.url_path] = endpoint
+
+    return endpoint
+
+
+def register(name, path=None, key='profile-name', method_name=None, data_required=False):
+    '''Registers an AOS8 object endpoint and its resource method name.
+
+    Args:
+    -----
+    name: `str`
+        The object name, ex. 'int_vlan'.
+    path: `str`, optional
+        The endpoint path. Defaults to 'configuration/object/<name>'.
+    key: `str`, optional, default: 'profile-name'
+        The object attribute that names the objects.
+    method_name: `str`, optional
+        The resource method name. Defaults to the object name.
+    data_required: bool, optional, default: False
+        True if the endpoint can only be POSTed to.
+
+    Returns:
+    --------
+    The resource method name and the registered `Endpoint`.
+    '''
+    endpoint = Endpoint(path or f'configuration/object/{name}', key=key, data_required=data_required)
+
+    with _lock:
+        _endpoints[endpoint.path] = _endpoints[endpoint.url_path] = endpoint
+        RESOURCE_METHODS[method_name or name] = endpoint
+
+    return method_name or name, endpoint
+
+
+def object_key(name):
+    '''Returns the attribute naming the `name` objects, 'profile-name' if
+    the object is not registered.
+    '''
+    endpoint = _endpoints.get(f'configuration/object/{name}')
+    return endpoint.key if endpoint is not None else 'profile-name'
+
+
+def is_object(name):
+    '''Checks whether `name` is the name of a known object
+    '''
+    return f'configuration/object/{name}' in _endpoints
+
+
+def config_objects():
+    '''Returns the names of the registered configuration objects
+    '''
+    return sorted({
+        endpoint.search for endpoint in RESOURCE_METHODS.values()
+        if endpoint.path.startswith('configuration/object/') and endpoint.search not in NON_CONFIG
+    })
+
+
+for _name, _key in OBJECTS.items():
+    register(_name, key=_key, data_required=_name in POST_ONLY)
+
+for _alias, _name in METHOD_ALIASES.items():
+    RESOURCE_METHODS[_alias] = get_endpoint(f'configuration/object/{_name}')
@@ -0,0 +1,400 @@
+import json
+import operator
+from functools import lru_cache
+
+from . import endpoints
+
+# The filter operators of the AOS8 API
+OPERATORS = ('$eq', '$neq', '$in', '$nin', '$gt', '$gte', '$lt', '$lte')
+
+_COMPARISONS = {
+    '$gt': operator.gt,
+    '$gte': operator.ge,
+    '$lt': operator.lt,
+    '$lte': operator.le,
+}
+
+
+def text(value):
+    '''Returns the `value` as the text it is compared as, with booleans and
+    null as in JSON, so 'true' matches True.
+    '''
+    if value is True:
+        return 'true'
+    if value is False:
+        return 'false'
+    if value is None:
+        return 'null'
+    return str(value)
+
+
+def number(value):
+    '''Returns the `value` as a float, or `None` if it isn't a number
+    '''
+    if isinstance(value, bool):
+        return None
+
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def values_at(obj, keys):
+    '''Yields the values at the `keys` path of the object. Lists along the
+    path are walked into, so 'netdst__host.address' yields the address of
+    every host.
+    '''
+    stack = [(obj, 0)]
+
+    while stack:
+        value, depth = stack.pop()
+
+        if isinstance(value, list):
+            stack.extend((item, depth) for item in reversed(value))
+        elif depth == len(keys):
+            yield value
+        elif isinstance(value, dict) and keys[depth] in value:
+            stack.append((value[keys[depth]], depth + 1))
+
+
+def split_key(qualified_key):
+    '''Splits a qualified key, ex. 'netdst.netdst__host.address', into the
+    object name and the tuple of keys in the object.
+    '''
+    name, _, keys = qualified_key.partition('.')
+    if not keys:
+        raise ValueError(f"'{qualified_key}' is not a qualified key, ex. 'netdst.dstname'")
+
+    return name, tuple(keys.split('.'))
+
+
+class Condition:
+    """One condition of a filter, ex. {"netdst.dstname": {"$in": ["dns"]}}.
+
+    The filter values are normalised once, so matching an object only
+    normalises the object's values.
+    """
+    __slots__ = ('name', 'keys', 'oper', 'values', '_texts', '_numbers')
+
+    def __init__(self, qualified_key, oper, values):
+        if oper not in OPERATORS:
+            raise ValueError(f"Unknown filter operator '{oper}', use one of {', '.join(OPERATORS)}")
+
+        if not isinstance(values, list):
+            values = [values]
+
+        self.name, self.keys = split_key(qualified_key)
+        self.oper = oper
+        self.values = values
+        self._texts = frozenset(text(value) for value in values) if oper in ('$eq', '$neq') else tuple(text(value) for value in values)
+        self._numbers = tuple(number(value) for value in values)
+
+    @property
+    def qualified_key(self):
+        return '.'.join((self.name,) + self.keys)
+
+    def _compare(self, value):
+        compare = _COMPARISONS[self.oper]
+        value_number = number(value)
+
+        for filter_text, filter_number in zip(self._texts, self._numbers):
+            if value_number is not None and filter_number is not None:
+                if compare(value_number, filter_number):
+                    return True
+            elif compare(text(value), filter_text):
+                return True
+
+        return False
+
+    def matches(self, obj):
+        '''Checks whether the object matches the condition. Like the MM, a
+        value matches if any of the values at the key match any of the
+        filter values.
+        '''
+        oper = self.oper
+
+        if oper in ('$eq', '$neq'):
+            found = any(text(value) in self._texts for value in values_at(obj, self.keys))
+            return found if oper == '$eq' else not found
+
+        if oper in ('$in', '$nin'):
+            found = any(
+                pattern in value_text
+                for value_text in map(text, values_at(obj, self.keys))
+                for pattern in self._texts)
+            return found if oper == '$in' else not found
+
+        return any(self._compare(value) for value in values_at(obj, self.keys))
+
+    def __repr__(self):
+        return f"Condition('{self.qualified_key}', '{self.oper}', {self.values})"
+
+
+def parse(filter):
+    '''Parses a filter in the form `_params()` accepts.
+
+    Args:
+    -----
+    filter: `str`, `list`, dict or `Filter`
+        A JSON filter expression, or the list of conditions it decodes to,
+        ex. [{"netdst.dstname": {"$in": ["dns"]}}]. A single condition dict
+        may have more than one key and operator.
+
+    Returns:
+    --------
+    The list of `Condition`, all of which must match.
+
+    Raises:
+    -------
+    ValueError if the filter isn't valid.
+    '''
+    if isinstance(filter, Filter):
+        return list(filter.conditions)
+    if isinstance(filter, (str, bytes)):
+        filter = json.loads(filter)
+    if isinstance(filter, dict):
+        filter = [filter]
+
+    conditions = list()
+
+    for condition in filter or list():
+        if not isinstance(condition, dict):
+            raise ValueError(f"Filter conditions must be dicts, got: {condition}")
+
+        for qualified_key, opers in condition.items():
+            if not isinstance(opers, dict):
+                raise ValueError(f"The condition on '{qualified_key}' must be a dict of operator to values, got: {opers}")
+            conditions.extend(Condition(qualified_key, oper, values) for oper, values in opers.items())
+
+    return conditions
+
+
+def matches(obj, conditions):
+    '''Checks whether the object matches all `conditions`, as returned by
+    `parse()`.
+    '''
+    return all(condition.matches(obj) for condition in conditions)
+
+
+def sort_key(sort):
+    '''Parses a sort in the form `_params()` accepts, ex. '-netdst.dstname'.
+
+    Returns:
+    --------
+    The object name, the tuple of keys and True if descending.
+    '''
+    descending = sort.startswith('-')
+    name, keys = split_key(sort.lstrip('+-'))
+
+    return name, keys, descending
+
+
+def sort_value(obj, keys):
+    '''Returns the value the object is sorted on, numbers before text, or
+    `None` if it has no value at the `keys`.
+    '''
+    for value in values_at(obj, keys):
+        value_number = number(value)
+        return (0, value_number, '') if value_number is not None else (1, 0.0, text(value))
+
+    return None
+
+
+class Filter:
+    """A filter of the `name` objects, built from clauses on their keys,
+    which can be used again and again at no cost.
+
+    Every clause method returns a new filter, so filters can be shared
+    between threads and extended without changing them. The JSON sent to
+    the MM and the `Condition` list used by `matches()` are only worked
+    out once per filter.
+
+    Keys are relative to the object, ex. 'dstname' or
+    'netdst__host.address', or qualified with the object name, ex.
+    'netdst.dstname'. A key starting with the name of another object is
+    taken as qualified with it and raises a ValueError, so keys of nested
+    profiles named after their object must be qualified, ex.
+    'ap_group.virtual_ap.profile-name'. Using a filter with the endpoint of
+    another object raises a ValueError too.
+
+    Params
+    ------
+    name: `str`
+        The object name, ex. 'netdst'.
+
+    Examples
+    --------
+    >>> dns = Filter('netdst').eq('dstname', 'dns', 'dns-backup')
+    >>> dns.json
+    '[{"netdst.dstname":{"$eq":["dns","dns-backup"]}}]'
+    >>> mmc.netdst(filter=dns, config_path='/md/EU')
+    >>> lab = Filter('ap_group').contains('profile-name', 'lab').gt('ap_group.dot11a_prof.channel', 100)
+    >>> [ap_group for ap_group in ap_groups if lab.matches(ap_group)]
+    """
+    __slots__ = ('name', 'clauses', '_json', '_conditions')
+
+    def __init__(self, name, clauses=()):
+        if not name or '.' in name:
+            raise ValueError(f"'{name}' is not an object name, ex. 'netdst'")
+
+        self.name = name
+        # The (qualified key, operator, values tuple) of every clause
+        self.clauses = tuple(clauses)
+        self._json = None
+        self._conditions = None
+
+    def qualify(self, key):
+        '''Returns the `key` qualified with the object name, unless it
+        already is.
+
+        Raises:
+        -------
+        ValueError if the key is empty or qualified with another object's
+        name.
+        '''
+        if not key or key.startswith('.') or key.endswith('.'):
+            raise ValueError(f"'{key}' is not a key of the {self.name} objects")
+
+        if key.startswith(f'{self.name}.'):
+            return key
+
+        name, dot, _ = key.partition('.')
+        if dot and endpoints.is_object(name):
+            raise ValueError(
+                f"'{key}' is a key of the {name} objects, not of the {self.name} ones. "
+                f"Qualify keys of nested {name} profiles, ex. '{self.name}.{key}'")
+
+        return f'{self.name}.{key}'
+
+    def where(self, key, oper, *values):
+        '''Returns the filter with the clause added.
+
+        Args:
+        -----
+        key: `str`
+            The key, ex. 'dstname' or 'netdst.dstname'.
+        oper: `str`
+            The filter operator, ex. '$eq', see `OPERATORS`.
+        *values:
+            The values, or a single list of them.
+
+        Raises:
+        -------
+        ValueError if the operator is unknown, there are no values or the
+        key is empty.
+        '''
+        if oper not in OPERATORS:
+            raise ValueError(f"Unknown filter operator '{oper}', use one of {', '.join(OPERATORS)}")
+        if len(values) == 1 and isinstance(values[0], (list, tuple, set, frozenset)):
+            values = tuple(values[0])
+        if not values:
+            raise ValueError(f"The {oper} clause on '{key}' needs at least one value")
+
+        return Filter(self.name, self.clauses + ((self.qualify(key), oper, values),))
+
+    def eq(self, key, *values):
+        '''Matches objects with a value equal to one of the `values`
+        '''
+        return self.where(key, '$eq', *values)
+
+    def neq(self, key, *values):
+        '''Matches objects with no value equal to any of the `values`
+        '''
+        return self.where(key, '$neq', *values)
+
+    def contains(self, key, *values):
+        '''Matches objects with a value containing one of the `values`, the
+        `$in` operator
+        '''
+        return self.where(key, '$in', *values)
+
+    def not_contains(self, key, *values):
+        '''Matches objects with no value containing any of the `values`,
+        the `$nin` operator
+        '''
+        return self.where(key, '$nin', *values)
+
+    def gt(self, key, *values):
+        return self.where(key, '$gt', *values)
+
+    def gte(self, key, *values):
+        return self.where(key, '$gte', *values)
+
+    def lt(self, key, *values):
+        return self.where(key, '$lt', *values)
+
+    def lte(self, key, *values):
+        return self.where(key, '$lte', *values)
+
+    def to_list(self):
+        '''Returns the filter as the list of conditions `_params()` takes
+        '''
+        return [{key: {oper: list(values)}} for key, oper, values in self.clauses]
+
+    @property
+    def json(self):
+        '''The JSON filter expression sent to the MM
+        '''
+        if self._json is None:
+            self._json = json.dumps(self.to_list(), separators=(',', ':'))
+        return self._json
+
+    @property
+    def conditions(self):
+        '''The tuple of `Condition` used to evaluate the filter
+        '''
+        if self._conditions is None:
+            self._conditions = tuple(Condition(key, oper, list(values)) for key, oper, values in self.clauses)
+        return self._conditions
+
+    def matches(self, obj):
+        '''Checks whether the object matches every clause, as the MM would
+        '''
+        return all(condition.matches(obj) for condition in self.conditions)
+
+    def filter(self, objs):
+        '''Returns the objects matching the filter, ex. of a cached GET
+        response's `_data` list
+        '''
+        conditions = self.conditions
+        return [obj for obj in objs if all(condition.matches(obj) for condition in conditions)]
+
+    def validate(self, name):
+        '''Checks the filter can be used with the `name` objects, so that
+        it's of the `name` objects and all its keys are qualified with it.
+
+        Raises:
+        -------
+        ValueError if it filters other objects.
+        '''
+        if name != self.name:
+            raise ValueError(f"A filter of the {self.name} objects can't be used with the {name} endpoint")
+
+        for key, _, _ in self.clauses:
+            if not key.startswith(f'{name}.'):
+                raise ValueError(f"'{key}' is not a key of the {name} objects")
+
+    def __eq__(self, other):
+        return isinstance(other, Filter) and (self.name, self.clauses) == (other.name, other.clauses)
+
+    def __hash__(self):
+        return hash((self.name, self.clauses))
+
+    def __len__(self):
+        return len(self.clauses)
+
+    def __str__(self):
+        return self.json
+
+    def __repr__(self):
+        return f"Filter('{self.name}', {list(self.clauses)})"
+
+
+@lru_cache(maxsize=1024)
+def profile_name_filter(name, oper, profile_names):
+    '''Returns the `Filter` of the `name` objects with the `profile-name`
+    matching the tuple of `profile_names` with `oper`, built once for every
+    combination, for the `profile_name` argument of `_params()`.
+    '''
+    return Filter(name).where('profile-name', oper, profile_names)
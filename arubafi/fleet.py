@@ -0,0 +1,238 @@
+import getpass
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+import logging
+import logzero
+from logzero import logger
+
+from .mmclient import MMClient
+
+
+class MMFleet:
+    """A pool of logged in `MMClient` instances, one per Mobility Master.
+
+    Every MM in the fleet is logged into concurrently with the `comms()`
+    method and keeps its own session and `UIDARUBA` token. Any `MMClient`
+    method can then be run on all, or a subset of, the MMs in parallel with
+    the `run()` method, or by calling the method on the fleet directly.
+
+    Params
+    ------
+    mm_hosts: `list`
+        FQDNs or IPs of the Mobility Masters. No leading https://
+
+    username: `str`, optional, default: None
+        Username used to log into every Mobility Master. Asked for when
+        calling `comms()` if not provided.
+
+    password: `str`, optional, default: None
+        Password used to log into every Mobility Master. Asked for when
+        calling `comms()` if not provided.
+
+    max_workers: `int`, optional, default: None
+        The maximum number of MMs talked to at the same time. Defaults to
+        the number of MMs, capped at 32.
+
+    **client_kwargs:
+        Passed to every `MMClient` instance, so read what is accepted from
+        there (`api_version`, `port`, `verify`, `timeout`, `proxy`).
+
+    Examples
+    --------
+    **Ex. 1:** GET the AP groups from every MM
+
+    >>> fleet = MMFleet(
+            ["mm01.domain.com", "mm02.domain.com"],
+            username="apiuser",
+            password="the_password")
+    >>> fleet.comms()
+    >>> results, errors = fleet.ap_group(config_path='/md')
+    >>> results['mm01.domain.com']
+    ({'_data': {'ap_group': [...]}}, None)
+
+    **Ex. 2:** Run a method on a subset of the MMs
+
+    >>> results, errors = fleet.run(
+            'ap_group',
+            hosts=['mm02.domain.com'],
+            profile_name='default')
+    """
+
+    def __init__(self, mm_hosts, username=None, password=None, max_workers=None, **client_kwargs):
+        # Keep the order the hosts were passed in, but without duplicates
+        self.mm_hosts = list(dict.fromkeys(mm_hosts))
+        self.username = username
+        self.password = password
+        self.max_workers = max_workers or min(32, max(1, len(self.mm_hosts)))
+        self.client_kwargs = client_kwargs
+
+        # host to logged in `MMClient` mapping
+        self.clients = dict()
+        # host to exception mapping for MMs that could not be logged into
+        self.login_errors = dict()
+
+    def __enter__(self):
+        self.comms()
+        return self
+
+    def __exit__(self, *exc):
+        self.logout()
+
+    def __getitem__(self, host):
+        return self.clients[host]
+
+    def __getattr__(self, name):
+        '''Makes every public `MMClient` method callable on the fleet.
+
+        The returned callable accepts the same arguments as the `MMClient`
+        method plus an optional `hosts` argument and returns what `run()`
+        returns.
+        '''
+        if not name.startswith('_') and callable(getattr(MMClient, name, None)):
+            return partial(self.run, name)
+
+        raise AttributeError(f"'{self.__class__.__name__}' object has no attribute '{name}'")
+
+    def comms(self):
+        '''Logs into every Mobility Master concurrently.
+
+        Username and password are asked for only once and used for every MM.
+
+        Returns:
+        --------
+        A dict of host to exception for every MM that could not be logged
+        into. Empty if all logins succeeded.
+        '''
+        logger.info('Calling comms()')
+
+        # Ask for the credentials here, as they can't be asked for from
+        # within the worker threads
+        if not self.username:
+            user_input = input("MM API username required. Should I use `{}` to continue [Y/n]?".format(getpass.getuser()))
+
+            if user_input.lower() == "n":
+                self.username = input("API username:\x20")
+            else:
+                self.username = getpass.getuser()
+
+        if not self.password:
+            self.password = getpass.getpass("MM API password for user `{}` required:\x20".format(self.username))
+
+        hosts = [host for host in self.mm_hosts if host not in self.clients]
+        self.login_errors = dict()
+
+        if hosts:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(hosts))) as executor:
+                logins = {host: executor.submit(self._login_one, host) for host in hosts}
+
+            for host, future in logins.items():
+                exc = future.exception()
+                if exc:
+                    self.login_errors[host] = exc
+                else:
+                    self.clients[host] = future.result()
+
+        logzero.loglevel(logging.ERROR)
+
+        return self.login_errors
+
+    def _login_one(self, host):
+        '''Creates an `MMClient` for the `host` and logs into it.
+
+        Raises:
+        -------
+        RuntimeError if the MM returned a login error or couldn't be reached.
+        '''
+        mmc = MMClient(
+            mm_host=host,
+            username=self.username,
+            password=self.password,
+            **self.client_kwargs)
+
+        # In a worker thread a failed login returns its error instead of
+        # exiting
+        login_resp = mmc.comms()
+
+        if not mmc._access_token:
+            raise RuntimeError(f"Login to {host} failed: {login_resp}")
+
+        return mmc
+
+    def run(self, method, *args, hosts=None, **kwargs):
+        '''Runs an `MMClient` method on the MMs in parallel.
+
+        Args:
+        -----
+        method: `str`
+            Name of the `MMClient` method to call, ex. 'ap_group'.
+
+        *args:
+            Passed to the method.
+
+        hosts: `list`, optional, default: None
+            The MMs to run the method on. Defaults to all logged in MMs.
+
+        **kwargs:
+            Passed to the method.
+
+        Returns:
+        --------
+        results: dict
+            Host to what the method returned for that MM, which for resource
+            methods is the usual response and error tuple.
+
+        errors: dict
+            Host to the exception raised for that MM. MMs that are not logged
+            into get a `KeyError`.
+        '''
+        logger.info('Calling run(%s)', method)
+
+        if hosts is None:
+            hosts = list(self.clients)
+
+        results = dict()
+        errors = dict()
+
+        for host in hosts:
+            if host not in self.clients:
+                errors[host] = KeyError(f"Not logged into {host}")
+
+        hosts = [host for host in hosts if host in self.clients]
+
+        if hosts:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(hosts))) as executor:
+                calls = {
+                    host: executor.submit(getattr(self.clients[host], method), *args, **kwargs)
+                    for host in hosts
+                }
+
+            for host, future in calls.items():
+                exc = future.exception()
+                if exc:
+                    errors[host] = exc
+                else:
+                    results[host] = future.result()
+
+        logzero.loglevel(logging.ERROR)
+
+        return results, errors
+
+    def logout(self, hosts=None):
+        '''Logs out of the MMs and removes them from the fleet.
+
+        Args:
+        -----
+        hosts: `list`, optional, default: None
+            The MMs to log out of. Defaults to all logged in MMs.
+
+        Returns:
+        --------
+        The same as what `run()` returns.
+        '''
+        results, errors = self.run('logout', hosts=hosts)
+
+        for host in list(results) + list(errors):
+            self.clients.pop(host, None)
+
+        return results, errors
@@ -0,0 +1,221 @@
+import threading
+import time
+from contextlib import contextmanager
+
+from logzero import logger
+
+
+class Governor:
+    """Client side request rate and concurrency limits for one host.
+
+    Requests first take a token from a token bucket refilled at `rate`
+    tokens per second, then wait for one of the `max_in_flight` slots.
+    Either limit can be left out. Use `Governor.for_host()` to get the
+    governor shared by every client of a host, so fanning out over many
+    sessions or threads doesn't multiply the load on the host.
+
+    Params
+    ------
+    rate: `float`, optional, default: None
+        The maximum number of requests started per second. Not limited if
+        `None`.
+
+    max_in_flight: `int`, optional, default: None
+        The maximum number of requests in flight at the same time. Not
+        limited if `None`.
+
+    burst: `int`, optional, default: None
+        The number of requests that can be started at once after being idle.
+        Defaults to `rate`, but at least 1.
+
+    Examples
+    --------
+    >>> governor = Governor.for_host('arubamm.domain.com:4343', rate=20, max_in_flight=4)
+    >>> with governor.slot() as queued:
+            session.get(url)
+    >>> governor.stats()
+    {'requests': 1, 'in_flight': 0, 'queued_seconds': 0.0, 'max_queued_seconds': 0.0}
+    """
+
+    # Host to its shared `Governor`
+    _registry = dict()
+    _registry_lock = threading.Lock()
+
+    def __init__(self, rate=None, max_in_flight=None, burst=None):
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        self._tokens = None
+        self.rate = None
+        self.burst = None
+
+        self.requests = 0
+        self.queued_seconds = 0.0
+        self.max_queued_seconds = 0.0
+
+        self.configure(rate, max_in_flight, burst)
+
+    def configure(self, rate=None, max_in_flight=None, burst=None):
+        '''Sets new limits. Requests already waiting are held to them too.
+
+        The tokens left in the bucket are kept, only capped to the new
+        `burst`, so changing the limits never grants an extra burst.
+        '''
+        if rate is not None and rate <= 0:
+            raise ValueError(f"The request rate must be positive, not {rate}")
+        if max_in_flight is not None and max_in_flight < 1:
+            raise ValueError(f"At least 1 request must be allowed in flight, not {max_in_flight}")
+
+        burst = burst or max(1, int(rate or 1))
+
+        with self._cond:
+            now = time.monotonic()
+            if self._tokens is None:
+                self._tokens = float(burst)
+            else:
+                if self.rate:
+                    self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+                self._tokens = min(self._tokens, float(burst))
+
+            self.rate = rate
+            self.max_in_flight = max_in_flight
+            self.burst = burst
+            self._last = now
+            self._cond.notify_all()
+
+    @classmethod
+    def for_host(cls, host, rate=None, max_in_flight=None, burst=None):
+        '''Returns the governor shared by all clients of the `host`.
+
+        The first call for a host creates its governor. Later calls can only
+        tighten its limits, so each limit is the strictest one asked for by
+        any client of the host. A client asking for no limit, or a looser
+        one, doesn't lift the limits other clients rely on.
+
+        Args:
+        -----
+        host: `str`
+            The host, with the port if it's not the default one.
+        rate, max_in_flight, burst:
+            The limits, see `Governor`.
+
+        Returns:
+        --------
+        The `Governor` of the host.
+        '''
+        with cls._registry_lock:
+            governor = cls._registry.get(host)
+            if governor is None:
+                governor = cls._registry[host] = cls(rate, max_in_flight, burst)
+                return governor
+
+        with governor._cond:
+            if rate and not burst:
+                burst = max(1, int(rate))
+            limits = (
+                _strictest(governor.rate, rate),
+                _strictest(governor.max_in_flight, max_in_flight),
+                _strictest(governor.burst if governor.rate else None, burst),
+            )
+            current = (governor.rate, governor.max_in_flight, governor.burst if governor.rate else None)
+
+        if limits != current:
+            logger.debug("Tightening the request limits of %s", host)
+            governor.configure(*limits)
+
+        return governor
+
+    def acquire(self):
+        '''Waits until a request can be sent.
+
+        Every `acquire()` must be followed by a `release()` once the request
+        is done.
+
+        Returns:
+        --------
+        The number of seconds waited.
+        '''
+        start = time.monotonic()
+
+        if self.rate:
+            with self._cond:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                # Take the token now, so requests get the tokens in order
+                self._tokens -= 1
+                wait = -self._tokens / self.rate if self._tokens < 0 else 0
+
+            if wait:
+                time.sleep(wait)
+
+        with self._cond:
+            while self.max_in_flight and self._in_flight >= self.max_in_flight:
+                self._cond.wait()
+            self._in_flight += 1
+
+            queued = time.monotonic() - start
+            self.requests += 1
+            self.queued_seconds += queued
+            self.max_queued_seconds = max(self.max_queued_seconds, queued)
+
+        return queued
+
+    def release(self):
+        '''Frees the slot of a request that's done
+        '''
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify()
+
+    def hold_until_closed(self, response):
+        '''Hands the slot of a request over to its streamed `response`.
+
+        The body of a streamed response is read after the request returns,
+        so the slot is only released once the response is closed.
+        '''
+        close = response.close
+        held = True
+
+        def close_and_release():
+            nonlocal held
+            try:
+                close()
+            finally:
+                if held:
+                    held = False
+                    self.release()
+
+        response.close = close_and_release
+
+    @contextmanager
+    def slot(self):
+        '''Context manager holding a slot for one request. Gives the number of
+        seconds waited for it.
+        '''
+        queued = self.acquire()
+        try:
+            yield queued
+        finally:
+            self.release()
+
+    def stats(self):
+        '''Returns the number of requests let through, the number in flight
+        and the total and longest number of seconds requests were queued.
+        '''
+        with self._cond:
+            return {
+                'requests': self.requests,
+                'in_flight': self._in_flight,
+                'queued_seconds': self.queued_seconds,
+                'max_queued_seconds': self.max_queued_seconds,
+            }
+
+
+def _strictest(current, new):
+    '''Returns the lower of two limits, where `None` is no limit
+    '''
+    if current is None:
+        return new
+    if new is None:
+        return current
+    return min(current, new)
@@ -0,0 +1,214 @@
+import fnmatch
+import re
+from functools import lru_cache
+
+
+class Node:
+    """A node of the MM configuration hierarchy.
+
+    Devices are nodes too, with their MAC as the name, as their config path
+    is the one of the group they're in followed by their MAC.
+    """
+    __slots__ = ('path', 'name', 'type', 'parent', 'children', 'device')
+
+    def __init__(self, path, name, type, parent=None, device=None):
+        self.path = path
+        self.name = name
+        self.type = type
+        self.parent = parent
+        self.children = list()
+        # The `devices` entry of a device node
+        self.device = device
+
+    def __repr__(self):
+        return f"Node('{self.path}', type='{self.type}')"
+
+
+@lru_cache(maxsize=256)
+def _segment_re(segment):
+    return re.compile(fnmatch.translate(segment))
+
+
+class NodeTree:
+    """Indexed tree of the MM configuration hierarchy, as returned by the
+    `configuration/object/node_hierarchy` endpoint.
+
+    Every node is indexed by its config path, so paths are looked up in
+    constant time, and config paths can be checked before being sent to
+    the MM.
+
+    Params
+    ------
+    hierarchy: dict
+        The root node, with its `name`, `type`, `childnodes` and `devices`.
+        Either the `node_hierarchy` response or its root node.
+
+    Examples
+    --------
+    >>> tree = mmc.hierarchy()
+    >>> '/md/EU/lab' in tree
+    True
+    >>> tree.glob('/md/EU/*/site-*')
+    ['/md/EU/DE/site-01', '/md/EU/FR/site-01']
+    >>> tree.ancestors('/md/EU/lab')
+    ['/', '/md', '/md/EU']
+    """
+
+    def __init__(self, hierarchy):
+        if isinstance(hierarchy.get('_data'), dict):
+            hierarchy = hierarchy['_data'].get('node_hierarchy', hierarchy['_data'])
+
+        # The root node dict the tree was built from
+        self.hierarchy = hierarchy
+        self._nodes = dict()
+        self.root = self._add(hierarchy, None)
+
+    def _add(self, node_dict, parent):
+        '''Adds the node and everything below it, without recursing, so any
+        depth of hierarchy can be indexed.
+        '''
+        root = None
+        stack = [(node_dict, parent)]
+
+        while stack:
+            node_dict, parent = stack.pop()
+            name = node_dict.get('name', '')
+
+            if parent is None:
+                path = '/'
+            else:
+                path = f"{parent.path.rstrip('/')}/{name}"
+
+            node = Node(path, name, node_dict.get('type'), parent)
+            self._nodes[path] = node
+
+            if parent is None:
+                root = node
+            else:
+                parent.children.append(node)
+
+            for device in node_dict.get('devices') or []:
+                mac = device.get('mac') or device.get('name')
+                device_node = Node(f"{path.rstrip('/')}/{mac}", mac, 'device', node, device)
+                node.children.append(device_node)
+                self._nodes[device_node.path] = device_node
+
+            # Reversed, so children are visited in their order
+            stack.extend((child, node) for child in reversed(node_dict.get('childnodes') or []))
+
+        return root
+
+    @staticmethod
+    def normalise(path):
+        '''Returns the `path` without a trailing `/`, except for the root
+        '''
+        return path.rstrip('/') or '/'
+
+    def __contains__(self, path):
+        return self.normalise(path) in self._nodes
+
+    def __len__(self):
+        return len(self._nodes)
+
+    def __iter__(self):
+        return iter(self._nodes)
+
+    def get(self, path):
+        '''Returns the `Node` at the `path` or `None`
+        '''
+        return self._nodes.get(self.normalise(path))
+
+    def paths(self, include_devices=True):
+        '''Returns all config paths, parents before their children
+        '''
+        return [path for path, node in self._nodes.items() if include_devices or node.type != 'device']
+
+    def subtree(self, path, include_devices=True):
+        '''Returns the config paths at and below the `path`, parents before
+        their children.
+
+        Raises:
+        -------
+        KeyError if the `path` isn't in the hierarchy.
+        '''
+        node = self._nodes[self.normalise(path)]
+        paths = list()
+        stack = [node]
+
+        while stack:
+            node = stack.pop()
+            if include_devices or node.type != 'device':
+                paths.append(node.path)
+            stack.extend(reversed(node.children))
+
+        return paths
+
+    def ancestors(self, path):
+        '''Returns the config paths above the `path`, root first.
+
+        Raises:
+        -------
+        KeyError if the `path` isn't in the hierarchy.
+        '''
+        node = self._nodes[self.normalise(path)].parent
+        ancestors = list()
+
+        while node is not None:
+            ancestors.append(node.path)
+            node = node.parent
+
+        return ancestors[::-1]
+
+    def glob(self, pattern):
+        '''Returns the config paths matching the `pattern`.
+
+        The pattern is matched one path segment at a time with `fnmatch`
+        wildcards (`*`, `?` and `[...]`), which don't match across `/`. A
+        `**` segment matches any number of segments.
+
+        Args:
+        -----
+        pattern: `str`
+            ex. '/md/EU/*/site-*' or '/md/**/lab'.
+
+        Returns:
+        --------
+        The matching config paths, parents before their children.
+        '''
+        segments = [segment for segment in pattern.split('/') if segment]
+        matches = dict()
+        # Nodes paired with the index of the next segment to match
+        stack = [(self.root, 0)]
+
+        while stack:
+            node, index = stack.pop()
+
+            if index == len(segments):
+                matches[node.path] = None
+                continue
+
+            segment = segments[index]
+
+            if segment == '**':
+                # Match nothing more here, or one more segment and stay on **
+                stack.append((node, index + 1))
+                stack.extend((child, index) for child in reversed(node.children))
+                continue
+
+            regex = _segment_re(segment)
+            stack.extend((child, index + 1) for child in reversed(node.children) if regex.match(child.name))
+
+        order = {path: i for i, path in enumerate(self._nodes)}
+        return sorted(matches, key=order.__getitem__)
+
+    def validate(self, path):
+        '''Checks the `path` is in the hierarchy.
+
+        Returns:
+        --------
+        `None` if it is, else an error dict like the MM's `_global_result`.
+        '''
+        if path is None or self.normalise(path) in self._nodes:
+            return None
+
+        return {'status': -1, 'status_str': f"Unknown config_path '{path}'"}
@@ -0,0 +1,253 @@
+import hashlib
+import json
+
+from . import endpoints
+from .filters import text
+from .reconcile import normalise
+
+# Written in the hashes file, so files of other versions are recomputed
+VERSION = 1
+
+
+def digest(*parts):
+    '''Returns the hex digest of the `bytes` or `str` parts
+    '''
+    hasher = hashlib.blake2b(digest_size=16)
+
+    for part in parts:
+        hasher.update(part.encode('utf-8') if isinstance(part, str) else part)
+        # Separate the parts, so ('ab', 'c') and ('a', 'bc') differ
+        hasher.update(b'\0')
+
+    return hasher.hexdigest()
+
+
+def object_hash(obj):
+    '''Returns the hash of the object, without its `_flags` and `_meta`, so
+    objects with the same config have the same hash.
+    '''
+    return digest(json.dumps(normalise(obj), sort_keys=True, separators=(',', ':'), ensure_ascii=False))
+
+
+def object_id(name, obj, obj_hash=None):
+    '''Returns the value of the attribute naming the `name` object, or its
+    hash if it has none.
+    '''
+    value = obj.get(endpoints.object_key(name)) if isinstance(obj, dict) else None
+
+    return text(value) if value is not None else obj_hash or object_hash(obj)
+
+
+# The hash of an object type without any objects
+EMPTY = digest()
+
+
+def type_hash(objects):
+    '''Returns the hash of the object id to object hash dict of a type
+    '''
+    return digest(*(part for obj_id in sorted(objects) for part in (obj_id, objects[obj_id]))) if objects else EMPTY
+
+
+def parent_path(path):
+    '''Returns the config path of the node above the `path`
+    '''
+    return path.rsplit('/', 1)[0] or '/'
+
+
+class SnapshotHashes:
+    """Hashes of the objects of a snapshot, of every object type at every
+    node, and of every node, which covers its objects and every node below
+    it, like a Merkle tree.
+
+    Two snapshots with the same node hash have the same config at and below
+    that node, so `drift()` only descends into the nodes and object types
+    whose hashes differ. Build the hashes with `build()`.
+
+    Params
+    ------
+    root: `str`
+        The config path the snapshot was taken below.
+
+    paths: `list`
+        All config paths of the snapshot, parents before their children.
+
+    objects: dict
+        Config path to object name to object id to object hash, ex.
+        {'/md': {'netdst': {'dns': '5d3f...'}}}.
+
+    types: dict
+        Config path to object name to the hash of its objects, for the
+        object types with objects.
+
+    nodes: dict
+        Config path to the hash of the node.
+
+    errors: `list`, optional, default: None
+        The (config_path, object name) of the requests that failed, whose
+        objects aren't known.
+    """
+
+    def __init__(self, root, paths, objects, types, nodes, errors=None):
+        self.root = root
+        self.objects = objects
+        self.types = types
+        self.nodes = nodes
+        self.errors = {tuple(error) for error in errors or list()}
+
+        # Config path to the config paths of the nodes right below it
+        self.children = {path: list() for path in paths}
+        for path in paths:
+            if path != root and parent_path(path) in self.children:
+                self.children[parent_path(path)].append(path)
+
+    @classmethod
+    def build(cls, root, paths, objects, errors=None):
+        '''Works out the type and node hashes from the object hashes.
+
+        Args:
+        -----
+        root: `str`
+            The config path the snapshot was taken below.
+        paths: `list`
+            All config paths of the snapshot, parents before their children.
+        objects: dict
+            Config path to object name to object id to object hash.
+        errors: `list`, optional, default: None
+            The (config_path, object name) of the requests that failed.
+
+        Returns:
+        --------
+        The `SnapshotHashes`.
+        '''
+        paths = list(paths)
+        if root not in paths:
+            paths.insert(0, root)
+
+        types = {
+            path: {name: type_hash(objs) for name, objs in names.items() if objs}
+            for path, names in objects.items()}
+
+        hashes = cls(root, paths, objects, types, dict(), errors)
+
+        for path in reversed(paths):
+            path_types = types.get(path, dict())
+            hashes.nodes[path] = digest(
+                path,
+                *(part for name in sorted(path_types) for part in (name, path_types[name])),
+                *(part for child in sorted(hashes.children[path]) for part in (child, hashes.nodes[child])))
+
+        return hashes
+
+    def to_dict(self):
+        return {
+            'version': VERSION,
+            'root': self.root,
+            'paths': list(self.children),
+            'objects': self.objects,
+            'types': self.types,
+            'nodes': self.nodes,
+            'errors': sorted(self.errors),
+        }
+
+    @classmethod
+    def from_dict(cls, hashes):
+        '''Returns the hashes of the dict returned by `to_dict()`.
+
+        Raises:
+        -------
+        ValueError if the dict is of another version.
+        '''
+        if hashes.get('version') != VERSION:
+            raise ValueError(f"Version {hashes.get('version')} hashes, only version {VERSION} are supported")
+
+        return cls(hashes['root'], hashes['paths'], hashes['objects'], hashes['types'], hashes['nodes'], hashes['errors'])
+
+    def type_hash(self, path, name):
+        '''Returns the hash of the `name` objects at the `path`
+        '''
+        return self.types.get(path, dict()).get(name, EMPTY)
+
+
+def _changes(path, name, old, new):
+    '''Yields the changes between the object id to hash dicts of a type
+    '''
+    for obj_id in sorted(old.keys() | new.keys()):
+        old_hash = old.get(obj_id)
+        new_hash = new.get(obj_id)
+
+        if old_hash is None:
+            yield {'config_path': path, 'name': name, 'id': obj_id, 'change': 'added'}
+        elif new_hash is None:
+            yield {'config_path': path, 'name': name, 'id': obj_id, 'change': 'removed'}
+        elif old_hash != new_hash:
+            yield {'config_path': path, 'name': name, 'id': obj_id, 'change': 'changed'}
+
+
+def drift(old, new):
+    '''Finds the objects that differ between two `SnapshotHashes`.
+
+    Starting at the root, only the nodes whose hashes differ are descended
+    into, and only the object types whose hashes differ at them are
+    compared, so the time taken grows with the number of changes rather
+    than the size of the config.
+
+    Args:
+    -----
+    old: `SnapshotHashes`
+        The hashes of the earlier snapshot.
+    new: `SnapshotHashes`
+        The hashes of the later snapshot.
+
+    Returns:
+    --------
+    The list of changes, parents before their children. Each change is a
+    dict with the `config_path`, object `name`, object `id` (the value of
+    the attribute naming it, ex. its `profile-name`) and the `change`:
+    either 'added', 'removed' or 'changed'. Object types that failed to be
+    fetched in either snapshot have a single change with an `id` of `None`
+    and a `change` of 'unknown'.
+
+    Raises:
+    -------
+    ValueError if the snapshots were taken below different config paths.
+    '''
+    if old.root != new.root:
+        raise ValueError(f"Snapshots of '{old.root}' and '{new.root}' can't be compared")
+
+    # Object types that failed in either snapshot, by config path, and the
+    # config paths above them, which are always descended into
+    errors = dict()
+    for path, name in old.errors | new.errors:
+        errors.setdefault(path, set()).add(name)
+
+    forced = set()
+    for path in errors:
+        while path not in forced:
+            forced.add(path)
+            path = parent_path(path)
+
+    changes = list()
+    stack = [old.root]
+
+    while stack:
+        path = stack.pop()
+        if path not in forced and old.nodes.get(path) == new.nodes.get(path):
+            continue
+
+        old_types = old.types.get(path, dict())
+        new_types = new.types.get(path, dict())
+        failed = errors.get(path, set())
+
+        for name in sorted(old_types.keys() | new_types.keys() | failed):
+            if name in failed:
+                changes.append({'config_path': path, 'name': name, 'id': None, 'change': 'unknown'})
+            elif old.type_hash(path, name) != new.type_hash(path, name):
+                changes.extend(_changes(
+                    path, name,
+                    old.objects.get(path, dict()).get(name, dict()),
+                    new.objects.get(path, dict()).get(name, dict())))
+
+        children = set(old.children.get(path, ())) | set(new.children.get(path, ()))
+        stack.extend(sorted(children, reverse=True))
+
+    return changes
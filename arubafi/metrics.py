@@ -0,0 +1,304 @@
+import abc
+import bisect
+import os
+import tempfile
+import threading
+
+# Upper bounds in seconds of the request latency histogram buckets
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Histogram:
+    """A fixed bucket histogram of observed values.
+
+    Params
+    ------
+    buckets: `tuple`
+        Sorted upper bounds of the buckets. Values above the last one are
+        only counted in the implicit `+Inf` bucket.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def snapshot(self):
+        '''Returns the histogram with cumulative bucket counts
+        '''
+        cumulative = list()
+        total = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            cumulative.append((bound, total))
+
+        return {'buckets': cumulative, 'sum': self.sum, 'count': self.count}
+
+
+class Metrics:
+    """Thread safe per host and per endpoint API request metrics.
+
+    Tracks request counts, latency histograms, response bytes, retries and
+    error status codes for every host and endpoint, and the number of
+    re-logins and a histogram of the time requests were queued by a
+    `Governor` per host. One instance can be shared by many clients.
+
+    Params
+    ------
+    buckets: `tuple`, optional, default: DEFAULT_BUCKETS
+        Upper bounds in seconds of the latency histogram buckets.
+
+    Examples
+    --------
+    >>> metrics = Metrics()
+    >>> mmc = MMClient(mm_host="arubamm.domain.com", metrics=metrics)
+    >>> mmc.comms()
+    >>> mmc.ap_group()
+    >>> metrics.snapshot()['arubamm.domain.com']['endpoints']['/configuration/object/ap_group']['requests']
+    1
+    >>> metrics.export(PrometheusTextSink('/var/lib/node_exporter/arubafi.prom'))
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        '''Drops everything recorded so far
+        '''
+        with self._lock:
+            self._endpoints = dict()
+            self._relogins = dict()
+            self._queued = dict()
+
+    def _endpoint(self, host, endpoint):
+        key = (host, endpoint)
+        stats = self._endpoints.get(key)
+
+        if stats is None:
+            stats = self._endpoints[key] = {
+                'requests': 0,
+                'latency': Histogram(self.buckets),
+                'response_bytes': 0,
+                'retries': 0,
+                'errors': dict(),
+            }
+
+        return stats
+
+    def observe(self, host, endpoint, seconds, nbytes=0, status=None, retries=0):
+        '''Records one request.
+
+        Args:
+        -----
+        host: `str`
+            The host the request was made to.
+
+        endpoint: `str`
+            The requested endpoint, ex. '/configuration/object/ap_group'.
+
+        seconds: `float`
+            How long the request took.
+
+        nbytes: `int`, optional, default: 0
+            Size of the response body.
+
+        status: `int` or `str`, optional, default: None
+            The error status code if the request failed. Either the HTTP
+            status, the MM `_global_result` status or the exception name.
+
+        retries: `int`, optional, default: 0
+            Number of times the request was retried.
+        '''
+        with self._lock:
+            stats = self._endpoint(host, endpoint)
+            stats['requests'] += 1
+            stats['latency'].observe(seconds)
+            stats['response_bytes'] += nbytes
+            stats['retries'] += retries
+
+            if status is not None:
+                status = str(status)
+                stats['errors'][status] = stats['errors'].get(status, 0) + 1
+
+    def inc_retries(self, host, endpoint, count=1):
+        with self._lock:
+            self._endpoint(host, endpoint)['retries'] += count
+
+    def inc_relogins(self, host, count=1):
+        with self._lock:
+            self._relogins[host] = self._relogins.get(host, 0) + count
+
+    def observe_queued(self, host, seconds):
+        '''Records how long a request to the `host` waited to be sent
+        '''
+        with self._lock:
+            hist = self._queued.get(host)
+            if hist is None:
+                hist = self._queued[host] = Histogram(self.buckets)
+            hist.observe(seconds)
+
+    def snapshot(self):
+        '''Returns a copy of the metrics recorded so far.
+
+        Returns:
+        --------
+        A dict of host to its `relogins` count, its `queued` histogram or
+        `None` if no request to it was governed, and its `endpoints` dict of
+        endpoint to `requests`, `latency`, `response_bytes`, `retries` and
+        `errors` (error status to count).
+        '''
+        snapshot = dict()
+
+        def host_stats(host):
+            return snapshot.setdefault(host, {'relogins': 0, 'queued': None, 'endpoints': dict()})
+
+        with self._lock:
+            for host, count in self._relogins.items():
+                host_stats(host)['relogins'] = count
+
+            for host, hist in self._queued.items():
+                host_stats(host)['queued'] = hist.snapshot()
+
+            for (host, endpoint), stats in self._endpoints.items():
+                host_stats(host)['endpoints'][endpoint] = {
+                    'requests': stats['requests'],
+                    'latency': stats['latency'].snapshot(),
+                    'response_bytes': stats['response_bytes'],
+                    'retries': stats['retries'],
+                    'errors': dict(stats['errors']),
+                }
+
+        return snapshot
+
+    def export(self, sink):
+        '''Passes a snapshot of the metrics to the `sink`
+        '''
+        return sink.export(self.snapshot())
+
+
+class MetricsSink(abc.ABC):
+    """Base class of metrics exporters.
+
+    Subclasses must implement `export()`, which gets what
+    `Metrics.snapshot()` returns.
+    """
+
+    @abc.abstractmethod
+    def export(self, snapshot):
+        '''Exports the `snapshot` of the metrics and returns whatever the
+        sink produces, ex. the exported text
+        '''
+
+
+class PrometheusTextSink(MetricsSink):
+    """Exports metrics in the Prometheus text exposition format.
+
+    Params
+    ------
+    path: `str`, optional, default: None
+        File the metrics are written to, ex. for the node exporter textfile
+        collector. The file is replaced atomically on every export. If not
+        set, `export()` only returns the text.
+
+    prefix: `str`, optional, default: 'arubafi'
+        Prefix of every metric name.
+    """
+
+    def __init__(self, path=None, prefix='arubafi'):
+        self.path = path
+        self.prefix = prefix
+
+    @staticmethod
+    def _labels(**labels):
+        escaped = (
+            '{}="{}"'.format(k, str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+            for k, v in labels.items()
+        )
+        return '{' + ','.join(escaped) + '}'
+
+    @staticmethod
+    def _bound(bound):
+        return '+Inf' if bound == float('inf') else repr(float(bound))
+
+    def render(self, snapshot):
+        '''Returns the `snapshot` in the Prometheus text format
+        '''
+        p = self.prefix
+        metrics = {
+            'requests_total': ('counter', 'API requests made.', []),
+            'request_duration_seconds': ('histogram', 'API request latency.', []),
+            'response_bytes_total': ('counter', 'Size of the API response bodies.', []),
+            'retries_total': ('counter', 'Retried API requests.', []),
+            'errors_total': ('counter', 'Failed API requests by error status.', []),
+            'relogins_total': ('counter', 'Logins after the API session expired.', []),
+            'queued_seconds': ('histogram', 'Time API requests waited for the request governor.', []),
+        }
+
+        for host, host_stats in sorted(snapshot.items()):
+            host_labels = self._labels(host=host)
+            metrics['relogins_total'][2].append(f"{p}_relogins_total{host_labels} {host_stats['relogins']}")
+
+            queued = host_stats.get('queued')
+            if queued:
+                for bound, count in queued['buckets']:
+                    bucket_labels = self._labels(host=host, le=self._bound(bound))
+                    metrics['queued_seconds'][2].append(f"{p}_queued_seconds_bucket{bucket_labels} {count}")
+                metrics['queued_seconds'][2].append(f"{p}_queued_seconds_sum{host_labels} {queued['sum']}")
+                metrics['queued_seconds'][2].append(f"{p}_queued_seconds_count{host_labels} {queued['count']}")
+
+            for endpoint, stats in sorted(host_stats['endpoints'].items()):
+                labels = self._labels(host=host, endpoint=endpoint)
+
+                metrics['requests_total'][2].append(f"{p}_requests_total{labels} {stats['requests']}")
+                metrics['response_bytes_total'][2].append(f"{p}_response_bytes_total{labels} {stats['response_bytes']}")
+                metrics['retries_total'][2].append(f"{p}_retries_total{labels} {stats['retries']}")
+
+                latency = stats['latency']
+                for bound, count in latency['buckets']:
+                    bucket_labels = self._labels(host=host, endpoint=endpoint, le=self._bound(bound))
+                    metrics['request_duration_seconds'][2].append(f"{p}_request_duration_seconds_bucket{bucket_labels} {count}")
+                metrics['request_duration_seconds'][2].append(f"{p}_request_duration_seconds_sum{labels} {latency['sum']}")
+                metrics['request_duration_seconds'][2].append(f"{p}_request_duration_seconds_count{labels} {latency['count']}")
+
+                for status, count in sorted(stats['errors'].items()):
+                    error_labels = self._labels(host=host, endpoint=endpoint, status=status)
+                    metrics['errors_total'][2].append(f"{p}_errors_total{error_labels} {count}")
+
+        lines = list()
+        for name, (kind, help_text, samples) in metrics.items():
+            lines.append(f"# HELP {p}_{name} {help_text}")
+            lines.append(f"# TYPE {p}_{name} {kind}")
+            lines.extend(samples)
+
+        return '\n'.join(lines) + '\n'
+
+    def export(self, snapshot):
+        '''Renders the `snapshot` and writes it to `path` if set.
+
+        Returns:
+        --------
+        The rendered text.
+        '''
+        text = self.render(snapshot)
+
+        if self.path:
+            directory = os.path.dirname(self.path) or '.'
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.arubafi-metrics-')
+            try:
+                with os.fdopen(fd, 'w') as prom_file:
+                    prom_file.write(text)
+                os.chmod(tmp_path, 0o644)
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+
+        return text
@@ -1,26 +1,66 @@
 import requests
 import getpass
 import json
+import os
 
 import time
+import threading
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor
 from functools import wraps
-from requests.adapters import HTTPAdapter
 
 import logging
 import logzero
 from logzero import logger
 
+from .batch import WriteBatch
+from .cache import ResponseCache
+from .codec import get_codec
+from .depgraph import DependencyGraph
+from . import endpoints
+from .effective import EffectiveConfig, is_local
+from .endpoints import Endpoint, get_endpoint
+from .filters import Filter, profile_name_filter
+from .governor import Governor
+from .hierarchy import NodeTree
+from .metrics import Metrics
+from .pool import PoolingAdapter
+from .reconcile import diff
+from . import retry
+from .retry import CircuitBreaker, RetryPolicy
+from .showcommand import to_columns
+from .singleflight import SingleFlight
+from . import snapshot as snapshots
+from .snapshot import SnapshotReader, SnapshotWriter
+from .streaming import iter_json_array
+from .tokencache import TokenCache
+
+# Marks a streamed response without objects
+_NO_OBJECT = object()
+
 
 def log(func):
+    """Logs the calls of the decorated method.
+
+    Nothing is formatted or timed when INFO or DEBUG logging is disabled, so
+    with the default ERROR level the decorator only costs one level check.
+    """
     @wraps(func)
     def wrapped(*args, **kwargs):
-        logger.info(f'Calling {func.__name__}()')
-        logger.debug(f'kwargs in: {kwargs}')
+        if not logger.isEnabledFor(logging.INFO):
+            return func(*args, **kwargs)
+
+        logger.info('Calling %s()', func.__name__)
+
+        if not logger.isEnabledFor(logging.DEBUG):
+            return func(*args, **kwargs)
+
+        logger.debug('kwargs in: %s', kwargs)
 
         start = time.time()
         func_call = func(*args, **kwargs)
-        diff = start - time.time()
-        logger.debug(f'Call took {diff}s')
+        diff = time.time() - start
+        logger.debug('Call took %ss', diff)
 
         return func_call
     return wrapped
@@ -34,7 +74,8 @@ class MMClient:
     Params
     ------
     mm_host: `str`, optional, default: None
-        FQDN or IP of the Mobility Master. No leading https://
+        FQDN or IP of the Mobility Master. No leading https://, unless it's
+        an http:// URL, like the one of a local `arubafi.testing.MMServer`
 
     username: `str`, optional, default: None
         Username for Mobility Master login
@@ -56,7 +97,82 @@ class MMClient:
         bundle to use.
 
     timeout: `int`, optional, default: 10
-        The timeout for the connection
+        The timeout for the connection. Used as the `connect_timeout` if
+        that is not set.
+
+    cache_ttl: `int`, optional, default: None
+        If set, GET responses are cached for this many seconds and served
+        from the cache instead of the MM. A successful POST to an endpoint
+        drops that endpoint's cached responses at the same `config_path` and
+        every `config_path` below it.
+
+    cache_size: `int`, optional, default: 256
+        The maximum number of GET responses kept when caching is enabled.
+
+    token_cache: `TokenCache` or `str`, optional, default: None
+        A `TokenCache`, or the path to its file, used to reuse a stored
+        `UIDARUBA` token instead of logging in with `comms()`. The token is
+        stored after every successful login.
+
+    metrics: `Metrics`, optional, default: None
+        Where request counts, latencies, response sizes, retries, re-logins
+        and errors are recorded per endpoint. Pass the same instance to many
+        clients to collect their metrics together. A new one is created if
+        not passed in and is available as the `metrics` attribute.
+
+    codec: `str` or codec instance, optional, default: None
+        JSON codec used for decoding responses and encoding payloads and
+        filters, either 'json', 'orjson' or an instance from `arubafi.codec`.
+        Defaults to orjson if it's installed, else the standard library.
+
+    singleflight: bool, optional, default: True
+        Concurrent identical GETs share one request to the MM and its decoded
+        response, each caller getting its own copy.
+
+    rate: `float`, optional, default: None
+        The maximum number of requests per second sent to the MM by all
+        clients of the same MM, including those of an `MMFleet` and the
+        threads of `show_commands()` or `reconcile()`. Not limited if `None`.
+
+    max_in_flight: `int`, optional, default: None
+        The maximum number of requests in flight to the MM at the same time,
+        shared like `rate`. Not limited if `None`. Time spent waiting for
+        either limit is recorded as the host's `queued` metric.
+
+    retry_policy: `RetryPolicy`, optional, default: None
+        When and after how long failed requests are retried. Defaults to
+        `RetryPolicy()`, which retries GETs up to 3 times with a jittered
+        exponential backoff. Pass in False to never retry.
+
+    circuit_breaker: bool or `CircuitBreaker`, optional, default: None
+        Fail requests fast with `CircuitOpenError` while the MM is unhealthy.
+        Off by default. If True the circuit breaker is shared by all clients
+        of the same MM that pass in True, otherwise pass in a
+        `CircuitBreaker` to share it only between the clients given it.
+
+    pool_size: `int`, optional, default: 10
+        The maximum number of connections kept open to the MM. Set it to at
+        least the number of threads using the client at the same time.
+
+    pool_block: bool, optional, default: False
+        Make threads wait for a free connection once `pool_size` of them are
+        in use, instead of opening and closing extra connections.
+
+    connect_timeout: `float`, optional, default: None
+        Seconds to wait for a connection to the MM. Defaults to `timeout`.
+
+    read_timeout: `float`, optional, default: None
+        Seconds to wait for the MM between bytes of a response. Not limited
+        if `None`.
+
+    tls_session_reuse: bool, optional, default: True
+        Resume the TLS session on new connections, which skips most of the
+        TLS handshake.
+
+    validate_config_path: bool, optional, default: False
+        Check the `config_path` of every request against the cached
+        `hierarchy()` before sending it. Requests to unknown config paths
+        return (None, error) without being sent.
 
     Examples
     --------
@@ -88,9 +204,32 @@ class MMClient:
 
     **Ex. 4:** Using a proxy
     To use a proxy specify it with the `proxy` parameter
+
+    **Ex. 5:** Caching GET responses for 5 minutes
+
+    >>> mmc = MMClient(mm_host="arubamm.domain.com", cache_ttl=300)
+
+    **Ex. 6:** Reusing the API session between script runs
+
+    >>> mmc = MMClient(mm_host="arubamm.domain.com", token_cache=TokenCache())
     """
 
-    def __init__(self, mm_host=None, username=None, password=None, api_version=1, port=4343, verify=False, timeout=10, proxy=str()):
+    # `_global_result` status strings of requests made with an expired or
+    # otherwise invalid `UIDARUBA`
+    AUTH_ERROR_STATUS_STRS = (
+        'unauthorized',
+        'invalid session',
+        'session expired',
+        'not logged in',
+    )
+
+    # Size of the chunks streamed responses are read in
+    STREAM_CHUNK_SIZE = 64 * 1024
+
+    # Objects that change the node hierarchy when POSTed to
+    HIERARCHY_OBJECTS = ('add_configuration_device', 'configuration_node', 'configuration_device')
+
+    def __init__(self, mm_host=None, username=None, password=None, api_version=1, port=4343, verify=False, timeout=10, proxy=str(), cache_ttl=None, cache_size=256, token_cache=None, metrics=None, codec=None, singleflight=True, rate=None, max_in_flight=None, retry_policy=None, circuit_breaker=None, pool_size=10, pool_block=False, connect_timeout=None, read_timeout=None, tls_session_reuse=True, validate_config_path=False):
         # Set default logging to error_resp
         logzero.loglevel(logging.ERROR)
 
@@ -102,6 +241,50 @@ class MMClient:
         self.timeout = abs(timeout)
         self._access_token = ""
 
+        # Opt-in GET response cache
+        self.cache = None
+        if cache_ttl:
+            self.cache = ResponseCache(ttl=cache_ttl, maxsize=cache_size)
+
+        # Opt-in store of tokens shared between processes
+        self.token_cache = token_cache
+        if isinstance(token_cache, str):
+            self.token_cache = TokenCache(token_cache)
+
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.codec = get_codec(codec)
+
+        # Makes sure only one thread logs in again once the session expires
+        self._login_lock = threading.Lock()
+        self.relogins = 0
+
+        # The `WriteBatch` open in each thread, see the `_batch` property
+        self._batches = threading.local()
+
+        # The cached `NodeTree` of the MM
+        self.validate_config_path = validate_config_path
+        self._hierarchy = None
+        self._hierarchy_lock = threading.Lock()
+
+        # Shares the GETs in flight between threads making the same GET
+        self.singleflight = SingleFlight() if singleflight else None
+
+        # Opt-in request limits, shared with all clients of the same MM
+        self.rate = rate
+        self.max_in_flight = max_in_flight
+        self.governor = None
+
+        self.retry_policy = RetryPolicy() if retry_policy is None else (retry_policy or None)
+        self.circuit_breaker = circuit_breaker
+
+        # The connection pool, created with the session
+        self.adapter = None
+        self.pool_size = pool_size
+        self.pool_block = pool_block
+        self.connect_timeout = connect_timeout or self.timeout
+        self.read_timeout = read_timeout
+        self.tls_session_reuse = tls_session_reuse
+
         self.proxy = {}
         if proxy:
             self.proxy = {
@@ -146,7 +329,7 @@ class MMClient:
 
         # Base API URL for requests
         self.mm_base_api_url = f"{self.mm_host}:{self.port}/v{self.api_version}"
-        if "https://" not in self.mm_base_api_url:
+        if not self.mm_base_api_url.startswith(('https://', 'http://')):
             self.mm_base_api_url = f"https://{self.mm_base_api_url}"
 
         # The login credentials dictionary
@@ -166,15 +349,51 @@ class MMClient:
         self.session = requests.Session()
         self.session.headers.update(self.headers)
         self.session.verify = self.verify
-        self.session.timeout = self.timeout
         self.session.proxies = self.proxy
-        self.session.mount(self.mm_base_api_url, HTTPAdapter(max_retries=3))
+
+        # Requests ignores a session timeout, so the timeouts are set on the
+        # adapter. Retries are done by the retry policy.
+        self.adapter = PoolingAdapter(
+            pool_size=self.pool_size,
+            pool_block=self.pool_block,
+            connect_timeout=self.connect_timeout,
+            read_timeout=self.read_timeout,
+            tls_session_reuse=self.tls_session_reuse,
+        )
+        self.session.mount(self.mm_base_api_url, self.adapter)
 
         assert_status_hook = lambda response, *args, **kwargs: response.raise_for_status()
         self.session.hooks["response"] = [assert_status_hook]
 
-        # Finaly login
-        self._login()
+        if self.rate or self.max_in_flight:
+            self.governor = Governor.for_host(urlsplit(self.mm_base_api_url).netloc, self.rate, self.max_in_flight)
+
+        if self.circuit_breaker is True:
+            self.circuit_breaker = CircuitBreaker.for_host(urlsplit(self.mm_base_api_url).netloc)
+
+        # Reuse a stored token if there is one, otherwise finaly login
+        if self.token_cache:
+            token = self.token_cache.get(self.mm_host, self.port, self.username)
+            if token:
+                logger.info("Reusing stored API token")
+                self._access_token = token
+                return
+
+        return self._login()
+
+    def connection_stats(self):
+        '''Returns the counters of the connections to the MM.
+
+        Returns:
+        --------
+        A dict of the number of `requests` sent, the `new_connections`
+        opened and the `reused_connections` for them, the `connect_seconds`
+        spent opening connections and the number of `tls_resumed` sessions.
+        '''
+        if self.adapter is None:
+            return None
+
+        return self.adapter.stats.snapshot()
 
     @log
     def _params(self, **kwargs):
@@ -205,10 +424,11 @@ class MMClient:
                 “default-ap” and “ap- grp1” will both match
                 $nin: pattern does not match the filter. Opposite of $in
 
-        filter: `str`, optional
+        filter: `str`, `list` or `Filter`, optional
             A JSON data filter expression for the GET request.
             If defined it will override the `profile_name` and `filter_oper`
-            arguments completely.
+            arguments completely. A `Filter` is only serialised once, and
+            must be of the endpoint's objects.
 
             Ex.:
             [ {"ap_sys_prof.profile-name" : { "$in" : ["def"] } } ]
@@ -266,25 +486,30 @@ class MMClient:
         # and use the `filter_oper` if provided
         if 'profile_name' in kwargs:
             # Send the profile-name in as list instead of just string
-            profile_names_list = list()
-            if not isinstance(kwargs['profile_name'], list):
-                profile_names_list.append(kwargs['profile_name'])
-            else: profile_names_list = kwargs['profile_name']
-
-            profile_name_filter = [
-                {
-                    f"{kwargs['search']}.profile-name": { kwargs.get('filter_oper', '$eq'): profile_names_list },
-                }
-            ]
-            params['filter'] = json.dumps(profile_name_filter)
+            profile_names = kwargs['profile_name']
+            if not isinstance(profile_names, list):
+                profile_names = [profile_names]
+
+            oper = kwargs.get('filter_oper', '$eq')
+            try:
+                # The filter of the same names is only built and serialised once
+                params['filter'] = profile_name_filter(kwargs['search'], oper, tuple(profile_names)).json
+            except (TypeError, ValueError):
+                # Unhashable names, no names or an operator not known here
+                # are sent as they are, for the MM to answer
+                params['filter'] = self.codec.dumps([{f"{kwargs['search']}.profile-name": {oper: profile_names}}])
 
         # If filter provided it will override whatever was passed in with
         # either `profile_name` or `filter_oper` attributes
         if 'filter' in kwargs:
-            if type(kwargs['filter']) is str:
+            if isinstance(kwargs['filter'], Filter):
+                if 'search' in kwargs:
+                    kwargs['filter'].validate(kwargs['search'])
+                params['filter'] = kwargs['filter'].json
+            elif type(kwargs['filter']) is str:
                 params['filter'] = kwargs['filter']
             else:
-                params['filter'] = json.dumps(kwargs['filter'])
+                params['filter'] = self.codec.dumps(kwargs['filter'])
 
         # Other optional Aruba API defined parameters
         if 'limit' in kwargs:
@@ -293,14 +518,12 @@ class MMClient:
             params['count'] = str(kwargs['count'])
         if 'total' in kwargs:
             params['total'] = str(kwargs['total'])
-        if 'offset' in kwargs:
-            params['offset'] = str(wargs['offset'])
         if 'sort' in kwargs:
             params['sort'] = str(kwargs['sort'])
         if 'offset' in kwargs:
             params['offset'] = str(kwargs['offset'])
 
-        logger.debug(f"Returned params: {params}")
+        logger.debug("Returned params: %s", params)
 
         return params
 
@@ -323,11 +546,11 @@ class MMClient:
 
         if resource.startswith("/"):
             url = f'{self.mm_base_api_url}{resource}'
-            logger.debug(f"URL to endpoint: {url}")
+            logger.debug("URL to endpoint: %s", url)
             return url
         else:
             url = f'{self.mm_base_api_url}/{resource}'
-            logger.debug(f"URL to endpoint: {url}")
+            logger.debug("URL to endpoint: %s", url)
             return url
 
     @log
@@ -353,22 +576,63 @@ class MMClient:
         --------
         The full response in JSON format including `_global_result` AND
         The error if status string returned is not 0, else `None`.
+
+        If the MM says the session has expired, the client logs in again and
+        the request is replayed once with the new token.
+
+        A GET made while the same GET is already in flight waits for and
+        returns a copy of its response instead of being sent again.
         '''
-        logger.info(f"Method is: {method.upper()}")
+        if self.singleflight is not None and method.upper() == 'GET':
+            params = kwargs.get('params') or dict()
+            key = (url, tuple(sorted((k, v) for k, v in params.items() if k != 'UIDARUBA')))
+            return self.singleflight.do(key, self._api_request, method, url, **kwargs)
 
-        response = getattr(self.session, method.lower())(url, verify=self.verify, **kwargs)
-        logger.debug(f"Full URL: {response.url}")
+        return self._api_request(method, url, **kwargs)
 
-        # If response is wrong, for example if someone passes in the wrong
-        # endpoint return https://gitlab.ocado.tech/Net-wifi/wireless-passphrase-change/-/merge_requests/2, None for both values
-        try:
-            jresp = response.json()
-            logger.debug(f"Response JSON: {jresp}")
-        except json.decoder.JSONDecodeError as e:
-            logger.exception(f'Got a JSONDecodeError exception. Check the defined endpoint is correct\n')
-            logger.exception(f"Response text:\n{response.text}")
-            logzero.loglevel(logging.ERROR)
-            return None, None
+    def _api_request(self, method, url, **kwargs):
+        '''Makes the request for `_api_call` and returns the same.
+        '''
+        logger.info("Method is: %s", method.upper())
+
+        # Login and logout requests can't be fixed by logging in again
+        relogin = not url.endswith(('/api/login', '/api/logout'))
+
+        while True:
+            token = self._access_token
+
+            try:
+                response, elapsed = self._send(method, url, **kwargs)
+            except requests.HTTPError as exc:
+                if not (relogin and self._unauthorized(exc)):
+                    raise
+                jresp = None
+            else:
+                logger.debug("Full URL: %s", response.url)
+
+                # If response is wrong, for example if someone passes in the wrong
+                # endpoint return https://gitlab.ocado.tech/Net-wifi/wireless-passphrase-change/-/merge_requests/2, None for both values
+                try:
+                    jresp = self.codec.loads(response.content)
+                    logger.debug("Response JSON: %s", jresp)
+                except json.decoder.JSONDecodeError as e:
+                    self._observe(url, elapsed, response, 'JSONDecodeError')
+                    logger.exception('Got a JSONDecodeError exception. Check the defined endpoint is correct\n')
+                    logger.exception("Response text:\n%s", response.text)
+                    logzero.loglevel(logging.ERROR)
+                    return None, None
+
+                self._observe(url, elapsed, response, self._mm_error_status(jresp))
+
+                if not (relogin and self._session_expired(jresp)):
+                    break
+
+            # Log in again and replay the request only once
+            relogin = False
+            kwargs = self._relogin(token, kwargs)
+
+        if relogin:
+            self._token_used(token)
 
         logzero.loglevel(logging.ERROR)
 
@@ -386,16 +650,289 @@ class MMClient:
             else:
                 return None, logger.error(f"Config not written: {jresp}")
 
+    def _send(self, method, url, **kwargs):
+        '''Sends a request with the session, retrying it as the retry policy
+        says, unless the circuit breaker is open.
+
+        Failed attempts are recorded with the metrics here, successful ones
+        once their response is read.
+
+        Returns:
+        --------
+        The requests response and the number of seconds its last attempt
+        took, not counting the time it was held back by the governor.
+        '''
+        governor = self.governor
+        elapsed = 0
+
+        def attempt():
+            nonlocal elapsed
+
+            if governor is not None:
+                self.metrics.observe_queued(self.mm_host, governor.acquire())
+
+            start = time.perf_counter()
+            held = False
+
+            try:
+                response = getattr(self.session, method.lower())(url, verify=self.verify, **kwargs)
+                # A streamed body is read later, so it keeps the slot until closed
+                if governor is not None and kwargs.get('stream'):
+                    governor.hold_until_closed(response)
+                    held = True
+            except requests.HTTPError as exc:
+                self._observe(url, time.perf_counter() - start, exc.response, getattr(exc.response, 'status_code', exc.__class__.__name__))
+                raise
+            except requests.RequestException as exc:
+                self._observe(url, time.perf_counter() - start, status=exc.__class__.__name__)
+                raise
+            finally:
+                if governor is not None and not held:
+                    governor.release()
+
+            elapsed = time.perf_counter() - start
+            return response
+
+        def on_retry(retry_number, delay):
+            self.metrics.inc_retries(self.mm_host, self._endpoint(url))
+
+        breaker = self.circuit_breaker or None
+        response = retry.send(method, attempt, self.retry_policy, breaker, on_retry)
+
+        return response, elapsed
+
+    @log
+    def _api_stream(self, url, obj, **kwargs):
+        '''The streaming API call handler for GET requests.
+
+        The response is read in chunks and the objects in its
+        `_data.<obj>` list are decoded one at a time, so only one of them is
+        kept in memory however large the response is.
+
+        Args:
+        -----
+        url: `str`
+            URL with the endpoint included
+
+        obj: `str`
+            The name of the object list in the response `_data`,
+            ex. 'netdst'.
+
+        **kwargs:
+        These are passed into requests and include the `params` attribute.
+
+        Returns:
+        --------
+        A generator of the objects and None for error. The response is read
+        up to its first object before returning, so if it has no
+        `_data.<obj>` list, the MM's `_global_result` error is returned
+        instead of the generator. If the response isn't JSON up to there,
+        the error is a dict with a `status` of -1 and the decoding error as
+        the `status_str`. A response cut off after its first object raises
+        `json.JSONDecodeError` from the generator.
+
+        As with `_api_call`, if the MM says the session has expired, the
+        client logs in again and the request is replayed once.
+        '''
+        relogin = True
+
+        while True:
+            token = self._access_token
+
+            try:
+                response, elapsed = self._send("get", url, stream=True, **kwargs)
+            except requests.HTTPError as exc:
+                if not (relogin and self._unauthorized(exc)):
+                    raise
+            else:
+                objs = self._stream_objects(url, elapsed, response, obj)
+                try:
+                    jresp = next(objs)
+                except json.decoder.JSONDecodeError as exc:
+                    logger.exception('Got a JSONDecodeError exception. Check the defined endpoint is correct\n')
+                    logzero.loglevel(logging.ERROR)
+                    return None, {'status': -1, 'status_str': f"JSONDecodeError: {exc}"}
+
+                if jresp is None:
+                    self._token_used(token)
+                    break
+                objs.close()
+
+                if not (relogin and self._session_expired(jresp)):
+                    self._token_used(token)
+                    logzero.loglevel(logging.ERROR)
+                    if self._mm_error_status(jresp):
+                        return None, jresp['_global_result']
+                    return iter(()), None
+
+            # Log in again and replay the request only once
+            relogin = False
+            kwargs = self._relogin(token, kwargs)
+
+        logzero.loglevel(logging.ERROR)
+
+        return objs, None
+
+    def _stream_objects(self, url, elapsed, response, obj):
+        '''Generator of the objects of a streamed response for `_api_stream`.
+
+        It first yields `None` if the response has a `_data.<obj>` list, and
+        then its objects. If it has none, the response is decoded whole and
+        it yields the JSON response instead. Either way the response is
+        closed and recorded with the metrics once the generator is
+        exhausted, closed or garbage collected. A response that isn't valid
+        JSON raises `json.JSONDecodeError` and is recorded with that status.
+        '''
+        nbytes = 0
+        jresp = None
+        status = None
+        # The chunks read before the first object, kept to decode the whole
+        # response if it has no objects
+        read = list()
+
+        def chunks():
+            nonlocal nbytes
+            for chunk in response.iter_content(self.STREAM_CHUNK_SIZE):
+                nbytes += len(chunk)
+                if read is not None:
+                    read.append(chunk)
+                yield chunk
+
+        body = chunks()
+
+        try:
+            objs = iter_json_array(body, ('_data', obj), response.encoding or 'utf-8')
+            first = next(objs, _NO_OBJECT)
+
+            if first is _NO_OBJECT:
+                read.extend(body)
+                jresp = self.codec.loads(b''.join(read))
+                data = jresp.get('_data') if isinstance(jresp, dict) else None
+                if not (isinstance(data, dict) and isinstance(data.get(obj), list)):
+                    yield jresp
+                    return
+
+            read = None
+            yield None
+
+            if first is not _NO_OBJECT:
+                yield first
+                yield from objs
+        except json.decoder.JSONDecodeError:
+            status = 'JSONDecodeError'
+            raise
+        finally:
+            response.close()
+            self._observe(url, elapsed, response, status or self._mm_error_status(jresp), nbytes=nbytes)
+
+    def _observe(self, url, seconds, response=None, status=None, nbytes=None):
+        '''Records a request to the `url` with the client's metrics.
+
+        The endpoint is the `url` path after the API version, so all
+        `config_path` levels and filters of an endpoint are recorded together.
+        `nbytes` defaults to the size of the `response` content.
+        '''
+        endpoint = self._endpoint(url)
+
+        retries = 0
+        if nbytes is None:
+            nbytes = len(response.content or b'') if response is not None else 0
+        if response is not None:
+            # Retries done by urllib3 are kept in the response's retry history
+            history = getattr(getattr(response.raw, 'retries', None), 'history', None)
+            retries = len(history) if history else 0
+
+        self.metrics.observe(self.mm_host, endpoint, seconds, nbytes, status, retries)
+
+    def _endpoint(self, url):
+        '''Returns the `url` path after the API version
+        '''
+        endpoint = url.split('?', 1)[0]
+        if endpoint.startswith(self.mm_base_api_url):
+            endpoint = endpoint[len(self.mm_base_api_url):]
+
+        return endpoint
+
+    @staticmethod
+    def _mm_error_status(jresp):
+        '''Returns the `_global_result` status as 'mm:<status>' if it is an
+        error, else `None`.
+        '''
+        if isinstance(jresp, dict) and isinstance(jresp.get('_global_result'), dict):
+            status = jresp['_global_result'].get('status')
+            if status not in (None, 0, '0'):
+                return f"mm:{status}"
+
+        return None
+
+    @staticmethod
+    def _unauthorized(exc):
+        '''Checks if the HTTP error is the MM refusing the `UIDARUBA`
+        '''
+        return exc.response is not None and exc.response.status_code == 401
+
+    def _session_expired(self, jresp):
+        '''Checks if the response says the `UIDARUBA` is not valid anymore
+        '''
+        if not isinstance(jresp, dict) or not isinstance(jresp.get('_global_result'), dict):
+            return False
+
+        status_str = str(jresp['_global_result'].get('status_str', '')).lower()
+        return any(auth_err in status_str for auth_err in self.AUTH_ERROR_STATUS_STRS)
+
+    def _token_used(self, token):
+        '''Restarts the age of the stored `token` after a request used it
+        without the MM saying the session has expired.
+        '''
+        if self.token_cache and token:
+            self.token_cache.touch(self.mm_host, self.port, self.username, token)
+
+    @log
+    def _relogin(self, stale_token, request_kwargs):
+        '''Logs in again after the `stale_token` has expired.
+
+        When many threads find the session expired at the same time only the
+        first one logs in, while the others wait for it and use the new token.
+
+        Returns:
+        --------
+        The `request_kwargs` with the new token in their `params`, for
+        replaying the request.
+        '''
+        with self._login_lock:
+            if self._access_token == stale_token:
+                logger.info("API session expired, logging in again")
+
+                if self.token_cache:
+                    self.token_cache.delete(self.mm_host, self.port, self.username)
+
+                self.relogins += 1
+                self.metrics.inc_relogins(self.mm_host)
+                # Never exit here, if the login fails so does the replayed
+                # request, which returns or raises its error to the caller
+                self._login(exit_on_error=False)
+
+        if request_kwargs.get('params'):
+            request_kwargs = dict(request_kwargs, params=dict(request_kwargs['params'], UIDARUBA=self._access_token))
+
+        return request_kwargs
+
     @log
-    def _login(self):
+    def _login(self, exit_on_error=True):
         '''Login handler to loginto the Mobility Master server.
 
+        Args:
+        -----
+        exit_on_error: bool, optional, default: True
+            Exit if the login request fails. Only ever done in the main
+            thread, see `_login_failed`.
+
         Returns:
         --------
         Either the response from the sucesfull login attempt or the error from
         it.
         '''
-        logger.info(f"SSL verify (False or cert path): {self.verify}")
+        logger.info("SSL verify (False or cert path): %s", self.verify)
 
         login_url = f'{self.mm_base_api_url}/api/login'
 
@@ -405,42 +942,62 @@ class MMClient:
             login_resp, login_resp_err = self._api_call("post", login_url, data=self.login_payload)
 
         except requests.exceptions.ConnectionError as exc:
-            logger.exception(f'Got a {exc.__class__.__name__} exception\n')
+            logger.exception('Got a %s exception\n', exc.__class__.__name__)
             logger.error(error_msg)
-            exit(0)
+            return self._login_failed(exc, exit_on_error)
         except requests.RequestException as exc:
-            logger.exception(f'Got a {exc.__class__.__name__} exception\n')
+            logger.exception('Got a %s exception\n', exc.__class__.__name__)
             logger.error(error_msg)
-            exit(0)
+            return self._login_failed(exc, exit_on_error)
         except requests.HTTPError as exc:
-            logger.exception(f'Got a {exc.__class__.__name__} exception\n')
+            logger.exception('Got a %s exception\n', exc.__class__.__name__)
             logger.error(error_msg)
-            exit(0)
+            return self._login_failed(exc, exit_on_error)
         except requests.URLRequired as exc:
-            logger.exception(f'Got a {exc.__class__.__name__} exception\n')
+            logger.exception('Got a %s exception\n', exc.__class__.__name__)
             logger.error(error_msg)
-            exit(0)
+            return self._login_failed(exc, exit_on_error)
         except requests.TooManyRedirects as exc:
-            logger.exception(f'Got a {exc.__class__.__name__} exception\n')
+            logger.exception('Got a %s exception\n', exc.__class__.__name__)
             logger.error(error_msg)
-            exit(0)
+            return self._login_failed(exc, exit_on_error)
         except requests.ConnectTimeout as exc:
-            logger.exception(f'Got a {exc.__class__.__name__} exception\n')
+            logger.exception('Got a %s exception\n', exc.__class__.__name__)
             logger.error(error_msg)
-            exit(0)
+            return self._login_failed(exc, exit_on_error)
         except requests.ReadTimeout as exc:
-            logger.exception(f'Got a {exc.__class__.__name__} exception\n')
+            logger.exception('Got a %s exception\n', exc.__class__.__name__)
             logger.error(error_msg)
-            exit(0)
+            return self._login_failed(exc, exit_on_error)
 
         # Set the UIDARUBA as the API token
         if not login_resp_err:
             self._access_token = login_resp['_global_result']['UIDARUBA']
+
+            if self.token_cache:
+                self.token_cache.set(self.mm_host, self.port, self.username, self._access_token)
+
             return login_resp
         else:
-            logger.error(f"Login failed:\n{login_resp_err}")
+            logger.error("Login failed:\n%s", login_resp_err)
             return login_resp_err
 
+    def _login_failed(self, exc, exit_on_error=True):
+        '''Exits with status 1 after a login request failed with the `exc`,
+        but only in the main thread. Exiting a worker thread, ex. of an
+        `MMFleet`, `show_commands()` or `snapshot()`, would silently end only
+        that thread, so there the error is returned instead.
+
+        Returns:
+        --------
+        The error dict, with a `status` of -1 and the exception as the
+        `status_str`.
+        '''
+        if exit_on_error and threading.current_thread() is threading.main_thread():
+            exit(1)
+
+        return {'status': -1, 'status_str': f"{exc.__class__.__name__}: {exc}"}
+
     @log
     def _kwargs_modify(self, api_endpoint, data=None, **kwargs):
         '''Modifies the `kwargs` depending if either POST-ing data or GET-ing
@@ -463,8 +1020,8 @@ class MMClient:
         --------
         Modified `kwargs` passed in with the method.
         '''
-        logger.debug(f'Endpoint: {api_endpoint}')
-        logger.debug(f'Data Payload: {data}')
+        logger.debug('Endpoint: %s', api_endpoint)
+        logger.debug('Data Payload: %s', data)
 
         kwargs['endpoint'] = api_endpoint
 
@@ -476,7 +1033,7 @@ class MMClient:
             kwargs['method'] = 'GET'
             kwargs['search'] = kwargs['endpoint'].split('/')[-1]
 
-        logger.debug(f'kwargs out: {kwargs}')
+        logger.debug('kwargs out: %s', kwargs)
 
         return kwargs
 
@@ -494,13 +1051,18 @@ class MMClient:
 
         jresp, jresp_err = self._api_call("get", logout_url)
 
+        # The token can't be reused after logging out
+        if self.token_cache:
+            self.token_cache.delete(self.mm_host, self.port, self.username)
+
         return jresp, jresp_err
 
     @log
     def write_mem(self, config_path=None):
         '''Saves the config at the given `config_path` level.
 
-        Defaults to `/md` if none provided.
+        Defaults to `/md` if none provided. Inside a `batch()` the config is
+        only saved once the batch exits and (None, None) is returned.
 
         Args:
         -----
@@ -513,6 +1075,11 @@ class MMClient:
 
         The error if status string returned is not 0, else it returns None
         '''
+        batch = self._batch
+        if batch is not None:
+            batch.add(config_path)
+            return None, None
+
         url = f'{self.mm_base_api_url}/configuration/object/write_memory'
         params = self._params(config_path=config_path)
 
@@ -520,8 +1087,70 @@ class MMClient:
 
         return jresp, jresp_err
 
+    @property
+    def _batch(self):
+        '''The `WriteBatch` open in the calling thread, if any. Writes from
+        other threads sharing the client are not part of it.
+        '''
+        return getattr(self._batches, 'batch', None)
+
+    @_batch.setter
+    def _batch(self, batch):
+        self._batches.batch = batch
+
+    def in_batch(self, func):
+        '''Returns the `func` wrapped to run in the write batch open in the
+        calling thread, for handing writes over to worker threads.
+        '''
+        batch = self._batch
+        if batch is None:
+            return func
+
+        @wraps(func)
+        def wrapped(*args, **kwargs):
+            self._batch = batch
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._batch = None
+
+        return wrapped
+
+    def batch(self, max_workers=None):
+        '''Opens a batch of writes whose config is saved once it exits.
+
+        Scripts often call `write_mem()` after every POST, and each call
+        commits the config on the MM. Inside the batch the config paths
+        POSTed to are recorded instead, and `write_memory` is POSTed once
+        per path when the batch exits. See `WriteBatch`.
+
+        The batch is only open in the thread that opened it, so writes from
+        other threads sharing the client are saved as usual. Functions
+        writing from worker threads for the batch's thread can be wrapped
+        with `in_batch()`, as `DependencyGraph.push()` does.
+
+        Args:
+        -----
+        max_workers: `int`, optional, default: None
+            The maximum number of paths saved at the same time.
+
+        Returns:
+        --------
+        The `WriteBatch` context manager.
+
+        Examples:
+        ---------
+        >>> with mmc.batch() as batch:
+                for ap_group in ap_groups:
+                    mmc.ap_group(data=ap_group, config_path='/md/EU')
+                    mmc.write_mem('/md/EU')
+        >>> batch.results
+        {'/md/EU': ({'_global_result': {'status': 0, ...}}, None)}
+        '''
+        return WriteBatch(self, max_workers=max_workers)
+
     @log
-    def resource(self, method, endpoint, jpayload=None, **kwargs):
+    def resource(self, method, endpoint, jpayload=None, stream=False, **kwargs):
         '''Actiones the HTTP request type defined with the `method` attribute to
         the defined `endpoint`.
 
@@ -543,6 +1172,14 @@ class MMClient:
         jpayload: dict, optional
             JSON formated payload. Same as requests json sent with the body of
             the request. With this passed in, the HTTP method is always POST.
+        stream: bool, optional, default: False
+            For GET requests only. If True, instead of the JSON response a
+            generator of the objects in the response's `_data.<search>` list
+            is returned. Objects are decoded one at a time as the response is
+            read, which keeps memory low with very large responses. Streamed
+            responses are never cached. If the response has no such list,
+            the MM's `_global_result` error is returned instead, or an error
+            with a `status` of -1 if the response isn't JSON.
         **kwargs:
             These get passed to the `_params` method, so read what is accepted
             from there.
@@ -552,6 +1189,8 @@ class MMClient:
         The JSON response and None for error if everything went OK.
         The JSON response and JSON error response in case of the response
         getting an error.
+        With `stream` a generator of the objects and None for error, or None
+        and the JSON error response.
 
         Examples:
         ---------
@@ -600,730 +1239,540 @@ class MMClient:
                 config_path='/md/Test_empty',
                 profile_name='test-01.ap_sys_prof')
 
+        **Ex. 3:** Streaming a very large list of objects
+
+        >>> netdsts, err = aos_obj.netdst(config_path='/md', stream=True)
+        >>> for netdst in netdsts:
+                print(netdst['dstname'])
+
         '''
-        # Add the 'search' string used with the filter option used by the
-        # self._params method.
-        # For example this is the last element in the splited endpoint string.
-        # For 'configuration/object/ap_sys_prof' this would be 'ap_sys_prof'
-        kwargs['search'] = endpoint.split('/')[-1]
+        # The endpoint's URL path and 'search' string, used with the filter
+        # option by the self._params method, are only worked out once per
+        # endpoint. The 'search' string is the last element of the endpoint
+        # path, so for 'configuration/object/ap_sys_prof' it's 'ap_sys_prof'
+        if not isinstance(endpoint, Endpoint):
+            endpoint = get_endpoint(endpoint)
+        kwargs['search'] = endpoint.search
 
         # Get the params from the passed in kwargs
         params = self._params(**kwargs)
 
         # Build the full URL to the resource
-        resource_url = self._resource_url(endpoint)
+        resource_url = self.mm_base_api_url + endpoint.url_path
+
+        method = method.upper()
+
+        if self.validate_config_path and endpoint.search != 'node_hierarchy':
+            config_path_err = self.hierarchy().validate(params['config_path'])
+            if config_path_err:
+                logger.error("Not sending the request: %s", config_path_err['status_str'])
+                return None, config_path_err
+
+        if stream and method == 'GET':
+            return self._api_stream(resource_url, endpoint.search, params=params)
+
+        # Serve GETs from the cache if enabled and the response is cached
+        cache_key = None
+        if self.cache is not None and method == 'GET':
+            cache_key = self.cache.key(endpoint.path, params)
+            jresp = self.cache.get(cache_key)
+            if jresp is not None:
+                return jresp, None
+
+        # Encode the payload with the client's codec instead of requests'
+        # json, as the session already sends the JSON content type
+        body = None
+        if jpayload is not None:
+            body = self.codec.dumpb(jpayload)
 
         # Get the JSON response and error
-        jresp, jresp_err = self._api_call(method, resource_url, params=params, json=jpayload)
+        jresp, jresp_err = self._api_call(method, resource_url, params=params, data=body)
+
+        batch = self._batch
+        if batch is not None and method == 'POST' and jresp is not None and not jresp_err:
+            batch.add(params['config_path'], jresp)
+
+        # GET errors come back as the response, so they're checked for here
+        if self.cache is not None and jresp is not None and not jresp_err and not self._mm_error_status(jresp):
+            if cache_key is not None:
+                self.cache.set(cache_key, jresp)
+            # A successful write makes the cached responses of this endpoint
+            # at and below the config path stale
+            elif method == 'POST':
+                self.cache.invalidate(endpoint.path, params['config_path'])
+
+        if method == 'POST' and endpoint.search in self.HIERARCHY_OBJECTS and not jresp_err:
+            self._hierarchy = None
 
         return jresp, jresp_err
 
+    def hierarchy(self, refresh=False):
+        '''Returns the cached tree of the MM's node hierarchy.
+
+        It's fetched with `node_hierarchy()` on first use and cached until
+        `refresh` is passed in or a POST to one of the `HIERARCHY_OBJECTS`
+        changes the hierarchy. A refresh is always fetched from the MM, even
+        with the client's GET cache enabled.
+
+        Args:
+        -----
+        refresh: bool, optional, default: False
+            Fetch the hierarchy again.
+
+        Returns:
+        --------
+        The `NodeTree`.
+
+        Raises:
+        -------
+        ValueError if the MM didn't return the hierarchy.
+
+        Examples:
+        ---------
+        >>> tree = mmc.hierarchy()
+        >>> tree.glob('/md/EU/*/site-*')
+        ['/md/EU/DE/site-01', '/md/EU/FR/site-01']
+        >>> for config_path in tree.subtree('/md/EU'):
+                mmc.ap_group(config_path=config_path)
+        '''
+        with self._hierarchy_lock:
+            if self._hierarchy is None or refresh:
+                # A refresh must not be served from the GET cache
+                if refresh and self.cache is not None:
+                    self.cache.invalidate(get_endpoint('configuration/object/node_hierarchy').path, '/')
+                jresp, err = self.node_hierarchy()
+                if not isinstance(jresp, dict) or err:
+                    raise ValueError(f"Could not get the node hierarchy: {err or jresp}")
+                self._hierarchy = NodeTree(jresp)
+
+            return self._hierarchy
+
+    @classmethod
+    def register_endpoint(cls, name, path=None, key='profile-name', method_name=None, data_required=False):
+        '''Registers an AOS8 object endpoint and adds its resource method.
+
+        Args:
+        -----
+        name: `str`
+            The object name, ex. 'int_vlan'.
+        path: `str`, optional
+            The endpoint path. Defaults to 'configuration/object/<name>'.
+        key: `str`, optional, default: 'profile-name'
+            The object attribute that names the objects.
+        method_name: `str`, optional
+            The resource method name. Defaults to the object name.
+        data_required: bool, optional, default: False
+            True if the endpoint can only be POSTed to.
+
+        Examples:
+        ---------
+        >>> MMClient.register_endpoint('int_vlan', key='id')
+        >>> mmc.int_vlan(config_path='/md/EU')
+        '''
+        method_name, endpoint = endpoints.register(name, path, key, method_name, data_required)
+        setattr(cls, method_name, _resource_method(method_name, endpoint))
 
     '''Below are defined resource methods, which are the ones with a
-    hardcoded endpoint object.
+    hardcoded endpoint object. The ones for the endpoints in
+    `arubafi.endpoints` are added to the class below it.
     '''
     @log
-    def show_command(self, command):
-        '''RM to GET a response from a show command.
-
-        If `data` passed method is POST and takes presedence over other
-        attributes.
+    def show_command(self, command, columnar=True, config_path=None):
+        '''RM to GET the output of a show command from the
+        `configuration/showcommand` endpoint.
 
         Args:
         -----
-        data: `str`, optional
-            JSON formated payload. Same as requests json sent with the body of
-            the request. With this passed in, the HTTP method is always POST.
-        **kwargs:
-            These are passed to `self._kwargs_modify` and `self._params` to
-            create a propper request with params.
+        command: `str`
+            The full show command, ex. 'show ap database'.
+        columnar: bool, optional, default: True
+            If True, every table in the output is returned as a dict of
+            column name to the list of its values instead of a list of row
+            dicts. See `arubafi.showcommand.to_columns`.
+        config_path: `str`, optional
+            The config path of the node to run the command on. Not sent if
+            not passed in.
 
         Returns:
         --------
-        The same as what `self.resource` returns, which is response and
-        error or None if no error.
+        The JSON response and None for error if everything went OK.
+        The JSON response and its `_global_result` if the MM returned an
+        error.
+
+        Examples:
+        ---------
+        >>> jresp, err = mmc.show_command('show ap database')
+        >>> jresp['AP Database']['Name']
+        ['ap01', 'ap02', ...]
         '''
-        logger.debug(f'Data in: {command}')
+        params = {
+            'command': command,
+            'UIDARUBA': self._access_token,
+        }
+        if config_path:
+            params['config_path'] = config_path
 
-        kwargs = self._kwargs_modify(
-            'configuration/object/ap_sys_prof',
-            data,
-            **kwargs)
+        jresp, jresp_err = self._api_call(
+            "GET",
+            self._resource_url('configuration/showcommand'),
+            params=params)
 
-        return self.resource(**kwargs)
+        if jresp is None:
+            return jresp, jresp_err
 
+        if self._mm_error_status(jresp):
+            return jresp, jresp['_global_result']
 
-    @log
-    def ap_sys_profile(self, data=None, **kwargs):
-        '''RM to GET or POST to an `ap_sys_prof` endpoint object.
+        if columnar:
+            jresp = to_columns(jresp)
 
-        If `data` passed method is POST and takes presedence over other
-        attributes.
+        return jresp, jresp_err
+
+    @log
+    def show_commands(self, commands, columnar=True, config_path=None, max_workers=None):
+        '''GETs the output of many show commands concurrently.
 
         Args:
         -----
-        data: `str`, optional
-            JSON formated payload. Same as requests json sent with the body of
-            the request. With this passed in, the HTTP method is always POST.
-        **kwargs:
-            These are passed to `self._kwargs_modify` and `self._params` to
-            create a propper request with params.
+        commands: `list`
+            The show commands, ex. ['show ap database', 'show user-table'].
+        columnar: bool, optional, default: True
+            Passed to `show_command`.
+        config_path: `str`, optional
+            Passed to `show_command`.
+        max_workers: `int`, optional, default: None
+            The maximum number of commands run at the same time. Defaults to
+            the number of commands, capped at 8.
 
         Returns:
         --------
-        The same as what `self.resource` returns, which is response and
-        error or None if no error.
+        A dict of command to what `show_command` returned for it.
         '''
-        logger.debug(f'Data in: {data}')
+        commands = list(dict.fromkeys(commands))
+        if not commands:
+            return dict()
 
-        kwargs = self._kwargs_modify(
-            'configuration/object/ap_sys_prof',
-            data,
-            **kwargs)
+        max_workers = max_workers or min(8, len(commands))
 
-        return self.resource(**kwargs)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            outputs = {
+                command: executor.submit(self.show_command, command, columnar, config_path)
+                for command in commands
+            }
 
-    @log
-    def wlan_ssid_profile(self, data=None, **kwargs):
-        '''RM to GET or POST to an `ssid_prof` endpoint object.
+        return {command: output.result() for command, output in outputs.items()}
 
-        If `data` passed method is POST and takes presedence over other
-        attributes.
+    @log
+    def reconcile(self, desired, dry_run=False, max_workers=None):
+        '''POSTs only the desired objects that differ from what is on the MM.
+
+        The current objects are fetched with one GET per config path and
+        object type, concurrently. Objects inherited from the nodes above a
+        config path are left out, so a desired object that's only inherited
+        is created at the config path. `_flags` and `_meta` are ignored and
+        only the attributes set in the desired objects are compared, so
+        defaults the MM fills in don't make an object differ. The differing
+        objects are then POSTed one by one, in the order they were passed
+        in.
 
         Args:
         -----
-        data: `str`, optional
-            JSON formated payload. Same as requests json sent with the body of
-            the request. With this passed in, the HTTP method is always POST.
-        **kwargs:
-            These are passed to `self._kwargs_modify` and `self._params` to
-            create a propper request with params.
+        desired: dict
+            Config path to a dict of object name to the list of desired
+            objects, ex. {'/md/EU': {'ap_group': [{'profile-name': 'lab'}]}}.
+        dry_run: bool, optional, default: False
+            Only work out the plan without POSTing anything.
+        max_workers: `int`, optional, default: None
+            The maximum number of GETs made at the same time. Defaults to
+            the number of GETs, capped at 8.
 
         Returns:
         --------
-        The same as what `self.resource` returns, which is response and
-        error or None if no error.
+        The report dict with the 'create', 'update' and 'unchanged' lists of
+        (config_path, object name, object key) tuples, and the 'errors' list
+        of (config_path, object name, object key, error) tuples. The object
+        key is None for errors of the GETs.
+
+        Examples:
+        ---------
+        >>> report = mmc.reconcile({
+                '/md/EU': {
+                    'netdst': [{'dstname': 'dns', 'netdst__host': [{'address': '10.0.0.53'}]}],
+                    'ap_group': [{'profile-name': 'lab', 'dot11a_prof': {'profile-name': 'lab'}}]}},
+                dry_run=True)
+        >>> report['update']
+        [('/md/EU', 'ap_group', 'lab')]
         '''
-        logger.debug(f'Data in: {data}')
+        report = {'create': list(), 'update': list(), 'unchanged': list(), 'errors': list()}
 
-        kwargs = self._kwargs_modify(
-            'configuration/object/ssid_prof',
-            data,
-            **kwargs)
+        fetches = [(config_path, name) for config_path, objects in desired.items() for name in objects]
+        if not fetches:
+            return report
 
-        return self.resource(**kwargs)
+        for config_path, name in fetches:
+            if endpoints.object_key(name) is None:
+                raise ValueError(f"'{name}' objects can't be reconciled as they aren't named")
 
-    @log
-    def ap_group(self, data=None, **kwargs):
-        '''RM to GET or POST to an `ap_group` endpoint object.
+        with ThreadPoolExecutor(max_workers=max_workers or min(8, len(fetches))) as executor:
+            current = {fetch_args: executor.submit(self._fetch_objects, *fetch_args, local_only=True) for fetch_args in fetches}
 
-        If `data` passed method is POST and takes presedence over other
-        attributes.
+        for (config_path, name), future in current.items():
+            key = endpoints.object_key(name)
+            objs, err = future.result()
+
+            if err is not None:
+                report['errors'].append((config_path, name, None, err))
+                continue
+
+            plan = diff(desired[config_path][name], objs, key)
+
+            for action, objs in plan.items():
+                report[action].extend((config_path, name, obj[key]) for obj in objs)
+
+            if dry_run:
+                continue
+
+            unchanged = {id(obj) for obj in plan['unchanged']}
+
+            for obj in desired[config_path][name]:
+                if id(obj) in unchanged:
+                    continue
+                jresp, err = self.resource('POST', f'configuration/object/{name}', jpayload=obj, config_path=config_path)
+                if err:
+                    report['errors'].append((config_path, name, obj[key], err))
+
+        return report
+
+    def _fetch_objects(self, config_path, name, local_only=False):
+        '''GETs the `name` objects at the `config_path` from the MM, never
+        the cache.
 
         Args:
         -----
-        profile_name: ``str``, optional
-            If passed in, it will search for that profile
-        data: `str`, optional
-            JSON formated payload. Same as requests json sent with the body of
-            the request. With this passed in, the HTTP method is always POST.
-        **kwargs:
-            These are passed to `self._kwargs_modify` and `self._params` to
-            create a propper request with params.
+        config_path: `str`
+            The config path to GET the objects at.
+        name: `str`
+            The object name.
+        local_only: bool, optional, default: False
+            Drop the objects inherited from the nodes above the
+            `config_path`.
 
         Returns:
         --------
-        The same as what `self.resource` returns, which is response and
-        error or None if no error.
+        The list of objects and the error, or `None` if no error.
         '''
-        logger.debug(f'Data in: {data}')
+        endpoint = get_endpoint(f'configuration/object/{name}')
+        params = self._params(config_path=config_path)
+        jresp, err = self._api_call('GET', self.mm_base_api_url + endpoint.url_path, params=params)
 
-        kwargs = self._kwargs_modify(
-            'configuration/object/ap_group',
-            data,
-            **kwargs)
+        if not isinstance(jresp, dict) or self._mm_error_status(jresp):
+            return list(), err or (jresp or dict()).get('_global_result')
 
-        return self.resource(**kwargs)
+        objs = jresp.get('_data', dict()).get(name, list())
+        if local_only:
+            objs = [obj for obj in objs if isinstance(obj, dict) and is_local(obj)]
 
-    @log
-    def virtual_ap(self, data=None, **kwargs):
-        '''RM to GET or POST to an `virtual_ap` endpoint object.
+        return objs, None
 
-        If `data` passed method is POST and takes presedence over other
-        attributes.
+    def effective_config(self, names, root='/md', include_devices=True, max_workers=None):
+        '''Resolves the config that applies at every node below the `root`.
+
+        The `names` objects are fetched with one GET per node and object
+        type, concurrently, and the config inherited down the `hierarchy()`
+        is then worked out locally. Querying any number of nodes makes no
+        more requests.
 
         Args:
         -----
-        profile_name: ``str``, optional
-            If passed in, it will search for that profile
-        data: `str`, optional
-            JSON formated payload. Same as requests json sent with the body of
-            the request. With this passed in, the HTTP method is always POST.
-        **kwargs:
-            These are passed to `self._kwargs_modify` and `self._params` to
-            create a propper request with params.
+        names: `list`
+            The object names, ex. ['ap_sys_prof', 'virtual_ap'].
+        root: `str`, optional, default: '/md'
+            The config path to resolve the config below.
+        include_devices: bool, optional, default: True
+            Also GET the objects configured at the devices.
+        max_workers: `int`, optional, default: None
+            The maximum number of GETs made at the same time. Defaults to
+            the number of GETs, capped at 8.
 
         Returns:
         --------
-        The same as what `self.resource` returns, which is response and
-        error or None if no error.
+        The fetched `EffectiveConfig`. Its `errors` has the failed GETs.
+
+        Examples:
+        ---------
+        >>> config = mmc.effective_config(['ap_sys_prof'], root='/md/EU')
+        >>> for leaf in mmc.hierarchy().glob('/md/EU/*/site-*'):
+                print(leaf, config.get(leaf, 'ap_sys_prof', 'default'))
         '''
-        logger.debug(f'Data in: {data}')
+        config = EffectiveConfig(self, names, self.hierarchy(), root=root, include_devices=include_devices, max_workers=max_workers)
+        config.fetch()
 
-        kwargs = self._kwargs_modify(
-            'configuration/object/virtual_ap',
-            data,
-            **kwargs)
+        return config
 
-        return self.resource(**kwargs)
+    def snapshot(self, path, names=None, root='/', include_devices=True, max_workers=8):
+        '''Exports the config objects of every node below the `root` to a
+        gzipped JSON lines snapshot.
 
-    @log
-    def ap_sys_prof(self, data=None, **kwargs):
-        '''RM to GET or POST to an `ap_sys_prof` endpoint object.
-
-        If `data` passed method is POST and takes presedence over other
-        attributes.
-
-        Args:
-        -----
-        profile_name: ``str``, optional
-            If passed in, it will search for that profile
-        data: `str`, optional
-            JSON formated payload. Same as requests json sent with the body of
-            the request. With this passed in, the HTTP method is always POST.
-        **kwargs:
-            These are passed to `self._kwargs_modify` and `self._params` to
-            create a propper request with params.
-
-        Returns:
-        --------
-        The same as what `self.resource` returns, which is response and
-        error or None if no error.
-        '''
-        logger.debug(f'Data in: {data}')
-
-        kwargs = self._kwargs_modify(
-            'configuration/object/ap_sys_prof',
-            data,
-            **kwargs)
-
-        return self.resource(**kwargs)
-
-    @log
-    def reg_domain_prof(self, data=None, **kwargs):
-        '''RM to GET or POST to an `reg_domain_prof` endpoint object.
-
-        If `data` passed method is POST and takes presedence over other
-        attributes.
-
-        Args:
-        -----
-        profile_name: ``str``, optional
-            If passed in, it will search for that profile
-        data: `str`, optional
-            JSON formated payload. Same as requests json sent with the body of
-            the request. With this passed in, the HTTP method is always POST.
-        **kwargs:
-            These are passed to `self._kwargs_modify` and `self._params` to
-            create a propper request with params.
-
-        Returns:
-        --------
-        The same as what `self.resource` returns, which is response and
-        error or None if no error.
-        '''
-        logger.debug(f'Data in: {data}')
-
-        kwargs = self._kwargs_modify(
-            'configuration/object/reg_domain_prof',
-            data,
-            **kwargs)
-
-        return self.resource(**kwargs)
-
-    @log
-    def dot11k_prof(self, data=None, **kwargs):
-        '''RM to GET or POST to an `dot11k_prof` endpoint object.
-
-        If `data` passed method is POST and takes presedence over other
-        attributes.
-
-        Args:
-        -----
-        profile_name: ``str``, optional
-            If passed in, it will search for that profile
-        data: `str`, optional
-            JSON formated payload. Same as requests json sent with the body of
-            the request. With this passed in, the HTTP method is always POST.
-        **kwargs:
-            These are passed to `self._kwargs_modify` and `self._params` to
-            create a propper request with params.
-
-        Returns:
-        --------
-        The same as what `self.resource` returns, which is response and
-        error or None if no error.
-        '''
-        logger.debug(f'Data in: {data}')
-
-        kwargs = self._kwargs_modify(
-            'configuration/object/dot11k_prof',
-            data,
-            **kwargs)
-
-        return self.resource(**kwargs)
-
-    @log
-    def dot11r_prof(self, data=None, **kwargs):
-        '''RM to GET or POST to an `dot11r_prof` endpoint object.
-
-        If `data` passed method is POST and takes presedence over other
-        attributes.
-
-        Args:
-        -----
-        profile_name: ``str``, optional
-            If passed in, it will search for that profile
-        data: `str`, optional
-            JSON formated payload. Same as requests json sent with the body of
-            the request. With this passed in, the HTTP method is always POST.
-        **kwargs:
-            These are passed to `self._kwargs_modify` and `self._params` to
-            create a propper request with params.
-
-        Returns:
-        --------
-        The same as what `self.resource` returns, which is response and
-        error or None if no error.
-        '''
-        logger.debug(f'Data in: {data}')
-
-        kwargs = self._kwargs_modify(
-            'configuration/object/dot11r_prof',
-            data,
-            **kwargs)
-
-        return self.resource(**kwargs)
-
-    @log
-    def ap_a_radio_prof(self, data=None, **kwargs):
-        '''RM to GET or POST to an `ap_a_radio_prof` endpoint object.
-
-        If `data` passed method is POST and takes presedence over other
-        attributes.
-
-        Args:
-        -----
-        profile_name: ``str``, optional
-            If passed in, it will search for that profile
-        data: `str`, optional
-            JSON formated payload. Same as requests json sent with the body of
-            the request. With this passed in, the HTTP method is always POST.
-        **kwargs:
-            These are passed to `self._kwargs_modify` and `self._params` to
-            create a propper request with params.
-
-        Returns:
-        --------
-        The same as what `self.resource` returns, which is response and
-        error or None if no error.
-        '''
-        logger.debug(f'Data in: {data}')
-
-        kwargs = self._kwargs_modify(
-            'configuration/object/ap_a_radio_prof',
-            data,
-            **kwargs)
-
-        return self.resource(**kwargs)
-
-    @log
-    def ht_radio_prof(self, data=None, **kwargs):
-        '''RM to GET or POST to an `ht_radio_prof` endpoint object.
-
-        If `data` passed method is POST and takes presedence over other
-        attributes.
-
-        Args:
-        -----
-        data: `str`, optional
-            JSON formated payload. Same as requests json sent with the body of
-            the request. With this passed in, the HTTP method is always POST.
-        **kwargs:
-            These are passed to `self._kwargs_modify` and `self._params` to
-            create a propper request with params.
-
-        Returns:
-        --------
-        The same as what `self.resource` returns, which is response and
-        error or None if no error.
-        '''
-        logger.debug(f'Data in: {data}')
-
-        kwargs = self._kwargs_modify(
-            'configuration/object/ht_radio_prof',
-            data,
-            **kwargs)
-
-        return self.resource(**kwargs)
-
-    @log
-    def ht_ssid_prof(self, data=None, **kwargs):
-        '''RM to GET or POST to an `ht_ssid_prof` endpoint object.
-
-        If `data` passed method is POST and takes presedence over other
-        attributes.
-
-        Args:
-        -----
-        data: `str`, optional
-            JSON formated payload. Same as requests json sent with the body of
-            the request. With this passed in, the HTTP method is always POST.
-        **kwargs:
-            These are passed to `self._kwargs_modify` and `self._params` to
-            create a propper request with params.
-
-        Returns:
-        --------
-        The same as what `self.resource` returns, which is response and
-        error or None if no error.
-        '''
-        logger.debug(f'Data in: {data}')
-
-        kwargs = self._kwargs_modify(
-            'configuration/object/ht_ssid_prof',
-            data,
-            **kwargs)
-
-        return self.resource(**kwargs)
-
-
-    @log
-    def rrm_ie_prof(self, data=None, **kwargs):
-        '''RM to GET or POST to an `rrm_ie_prof` endpoint object.
-
-        If `data` passed method is POST and takes presedence over other
-        attributes.
-
-        Args:
-        -----
-        data: `str`, optional
-            JSON formated payload. Same as requests json sent with the body of
-            the request. With this passed in, the HTTP method is always POST.
-        **kwargs:
-            These are passed to `self._kwargs_modify` and `self._params` to
-            create a propper request with params.
-
-        Returns:
-        --------
-        The same as what `self.resource` returns, which is response and
-        error or None if no error.
-        '''
-        logger.debug(f'Data in: {data}')
-
-        kwargs = self._kwargs_modify(
-            'configuration/object/rrm_ie_prof',
-            data,
-            **kwargs)
-
-        return self.resource(**kwargs)
-
-    @log
-    def node_hierarchy(self, data=None, **kwargs):
-        '''RM to GET or POST to an `node_hierarchy` endpoint object.
-
-        If `data` passed method is POST and takes presedence over other
-        attributes.
+        The hierarchy is fetched again, then the objects are GETed with one
+        streamed request per node and object type, at most `max_workers` at
+        a time, and written as they are decoded. Only the objects configured
+        at a node are written for it. Read the snapshot with
+        `arubafi.snapshot.SnapshotReader`.
 
         Args:
         -----
-        data: `str`, optional
-            JSON formated payload. Same as requests json sent with the body of
-            the request. With this passed in, the HTTP method is always POST.
-        **kwargs:
-            These are passed to `self._kwargs_modify` and `self._params` to
-            create a propper request with params.
+        path: `str`
+            The snapshot file, ex. 'mm-2024-01-01.jsonl.gz'.
+        names: `list`, optional, default: None
+            The object names. Defaults to all registered configuration
+            objects.
+        root: `str`, optional, default: '/'
+            The config path to export the config below.
+        include_devices: bool, optional, default: True
+            Also export the objects configured at the devices.
+        max_workers: `int`, optional, default: 8
+            The maximum number of requests in flight.
 
         Returns:
         --------
-        The same as what `self.resource` returns, which is response and
-        error or None if no error.
-        '''
-        logger.debug(f'Data in: {data}')
-
-        kwargs = self._kwargs_modify(
-            'configuration/object/node_hierarchy',
-            data,
-            **kwargs)
-
-        return self.resource(**kwargs)
-
-    @log
-    def add_configuration_device(self, data, **kwargs):
-        '''RM to GET or POST to an `add_configuration_device` endpoint object.
-
-        If `data` passed method is POST and takes presedence over other
-        attributes.
-
-        Args:
-        -----
-        data: `str`
-            JSON formated payload. Same as requests json sent with the body of
-            the request. With this passed in, the HTTP method is always POST.
-        **kwargs:
-            These are passed to `self._kwargs_modify` and `self._params` to
-            create a propper request with params.
-
-        Returns:
-        --------
-        The same as what `self.resource` returns, which is response and
-        error or None if no error.
-        '''
-        logger.debug(f'Data in: {data}')
-
-        kwargs = self._kwargs_modify(
-            'configuration/object/add_configuration_device',
-            data,
-            **kwargs)
-
-        return self.resource(**kwargs)
+        The summary dict with the number of `requests` and `objects`, the
+        `errors` list of (config_path, object name, error) tuples and the
+        `seconds` the export took.
 
-    @log
-    def netdst(self, data=None, **kwargs):
-        '''RM to GET or POST to an `netdst` endpoint object.
-
-        If `data` passed method is POST and takes presedence over other
-        attributes.
-
-        Args:
-        -----
-        data: `str`, optional
-            JSON formated payload. Same as requests json sent with the body of
-            the request. With this passed in, the HTTP method is always POST.
-        **kwargs:
-            These are passed to `self._kwargs_modify` and `self._params` to
-            create a propper request with params.
-
-        Returns:
-        --------
-        The same as what `self.resource` returns, which is response and
-        error or None if no error.
+        Examples:
+        ---------
+        >>> summary = mmc.snapshot('mm-2024-01-01.jsonl.gz', max_workers=16)
+        >>> summary['objects'], summary['errors']
+        (48211, [])
         '''
-        logger.debug(f'Data in: {data}')
+        writer = SnapshotWriter(self, path, names=names, root=root, include_devices=include_devices, max_workers=max_workers)
 
-        kwargs = self._kwargs_modify(
-            'configuration/object/netdst',
-            data,
-            **kwargs)
+        return writer.export()
 
-        return self.resource(**kwargs)
-
-    @log
-    def netsvc(self, data=None, **kwargs):
-        '''RM to GET or POST to an `netsvc` endpoint object.
+    def dependencies(self, name, ids, config_path=None, max_workers=8):
+        '''GETs objects and every object they reference, directly or not.
 
-        If `data` passed method is POST and takes presedence over other
-        attributes.
+        The objects referenced by the objects of one level are GETed
+        concurrently, with one GET per object name, before moving on to the
+        objects they reference. Push the objects to another config path,
+        every object after the objects it references, with the graph's
+        `push()`.
 
         Args:
         -----
-        data: `str`, optional
-            JSON formated payload. Same as requests json sent with the body of
-            the request. With this passed in, the HTTP method is always POST.
-        **kwargs:
-            These are passed to `self._kwargs_modify` and `self._params` to
-            create a propper request with params.
+        name: `str`
+            The object name, ex. 'virtual_ap'.
+        ids: `str` or `list`
+            The names of the objects, ex. 'corp' or ['corp', 'guest'].
+        config_path: `str`, optional, default: None
+            The config path to GET the objects at, '/md' if `None`.
+        max_workers: `int`, optional, default: 8
+            The maximum number of GETs made at the same time.
 
         Returns:
         --------
-        The same as what `self.resource` returns, which is response and
-        error or None if no error.
-        '''
-        logger.debug(f'Data in: {data}')
-
-        kwargs = self._kwargs_modify(
-            'configuration/object/netsvc',
-            data,
-            **kwargs)
+        The `arubafi.depgraph.DependencyGraph` of the objects.
 
-        return self.resource(**kwargs)
-
-    @log
-    def acl_sess(self, data=None, **kwargs):
-        '''RM to GET or POST to an `acl_sess` endpoint object.
-
-        If `data` passed method is POST and takes presedence over other
-        attributes.
-
-        Args:
-        -----
-        data: `str`, optional
-            JSON formated payload. Same as requests json sent with the body of
-            the request. With this passed in, the HTTP method is always POST.
-        **kwargs:
-            These are passed to `self._kwargs_modify` and `self._params` to
-            create a propper request with params.
-
-        Returns:
-        --------
-        The same as what `self.resource` returns, which is response and
-        error or None if no error.
+        Examples:
+        ---------
+        >>> graph = mmc.dependencies('role', 'guest', config_path='/md/EU')
+        >>> graph.objects[('netdst', 'dns')]
+        {'dstname': 'dns', ...}
+        >>> graph.push(mmc, config_path='/md/US')
+        {'posted': [('netdst', 'dns'), ('acl_sess', 'guest'), ('role', 'guest')], 'skipped': [], 'errors': []}
         '''
-        logger.debug(f'Data in: {data}')
-
-        kwargs = self._kwargs_modify(
-            'configuration/object/acl_sess',
-            data,
-            **kwargs)
+        return DependencyGraph().fetch(self, name, ids, config_path=config_path, max_workers=max_workers)
 
-        return self.resource(**kwargs)
+    def drift(self, snapshot, path=None, objects=False, max_workers=8):
+        '''Finds the objects on the MM that differ from a snapshot.
 
-    @log
-    def aaa_prof(self, data=None, **kwargs):
-        '''RM to GET or POST to an `aaa_prof` endpoint object.
-
-        If `data` passed method is POST and takes presedence over other
-        attributes.
+        A new snapshot of the same object names below the same config path
+        is taken, then only the nodes and object types whose hashes differ
+        from the old snapshot's are compared.
 
         Args:
         -----
-        data: `str`, optional
-            JSON formated payload. Same as requests json sent with the body of
-            the request. With this passed in, the HTTP method is always POST.
-        **kwargs:
-            These are passed to `self._kwargs_modify` and `self._params` to
-            create a propper request with params.
+        snapshot: `str`
+            The snapshot to compare the MM with.
+        path: `str`, optional, default: None
+            Where to keep the new snapshot. It's deleted once compared if
+            not passed in.
+        objects: bool, optional, default: False
+            Add the `old` and `new` object to every change.
+        max_workers: `int`, optional, default: 8
+            The maximum number of requests in flight.
 
         Returns:
         --------
-        The same as what `self.resource` returns, which is response and
-        error or None if no error.
-        '''
-        logger.debug(f'Data in: {data}')
-
-        kwargs = self._kwargs_modify(
-            'configuration/object/aaa_prof',
-            data,
-            **kwargs)
-
-        return self.resource(**kwargs)
-
-    @log
-    def rad_server(self, data=None, **kwargs):
-        '''RM to GET or POST to an `rad_server` endpoint object.
-
-        If `data` passed method is POST and takes presedence over other
-        attributes.
-
-        Args:
-        -----
-        data: `str`, optional
-            JSON formated payload. Same as requests json sent with the body of
-            the request. With this passed in, the HTTP method is always POST.
-        **kwargs:
-            These are passed to `self._kwargs_modify` and `self._params` to
-            create a propper request with params.
+        The list of changes, see `arubafi.snapshot.drift()`.
 
-        Returns:
-        --------
-        The same as what `self.resource` returns, which is response and
-        error or None if no error.
+        Examples:
+        ---------
+        >>> mmc.drift('mm-2024-01-01.jsonl.gz')
+        [{'config_path': '/md/EU', 'name': 'netdst', 'id': 'dns', 'change': 'changed'}]
         '''
-        logger.debug(f'Data in: {data}')
-
-        kwargs = self._kwargs_modify(
-            'configuration/object/rad_server',
-            data,
-            **kwargs)
-
-        return self.resource(**kwargs)
-
-    @log
-    def server_group_prof(self, data=None, **kwargs):
-        '''RM to GET or POST to an `server_group_prof` endpoint object.
-
-        If `data` passed method is POST and takes presedence over other
-        attributes.
-
-        Args:
-        -----
-        data: `str`, optional
-            JSON formated payload. Same as requests json sent with the body of
-            the request. With this passed in, the HTTP method is always POST.
-        **kwargs:
-            These are passed to `self._kwargs_modify` and `self._params` to
-            create a propper request with params.
+        old = SnapshotReader(snapshot)
+        new_path = path or f'{snapshot}.live'
 
-        Returns:
-        --------
-        The same as what `self.resource` returns, which is response and
-        error or None if no error.
-        '''
-        logger.debug(f'Data in: {data}')
+        try:
+            self.snapshot(
+                new_path,
+                names=old.header['names'],
+                root=old.header['root'],
+                include_devices=old.header.get('include_devices', True),
+                max_workers=max_workers)
 
-        kwargs = self._kwargs_modify(
-            'configuration/object/server_group_prof',
-            data,
-            **kwargs)
+            return snapshots.drift(old, new_path, objects=objects)
+        finally:
+            if path is None:
+                for remove_path in (new_path, snapshots.hashes_path(new_path)):
+                    if os.path.exists(remove_path):
+                        os.remove(remove_path)
 
-        return self.resource(**kwargs)
 
-    @log
-    def role(self, data=None, **kwargs):
-        '''RM to GET or POST to an `role` endpoint object.
+RESOURCE_METHOD_DOC = '''RM to GET or POST to an `{search}` endpoint object.
 
         If `data` passed method is POST and takes presedence over other
         attributes.
 
         Args:
         -----
+        profile_name: ``str``, optional
+            If passed in, it will search for that profile
         data: `str`, optional
             JSON formated payload. Same as requests json sent with the body of
             the request. With this passed in, the HTTP method is always POST.
         **kwargs:
-            These are passed to `self._kwargs_modify` and `self._params` to
-            create a propper request with params.
+            These are passed to `self._params` to create a propper request
+            with params.
 
         Returns:
         --------
         The same as what `self.resource` returns, which is response and
         error or None if no error.
         '''
-        logger.debug(f'Data in: {data}')
-
-        kwargs = self._kwargs_modify(
-            'configuration/object/role',
-            data,
-            **kwargs)
 
-        return self.resource(**kwargs)
 
-    @log
-    def acl_sess(self, data=None, **kwargs):
-        '''RM to GET or POST to an `acl_sess` endpoint object.
+def _resource_method(name, endpoint):
+    '''Returns the resource method for the `endpoint`.
 
-        If `data` passed method is POST and takes presedence over other
-        attributes.
+    The endpoint's path and search string are bound to the method, so
+    nothing about the endpoint is worked out when the method is called.
+    '''
+    if endpoint.data_required:
+        def resource_method(self, data, **kwargs):
+            return self.resource('POST', endpoint, jpayload=data, **kwargs)
+    else:
+        def resource_method(self, data=None, **kwargs):
+            if data:
+                return self.resource('POST', endpoint, jpayload=data, **kwargs)
+            return self.resource('GET', endpoint, **kwargs)
 
-        Args:
-        -----
-        data: `str`, optional
-            JSON formated payload. Same as requests json sent with the body of
-            the request. With this passed in, the HTTP method is always POST.
-        **kwargs:
-            These are passed to `self._kwargs_modify` and `self._params` to
-            create a propper request with params.
+    resource_method.__name__ = resource_method.__qualname__ = name
+    resource_method.__doc__ = RESOURCE_METHOD_DOC.format(search=endpoint.search)
 
-        Returns:
-        --------
-        The same as what `self.resource` returns, which is response and
-        error or None if no error.
-        '''
-        logger.debug(f'Data in: {data}')
+    return log(resource_method)
 
-        kwargs = self._kwargs_modify(
-            'configuration/object/acl_sess',
-            data,
-            **kwargs)
 
-        return self.resource(**kwargs)
+for _name, _endpoint in endpoints.RESOURCE_METHODS.items():
+    setattr(MMClient, _name, _resource_method(_name, _endpoint))
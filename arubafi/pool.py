@@ -0,0 +1,224 @@
+import ssl
+import threading
+import time
+
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.ssl_ import create_urllib3_context
+
+
+class ConnectionStats:
+    """Thread safe counters of the requests sent through a `PoolingAdapter`
+    and of the connections it opened for them.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.new_connections = 0
+        self.connect_seconds = 0.0
+        self.tls_resumed = 0
+
+    def request(self):
+        with self._lock:
+            self.requests += 1
+
+    def connected(self, seconds, tls_resumed=False):
+        with self._lock:
+            self.new_connections += 1
+            self.connect_seconds += seconds
+            self.tls_resumed += bool(tls_resumed)
+
+    def snapshot(self):
+        '''Returns the counters, with the number of requests that reused an
+        open connection.
+
+        Returns:
+        --------
+        A dict of `requests`, `new_connections`, `reused_connections`,
+        `connect_seconds` (the total time spent opening connections,
+        including TLS handshakes) and `tls_resumed` (new connections that
+        resumed a TLS session).
+        '''
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'new_connections': self.new_connections,
+                'reused_connections': max(0, self.requests - self.new_connections),
+                'connect_seconds': self.connect_seconds,
+                'tls_resumed': self.tls_resumed,
+            }
+
+
+class TLSSessionContext(ssl.SSLContext):
+    """SSL context that resumes the last TLS session of a host on new
+    connections to it, which skips most of the TLS handshake.
+
+    With TLS 1.3 the session tickets only arrive after the handshake, so
+    the session is saved again once the first response has been read.
+
+    It's made by urllib3, so it has the same hardening as urllib3's own
+    contexts, ex. the minimum TLS version, the ciphers and no compression,
+    except that TLS 1.2 session tickets are allowed.
+    """
+
+    def __new__(cls):
+        context = create_urllib3_context()
+        context.__class__ = cls
+        return context
+
+    def __init__(self):
+        # urllib3 matches the hostname itself, like with its own contexts
+        self.check_hostname = False
+        # urllib3 turns TLS 1.2 session tickets off, which most servers need
+        # to resume sessions
+        self.options &= ~ssl.OP_NO_TICKET
+        self._sessions = dict()
+        self._sessions_lock = threading.Lock()
+
+    def wrap_socket(self, sock, server_side=False, do_handshake_on_connect=True, suppress_ragged_eofs=True, server_hostname=None, session=None):
+        if session is None and not server_side:
+            with self._sessions_lock:
+                session = self._sessions.get(server_hostname)
+
+        sslsock = super().wrap_socket(
+            sock,
+            server_side=server_side,
+            do_handshake_on_connect=do_handshake_on_connect,
+            suppress_ragged_eofs=suppress_ragged_eofs,
+            server_hostname=server_hostname,
+            session=session,
+        )
+
+        if not server_side:
+            self.save_session(sslsock)
+
+        return sslsock
+
+    def save_session(self, sslsock):
+        '''Keeps the session of the `sslsock` for new connections to its host
+        '''
+        session = sslsock.session
+        if session is not None:
+            with self._sessions_lock:
+                self._sessions[sslsock.server_hostname] = session
+
+
+class _CountingConnection:
+    """Records the opened connections and how long opening them took with
+    the `stats` of the adapter the connection class was made for.
+    """
+    stats = None
+    _session_saved = False
+
+    def connect(self):
+        start = time.perf_counter()
+        super().connect()
+        self._session_saved = False
+        self.stats.connected(time.perf_counter() - start, getattr(self.sock, 'session_reused', False))
+
+    def getresponse(self, *args, **kwargs):
+        response = super().getresponse(*args, **kwargs)
+
+        context = getattr(self.sock, 'context', None)
+        if not self._session_saved and isinstance(context, TLSSessionContext):
+            context.save_session(self.sock)
+            self._session_saved = True
+
+        return response
+
+
+class PoolingAdapter(HTTPAdapter):
+    """Transport adapter with a tunable connection pool, default connect and
+    read timeouts, TLS session reuse and connection counters.
+
+    Requests only uses a timeout passed with every request, so the adapter's
+    timeouts are used for requests sent without one.
+
+    Params
+    ------
+    pool_size: `int`, optional, default: 10
+        The maximum number of connections kept open per host. Should be at
+        least the number of threads using the session at the same time.
+
+    pool_block: bool, optional, default: False
+        Wait for a free connection when all `pool_size` connections are in
+        use. Otherwise a new connection is opened and closed once it's
+        done with, which logs a "pool is full" warning.
+
+    connect_timeout: `float`, optional, default: None
+        Seconds to wait for a connection to be opened.
+
+    read_timeout: `float`, optional, default: None
+        Seconds to wait for the server between bytes of the response.
+
+    tls_session_reuse: bool, optional, default: True
+        Resume the last TLS session of the host on new connections.
+
+    max_retries: `int`, optional, default: 0
+        Passed to `HTTPAdapter`.
+
+    Examples
+    --------
+    >>> adapter = PoolingAdapter(pool_size=32, connect_timeout=3, read_timeout=30)
+    >>> session.mount('https://arubamm.domain.com', adapter)
+    >>> adapter.stats.snapshot()
+    {'requests': 0, 'new_connections': 0, 'reused_connections': 0, 'connect_seconds': 0.0, 'tls_resumed': 0}
+    """
+
+    __attrs__ = HTTPAdapter.__attrs__ + ['connect_timeout', 'read_timeout', 'tls_session_reuse']
+
+    def __init__(self, pool_size=10, pool_block=False, connect_timeout=None, read_timeout=None, tls_session_reuse=True, max_retries=0):
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.tls_session_reuse = tls_session_reuse
+        self.stats = ConnectionStats()
+        # TLS verification settings to their `TLSSessionContext`
+        self._tls_contexts = dict()
+        self._tls_contexts_lock = threading.Lock()
+
+        super().__init__(pool_connections=pool_size, pool_maxsize=pool_size, pool_block=pool_block, max_retries=max_retries)
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        super().init_poolmanager(connections, maxsize, block, **pool_kwargs)
+
+        # Pools of connections counting themselves with this adapter's stats
+        attrs = {'stats': self.stats}
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': type('CountingHTTPConnectionPool', (HTTPConnectionPool,), {
+                'ConnectionCls': type('CountingHTTPConnection', (_CountingConnection, HTTPConnection), attrs)}),
+            'https': type('CountingHTTPSConnectionPool', (HTTPSConnectionPool,), {
+                'ConnectionCls': type('CountingHTTPSConnection', (_CountingConnection, HTTPSConnection), attrs)}),
+        }
+
+    def __setstate__(self, state):
+        # The counters and TLS sessions aren't pickled
+        self.stats = ConnectionStats()
+        self._tls_contexts = dict()
+        self._tls_contexts_lock = threading.Lock()
+        super().__setstate__(state)
+
+    # Called by requests>=2.32 for the pool of every request
+    def build_connection_pool_key_attributes(self, request, verify, cert=None):
+        host_params, pool_kwargs = super().build_connection_pool_key_attributes(request, verify, cert)
+
+        if self.tls_session_reuse and host_params['scheme'] == 'https':
+            # urllib3 loads the CA certs into the context, so connections
+            # with different TLS settings can't share one
+            key = (verify, cert if cert is None or isinstance(cert, str) else tuple(cert))
+            with self._tls_contexts_lock:
+                context = self._tls_contexts.get(key)
+                if context is None:
+                    context = self._tls_contexts[key] = TLSSessionContext()
+            pool_kwargs['ssl_context'] = context
+
+        return host_params, pool_kwargs
+
+    def send(self, request, stream=False, timeout=None, **kwargs):
+        if timeout is None and (self.connect_timeout or self.read_timeout):
+            timeout = (self.connect_timeout, self.read_timeout)
+
+        self.stats.request()
+
+        return super().send(request, stream=stream, timeout=timeout, **kwargs)
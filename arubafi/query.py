@@ -0,0 +1,176 @@
+from . import endpoints
+from . import filters
+from .hierarchy import NodeTree
+from .snapshot import SnapshotReader
+
+
+class SnapshotQuery:
+    """Queries the objects of a snapshot with the filters, sort, limit and
+    offset of the MM API, without any requests.
+
+    The objects of every type are indexed on their `profile-name` and on
+    the attribute that names them, ex. `dstname` for `netdst`, so `$eq`
+    conditions on them only look at the matching objects. Other qualified
+    keys can be indexed with `index_keys`.
+
+    Params
+    ------
+    snapshot: `str` or `SnapshotReader`
+        The snapshot file, or its reader.
+
+    index_keys: `list`, optional, default: None
+        More qualified keys to index, ex. ['role.role__acl.pname'].
+
+    Examples
+    --------
+    >>> snapshot = SnapshotQuery('mm-2024-01-01.jsonl.gz', index_keys=['acl_sess.acl_sess__v4policy.dst-alias'])
+    >>> snapshot.query('acl_sess', filter=[{"acl_sess.acl_sess__v4policy.dst-alias": {"$eq": ["dns"]}}])
+    [('/md/EU', {'accname': 'guest-acl', ...})]
+    >>> snapshot.query('netdst', config_path='/md/EU/**', sort='+netdst.dstname', limit=10)
+    """
+
+    def __init__(self, snapshot, index_keys=None):
+        if not isinstance(snapshot, SnapshotReader):
+            snapshot = SnapshotReader(snapshot)
+
+        self.snapshot = snapshot
+        self.tree = NodeTree(snapshot.hierarchy)
+        # Object name to the list of (config_path, object), in snapshot order
+        self.objects = dict()
+        # Object name to config path to the positions of its objects
+        self._paths = dict()
+        # (object name, keys) to value text to the positions of the objects
+        self._indexes = dict()
+
+        for config_path, name, obj in snapshot:
+            objs = self.objects.setdefault(name, list())
+            self._paths.setdefault(name, dict()).setdefault(config_path, list()).append(len(objs))
+            objs.append((config_path, obj))
+
+        for name in self.objects:
+            self.index(f'{name}.profile-name')
+            key = endpoints.object_key(name)
+            if key is not None:
+                self.index(f'{name}.{key}')
+
+        for qualified_key in index_keys or list():
+            self.index(qualified_key)
+
+    @property
+    def errors(self):
+        '''The (config_path, object name, error) of the requests that failed
+        when the snapshot was taken
+        '''
+        return self.snapshot.errors
+
+    def index(self, qualified_key):
+        '''Indexes the objects on the values at the `qualified_key`, so `$eq`
+        conditions on it only look at the matching objects.
+        '''
+        name, keys = filters.split_key(qualified_key)
+        if (name, keys) in self._indexes:
+            return
+
+        index = dict()
+        for position, (config_path, obj) in enumerate(self.objects.get(name, list())):
+            for value_text in {filters.text(value) for value in filters.values_at(obj, keys)}:
+                index.setdefault(value_text, list()).append(position)
+
+        self._indexes[(name, keys)] = index
+
+    def _candidates(self, name, conditions, config_path):
+        '''Returns the sorted positions of the objects that can match, worked
+        out from the indexes and the config paths, or `None` for all of them.
+        '''
+        candidates = None
+
+        if config_path is not None:
+            paths = self._paths.get(name, dict())
+            candidates = set()
+            for path in self.tree.glob(config_path):
+                candidates.update(paths.get(path, ()))
+
+        for condition in conditions:
+            index = self._indexes.get((condition.name, condition.keys))
+            if index is None or condition.oper != '$eq':
+                continue
+
+            positions = set()
+            for value in condition.values:
+                positions.update(index.get(filters.text(value), ()))
+
+            candidates = positions if candidates is None else candidates & positions
+
+        return sorted(candidates) if candidates is not None else None
+
+    def query(self, name, filter=None, config_path=None, sort=None, limit=None, offset=None):
+        '''Returns the `name` objects matching the filter.
+
+        Args:
+        -----
+        name: `str`
+            The object name, ex. 'netdst'.
+        filter: `str` or `list`, optional
+            A filter like `_params()` takes, ex.
+            [{"netdst.dstname": {"$in": ["dns"]}}].
+        config_path: `str`, optional
+            Only the objects at the matching config paths. Wildcards are
+            matched like `NodeTree.glob()`, ex. '/md/EU/**'.
+        sort: `str`, optional
+            '+' or '-' and the qualified key to sort on, ex. '-netdst.dstname'.
+            Objects without the key are last.
+        limit: `int`, optional
+            The maximum number of objects returned.
+        offset: `int`, optional
+            The number of matching objects skipped.
+
+        Returns:
+        --------
+        The list of matching (config_path, object) tuples, in snapshot order
+        unless sorted.
+
+        Raises:
+        -------
+        ValueError if the filter or sort isn't valid or is on the keys of
+        another object.
+        '''
+        conditions = filters.parse(filter)
+
+        for condition in conditions:
+            if condition.name != name:
+                raise ValueError(f"Can't filter '{name}' objects on '{condition.qualified_key}'")
+
+        objs = self.objects.get(name, list())
+        candidates = self._candidates(name, conditions, config_path)
+        if candidates is not None:
+            objs = [objs[position] for position in candidates]
+
+        results = [(path, obj) for path, obj in objs if filters.matches(obj, conditions)]
+
+        if sort:
+            sort_name, keys, descending = filters.sort_key(sort)
+            if sort_name != name:
+                raise ValueError(f"Can't sort '{name}' objects on '{sort}'")
+
+            keyed = list()
+            missing = list()
+            for result in results:
+                value = filters.sort_value(result[1], keys)
+                if value is None:
+                    missing.append(result)
+                else:
+                    keyed.append((value, result))
+
+            # The sort is stable, so objects with the same value keep their order
+            keyed.sort(key=lambda item: item[0], reverse=descending)
+            results = [result for _, result in keyed] + missing
+
+        start = offset or 0
+        end = start + limit if limit is not None else None
+
+        return results[start:end]
+
+    def count(self, name, filter=None, config_path=None):
+        '''Returns the number of `name` objects matching the filter
+        '''
+        return len(self.query(name, filter=filter, config_path=config_path))
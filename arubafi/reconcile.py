@@ -0,0 +1,120 @@
+# Keys the MM adds to objects in GET responses, which are never POSTed
+IGNORED_KEYS = ('_flags', '_meta')
+
+# Lists whose order the MM acts on, so a reordered list has to be POSTed
+ORDERED_LISTS = ('acl_sess__v4policy', 'acl_sess__v6policy')
+
+
+def normalise(obj):
+    '''Returns a copy of `obj` without the MM's `_flags` and `_meta` keys,
+    at any depth.
+    '''
+    if isinstance(obj, dict):
+        return {key: normalise(value) for key, value in obj.items() if key not in IGNORED_KEYS}
+    if isinstance(obj, list):
+        return [normalise(value) for value in obj]
+    return obj
+
+
+def contains(current, desired, ordered=False):
+    '''Checks whether the `current` object already has everything the
+    `desired` one has.
+
+    The MM returns objects with the default values of everything that was
+    not set, so only the attributes in `desired` are compared. Lists must
+    have the same length, with each desired item contained in a different
+    current item. The MM doesn't keep the order most lists were POSTed in,
+    so it's ignored, except for the lists in `ORDERED_LISTS`, where each
+    desired item must be contained in the current item at the same
+    position.
+
+    Args:
+    -----
+    current: dict
+        The normalised object as returned by the MM.
+    desired: dict
+        The normalised object as it would be POSTed.
+    ordered: bool, optional, default: False
+        Compare the items of `desired` lists in order.
+
+    Returns:
+    --------
+    True if POSTing `desired` would not change `current`.
+    '''
+    if isinstance(desired, dict):
+        return isinstance(current, dict) and all(
+            key in current and contains(current[key], value, key in ORDERED_LISTS)
+            for key, value in desired.items())
+
+    if isinstance(desired, list):
+        if not isinstance(current, list) or len(current) != len(desired):
+            return False
+        if ordered:
+            return all(contains(cur, des) for cur, des in zip(current, desired))
+        return _match_unordered(current, desired)
+
+    return current == desired
+
+
+def _match_unordered(current, desired):
+    '''Checks whether every desired item is contained in a different
+    current item, whatever their order.
+    '''
+    # Current item index to the index of the desired item matched with it
+    matched = dict()
+
+    def match(des_index, seen):
+        # Augmenting path search, so an earlier match is moved to another
+        # current item if that frees one up for this desired item
+        for cur_index, cur in enumerate(current):
+            if cur_index in seen or not contains(cur, desired[des_index]):
+                continue
+            seen.add(cur_index)
+            if cur_index not in matched or match(matched[cur_index], seen):
+                matched[cur_index] = des_index
+                return True
+        return False
+
+    return all(match(des_index, set()) for des_index in range(len(desired)))
+
+
+def diff(desired, current, key='profile-name'):
+    '''Works out which of the `desired` objects have to be POSTed.
+
+    Objects are matched on their `key` attribute.
+
+    Args:
+    -----
+    desired: `list`
+        The objects as they should be.
+    current: `list`
+        The objects of the same type as returned by the MM.
+    key: `str`, optional, default: 'profile-name'
+        The attribute naming the objects.
+
+    Returns:
+    --------
+    A dict with the 'create', 'update' and 'unchanged' lists of desired
+    objects, in the order they were passed in.
+
+    Raises:
+    -------
+    ValueError if a desired object doesn't have the `key` attribute.
+    '''
+    current = {obj.get(key): normalise(obj) for obj in current if isinstance(obj, dict)}
+
+    plan = {'create': list(), 'update': list(), 'unchanged': list()}
+
+    for obj in desired:
+        if key not in obj:
+            raise ValueError(f"Desired object is missing its '{key}' attribute: {obj}")
+
+        existing = current.get(obj[key])
+        if existing is None:
+            plan['create'].append(obj)
+        elif contains(existing, normalise(obj)):
+            plan['unchanged'].append(obj)
+        else:
+            plan['update'].append(obj)
+
+    return plan
@@ -0,0 +1,319 @@
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import requests
+from logzero import logger
+from urllib3.exceptions import NewConnectionError
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """Raised instead of sending a request to a host whose circuit breaker
+    is open.
+
+    It's a `requests.ConnectionError`, so it's handled like the failed
+    requests that opened the circuit.
+    """
+
+
+class RetryPolicy:
+    """When and after how long failed requests are retried.
+
+    Only idempotent methods are retried after a timeout, a dropped
+    connection or a retryable status, as the MM may have already acted on
+    the request. Requests that failed to connect were never sent, so they
+    are retried whatever their method. Retries wait an exponentially
+    growing, jittered backoff, or for as long as the response's
+    `Retry-After` says.
+
+    Params
+    ------
+    retries: `int`, optional, default: 3
+        The maximum number of times a request is retried.
+
+    backoff: `float`, optional, default: 0.5
+        Seconds waited before the first retry. Doubled for every retry after
+        it.
+
+    max_backoff: `float`, optional, default: 30
+        The longest wait before a retry. Requests with a longer `Retry-After`
+        are not retried.
+
+    jitter: bool, optional, default: True
+        Wait a random time between 0 and the backoff, so many clients
+        failing at once don't retry at once.
+
+    methods: `tuple`, optional, default: ('GET',)
+        The idempotent methods, retried on any retryable failure.
+
+    statuses: `tuple`, optional, default: (429, 502, 503, 504)
+        The HTTP statuses that are retried.
+
+    Examples
+    --------
+    >>> mmc = MMClient(mm_host="arubamm.domain.com", retry_policy=RetryPolicy(retries=5, backoff=1))
+    """
+
+    def __init__(self, retries=3, backoff=0.5, max_backoff=30, jitter=True, methods=('GET',), statuses=(429, 502, 503, 504)):
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.methods = tuple(method.upper() for method in methods)
+        self.statuses = tuple(statuses)
+
+    def should_retry(self, method, attempt, exc=None, response=None):
+        '''Checks whether a failed request should be retried.
+
+        Args:
+        -----
+        method: `str`
+            The HTTP method of the request.
+        attempt: `int`
+            The number of retries made so far.
+        exc: `requests.RequestException`, optional
+            The exception the request failed with.
+        response: `requests.Response`, optional
+            The response, if there was one.
+
+        Returns:
+        --------
+        True if the request should be retried.
+        '''
+        if attempt >= self.retries or isinstance(exc, CircuitOpenError):
+            return False
+
+        if exc is not None and connect_failed(exc):
+            return True
+
+        if method.upper() not in self.methods:
+            return False
+
+        if response is None and exc is not None:
+            response = exc.response
+
+        if response is not None:
+            if response.status_code not in self.statuses:
+                return False
+            retry_after = self.retry_after(response)
+            return retry_after is None or retry_after <= self.max_backoff
+
+        return isinstance(exc, (requests.ConnectionError, requests.Timeout))
+
+    def delay(self, attempt, response=None):
+        '''Returns the number of seconds to wait before the retry
+        '''
+        retry_after = self.retry_after(response) if response is not None else None
+        if retry_after is not None:
+            return retry_after
+
+        backoff = min(self.max_backoff, self.backoff * 2 ** attempt)
+
+        return random.uniform(0, backoff) if self.jitter else backoff
+
+    @staticmethod
+    def retry_after(response):
+        '''Returns the seconds of the response's `Retry-After` header, which
+        is either a number of seconds or a date, or `None` if there's none.
+        '''
+        value = response.headers.get('Retry-After')
+        if not value:
+            return None
+
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+
+        try:
+            return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+        except (TypeError, ValueError):
+            return None
+
+
+class CircuitBreaker:
+    """Fails requests to an unhealthy host fast instead of letting them pile
+    up and time out.
+
+    After `failure_threshold` failures in a row the circuit opens and every
+    request raises `CircuitOpenError` straight away. Once `reset_timeout`
+    seconds have passed one trial request is let through. If it succeeds the
+    circuit closes, otherwise it stays open for another `reset_timeout`.
+    Only connection failures, timeouts and 5xx statuses count as failures.
+
+    Params
+    ------
+    failure_threshold: `int`, optional, default: 5
+        Failures in a row that open the circuit.
+
+    reset_timeout: `float`, optional, default: 30
+        Seconds the circuit stays open before a trial request.
+    """
+
+    # Host to its shared `CircuitBreaker`
+    _registry = dict()
+    _registry_lock = threading.Lock()
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self._opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_host(cls, host, failure_threshold=5, reset_timeout=30):
+        '''Returns the circuit breaker shared by all clients of the `host`,
+        creating it with the given settings on first use.
+        '''
+        with cls._registry_lock:
+            breaker = cls._registry.get(host)
+            if breaker is None:
+                breaker = cls._registry[host] = cls(failure_threshold, reset_timeout)
+
+        return breaker
+
+    @property
+    def state(self):
+        '''Either 'closed', 'open' or 'half-open'
+        '''
+        with self._lock:
+            if self._opened_at is None:
+                return 'closed'
+            if self._trial or time.monotonic() - self._opened_at >= self.reset_timeout:
+                return 'half-open'
+            return 'open'
+
+    def before_request(self):
+        '''Raises `CircuitOpenError` if the request can't be sent.
+
+        Returns:
+        --------
+        True if the request is the trial, which must be followed by
+        `end_trial()` once it's done.
+        '''
+        with self._lock:
+            if self._opened_at is None:
+                return False
+
+            if self._trial or time.monotonic() - self._opened_at < self.reset_timeout:
+                raise CircuitOpenError(f"Circuit open after {self.failures} failed requests in a row")
+
+            self._trial = True
+            return True
+
+    def end_trial(self):
+        '''Lets another trial request through if the trial ended without
+        its success or failure being recorded, ex. on an unexpected error
+        '''
+        with self._lock:
+            self._trial = False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self._opened_at = None
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+
+            if self._trial or self.failures >= self.failure_threshold:
+                if self._opened_at is None or self._trial:
+                    logger.error("Too many failed requests, opening the circuit for %ss", self.reset_timeout)
+                self._opened_at = time.monotonic()
+                self._trial = False
+
+
+def connect_failed(exc):
+    '''Checks whether the request failed before it was sent
+    '''
+    if isinstance(exc, requests.ConnectTimeout):
+        return True
+
+    reason = getattr(exc.args[0], 'reason', None) if exc.args else None
+
+    return isinstance(exc, requests.ConnectionError) and isinstance(reason, NewConnectionError)
+
+
+def is_failure(exc=None, response=None):
+    '''Checks whether a request failed in a way that says the host is
+    unhealthy, so a connection failure, a timeout or a 5xx status.
+    '''
+    if response is None and exc is not None:
+        response = exc.response
+
+    if response is not None:
+        return response.status_code >= 500
+
+    return isinstance(exc, (requests.ConnectionError, requests.Timeout))
+
+
+def send(method, request, policy=None, breaker=None, on_retry=None):
+    '''Sends a request with retries and the circuit breaker.
+
+    Args:
+    -----
+    method: `str`
+        The HTTP method of the request.
+    request: callable
+        Sends the request once and returns the response.
+    policy: `RetryPolicy`, optional
+        When to retry. Not retried if `None`.
+    breaker: `CircuitBreaker`, optional
+        The circuit breaker of the host.
+    on_retry: callable, optional
+        Called with the number of the retry and the seconds it waits before
+        every retry.
+
+    Returns:
+    --------
+    The response of the last attempt.
+
+    Raises:
+    -------
+    The exception of the last attempt or `CircuitOpenError`.
+    '''
+    attempt = 0
+
+    while True:
+        trial = breaker is not None and breaker.before_request()
+
+        try:
+            response = request()
+        except requests.RequestException as exc:
+            if breaker is not None:
+                if is_failure(exc):
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+
+            if policy is None or not policy.should_retry(method, attempt, exc=exc):
+                raise
+
+            delay = policy.delay(attempt, exc.response)
+        else:
+            if breaker is not None:
+                if is_failure(response=response):
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+
+            if policy is None or not policy.should_retry(method, attempt, response=response):
+                return response
+
+            delay = policy.delay(attempt, response)
+            response.close()
+        finally:
+            if trial:
+                breaker.end_trial()
+
+        attempt += 1
+        logger.info("Retrying %s request in %.2fs, retry %s", method.upper(), delay, attempt)
+        if on_retry is not None:
+            on_retry(attempt, delay)
+        time.sleep(delay)
@@ -0,0 +1,52 @@
+def to_columns(jresp):
+    '''Turns the tables of a show command response into columns.
+
+    The MM returns every table of a show command output, ex. 'AP Database'
+    for `show ap database`, as a list of row dicts, repeating every column
+    name in every row. This turns each table into a dict of column name to
+    the list of that column's values, in the order of the response's
+    `_meta` column list when there is one, which lists the columns of all
+    the tables. Everything else in the response, like the `_data` text
+    lines, is returned as is.
+
+    Args:
+    -----
+    jresp: dict
+        The JSON response of a `configuration/showcommand` GET.
+
+    Returns:
+    --------
+    A new dict with the tables in columns.
+
+    Examples:
+    ---------
+    >>> to_columns({
+            'AP Database': [
+                {'Name': 'ap01', 'Group': 'default'},
+                {'Name': 'ap02', 'Group': 'lab'}],
+            '_meta': ['Name', 'Group']})
+    {'AP Database': {'Name': ['ap01', 'ap02'], 'Group': ['default', 'lab']}, '_meta': ['Name', 'Group']}
+    '''
+    meta = jresp.get('_meta')
+    meta = [col for col in meta if isinstance(col, str)] if isinstance(meta, list) else []
+
+    columnar = dict()
+
+    for key, value in jresp.items():
+        if key.startswith('_') or not isinstance(value, list) or not all(isinstance(row, dict) for row in value):
+            columnar[key] = value
+            continue
+
+        found = dict()
+        for row in value:
+            found.update(dict.fromkeys(row))
+
+        # Column order from `_meta` first, then any columns it doesn't list.
+        # `_meta` lists the columns of every table, so only the ones found in
+        # this table's rows are used
+        columns = dict.fromkeys(col for col in meta if col in found)
+        columns.update(found)
+
+        columnar[key] = {col: [row.get(col) for row in value] for col in columns}
+
+    return columnar
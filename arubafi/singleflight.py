@@ -0,0 +1,89 @@
+import copy
+import threading
+
+
+class _Call:
+    """A call in flight and, once it's done, its result or exception"""
+    __slots__ = ('done', 'result', 'exc', 'waiters')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.waiters = 0
+        self.result = None
+        self.exc = None
+
+
+class SingleFlight:
+    """Shares one in-flight call between concurrent callers making the same
+    call.
+
+    The first caller with a key makes the call. Callers with the same key
+    that come in before it returns wait for it and get its result, or its
+    exception raised, instead of making the call themselves. Nothing is
+    kept once the call returns, so later callers make a new call.
+
+    Params
+    ------
+    copy: bool, optional, default: True
+        Give waiting callers a deep copy of the result, so callers are free
+        to modify what they get back.
+
+    Examples
+    --------
+    >>> flights = SingleFlight()
+    >>> flights.do(('GET', url), session.get, url)
+    """
+
+    def __init__(self, copy=True):
+        self.copy = copy
+        # Number of callers that got the result of another caller's call
+        self.shared = 0
+        self._lock = threading.Lock()
+        self._calls = dict()
+
+    def do(self, key, func, *args, **kwargs):
+        '''Calls `func(*args, **kwargs)`, unless a call with the same `key` is
+        already in flight, in which case its result is returned.
+
+        Args:
+        -----
+        key: hashable
+            Identifies calls that return the same result.
+        func: callable
+            The call to make.
+
+        Returns:
+        --------
+        What `func` returned.
+        '''
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                call.waiters += 1
+                self.shared += 1
+
+        if not leader:
+            call.done.wait()
+            if call.exc is not None:
+                raise call.exc
+            return copy.deepcopy(call.result) if self.copy else call.result
+
+        try:
+            call.result = func(*args, **kwargs)
+        except BaseException as exc:
+            call.exc = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                waiters = call.waiters
+            call.done.set()
+
+        # The waiters copy the result, so it must not be modified by anyone
+        if self.copy and waiters:
+            return copy.deepcopy(call.result)
+
+        return call.result
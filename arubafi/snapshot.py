@@ -0,0 +1,346 @@
+import gzip
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import requests
+from logzero import logger
+
+from . import endpoints
+from . import merkle
+from .codec import get_codec
+from .effective import is_local
+from .hierarchy import NodeTree
+
+# Written in the header of every snapshot, so other files can be told apart
+FORMAT = 'arubafi-snapshot'
+VERSION = 1
+
+
+def hashes_path(path):
+    '''Returns the path of the hashes file of the snapshot at `path`
+    '''
+    return f'{path}.hashes.json'
+
+
+class SnapshotWriter:
+    """Exports the configuration objects of every node below a config path
+    to a gzipped JSON lines file.
+
+    The objects are GETed with one streamed request per node and object
+    type, with at most `max_workers` requests in flight, and every object is
+    written as soon as it's decoded. Only one object per request is kept in
+    memory, whatever the size of the config. Objects are only kept at the
+    node they are configured at, not at every node inheriting them.
+
+    The file is written next to `path` and only renamed to it once the
+    export is complete, so a failed export never leaves a partial snapshot
+    behind.
+
+    The first line of the file is the header, with the node hierarchy. Every
+    line after it is either an object, {"config_path": ..., "name": ...,
+    "object": {...}}, or a failed request, {"config_path": ..., "name": ...,
+    "error": "..."}. Lines of different requests are interleaved.
+
+    The hashes of the objects, object types and nodes are written to the
+    `hashes_path()` of the snapshot, for `drift()`.
+
+    Use it with `MMClient.snapshot()`.
+
+    Params
+    ------
+    client: `MMClient`
+        The client to GET the objects with.
+
+    path: `str`
+        The snapshot file, ex. 'mm-2024-01-01.jsonl.gz'.
+
+    names: `list`, optional, default: None
+        The object names. Defaults to all registered configuration objects.
+
+    root: `str`, optional, default: '/'
+        The config path to export the config below.
+
+    include_devices: bool, optional, default: True
+        Also export the objects configured at the devices.
+
+    max_workers: `int`, optional, default: 8
+        The maximum number of requests in flight.
+
+    compresslevel: `int`, optional, default: 6
+        The gzip compression level, from 1 (fastest) to 9 (smallest).
+    """
+
+    def __init__(self, client, path, names=None, root='/', include_devices=True, max_workers=8, compresslevel=6):
+        self.client = client
+        self.path = path
+        self.names = list(names) if names is not None else endpoints.config_objects()
+        self.root = root
+        self.include_devices = include_devices
+        self.max_workers = max_workers
+        self.compresslevel = compresslevel
+        self.codec = client.codec
+        self._file = None
+        self._lock = threading.Lock()
+
+    def _write(self, record):
+        line = self.codec.dumpb(record) + b'\n'
+        with self._lock:
+            self._file.write(line)
+
+    def _export(self, config_path, name):
+        '''Streams the `name` objects at the `config_path` into the file.
+
+        Returns:
+        --------
+        The number of objects written, the dict of their ids to their hashes
+        and the error, or `None` if no error.
+        '''
+        count = 0
+        # Object id to object hash
+        hashes = dict()
+
+        try:
+            objs, err = self.client.resource('GET', f'configuration/object/{name}', stream=True, config_path=config_path)
+            if err is None:
+                for obj in objs:
+                    if isinstance(obj, dict) and is_local(obj):
+                        self._write({'config_path': config_path, 'name': name, 'object': obj})
+                        obj_hash = merkle.object_hash(obj)
+                        hashes[merkle.object_id(name, obj, obj_hash)] = obj_hash
+                        count += 1
+        except (requests.RequestException, ValueError) as exc:
+            err = exc
+
+        if err is not None:
+            logger.error("Could not export the %s objects at %s: %s", name, config_path, err)
+            self._write({'config_path': config_path, 'name': name, 'error': str(err)})
+
+        return count, hashes, err
+
+    def export(self):
+        '''Exports the snapshot.
+
+        Returns:
+        --------
+        The summary dict with the number of `requests` and `objects`, the
+        `errors` list of (config_path, object name, error) tuples and the
+        `seconds` the export took.
+        '''
+        start = time.perf_counter()
+        tree = self.client.hierarchy(refresh=True)
+        paths = tree.subtree(self.root, include_devices=self.include_devices)
+        fetches = [(path, name) for path in paths for name in self.names]
+
+        header = {
+            'format': FORMAT,
+            'version': VERSION,
+            'mm_host': self.client.mm_host,
+            'created': datetime.now(timezone.utc).isoformat(),
+            'root': tree.normalise(self.root),
+            'names': self.names,
+            'include_devices': self.include_devices,
+            'hierarchy': tree.hierarchy,
+        }
+        summary = {'requests': len(fetches), 'objects': 0, 'errors': list(), 'seconds': 0.0}
+        objects = dict()
+
+        tmp_path = f'{self.path}.tmp'
+        try:
+            with gzip.open(tmp_path, 'wb', compresslevel=self.compresslevel) as self._file:
+                self._write(header)
+
+                with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                    results = {fetch_args: executor.submit(self._export, *fetch_args) for fetch_args in fetches}
+
+                for (path, name), future in results.items():
+                    count, hashes, err = future.result()
+                    summary['objects'] += count
+                    if hashes:
+                        objects.setdefault(path, dict())[name] = hashes
+                    if err is not None:
+                        summary['errors'].append((path, name, str(err)))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        finally:
+            self._file = None
+
+        # The hashes of an earlier snapshot at the path must not be used
+        if os.path.exists(hashes_path(self.path)):
+            os.remove(hashes_path(self.path))
+        os.replace(tmp_path, self.path)
+
+        hashes = merkle.SnapshotHashes.build(header['root'], paths, objects, [error[:2] for error in summary['errors']])
+        write_hashes(self.path, header, hashes)
+
+        summary['seconds'] = time.perf_counter() - start
+        logger.info("Exported %s objects from %s requests to %s in %.1fs", summary['objects'], summary['requests'], self.path, summary['seconds'])
+
+        return summary
+
+
+class SnapshotReader:
+    """Reads a snapshot written by `SnapshotWriter`.
+
+    The objects are read one line at a time, so a snapshot of any size can be
+    iterated over.
+
+    Params
+    ------
+    path: `str`
+        The snapshot file.
+
+    codec: `str` or codec instance, optional, default: None
+        The JSON codec, see `arubafi.codec.get_codec`.
+
+    Examples
+    --------
+    >>> snapshot = SnapshotReader('mm-2024-01-01.jsonl.gz')
+    >>> snapshot.header['created']
+    '2024-01-01T00:00:00.000000+00:00'
+    >>> for config_path, name, obj in snapshot:
+            print(config_path, name, obj[endpoints.object_key(name)])
+    """
+
+    def __init__(self, path, codec=None):
+        self.path = path
+        self.codec = get_codec(codec)
+        # (config_path, object name, error) of the failed requests, filled
+        # in while iterating
+        self.errors = list()
+
+        with gzip.open(path, 'rb') as snapshot:
+            self.header = self.codec.loads(snapshot.readline())
+
+        if self.header.get('format') != FORMAT:
+            raise ValueError(f"{path} is not an arubafi snapshot")
+        if self.header.get('version') != VERSION:
+            raise ValueError(f"{path} is a version {self.header.get('version')} snapshot, only version {VERSION} is supported")
+
+    @property
+    def hierarchy(self):
+        '''The node hierarchy dict, as returned by the MM
+        '''
+        return self.header['hierarchy']
+
+    def __iter__(self):
+        '''Yields the (config_path, object name, object) of every object
+        '''
+        self.errors = list()
+
+        with gzip.open(self.path, 'rb') as snapshot:
+            snapshot.readline()
+
+            for line in snapshot:
+                record = self.codec.loads(line)
+
+                if 'error' in record:
+                    self.errors.append((record['config_path'], record['name'], record['error']))
+                    continue
+
+                yield record['config_path'], record['name'], record['object']
+
+    def load(self):
+        '''Returns all objects as a dict of config path to a dict of object
+        name to the list of objects.
+        '''
+        objects = dict()
+
+        for config_path, name, obj in self:
+            objects.setdefault(config_path, dict()).setdefault(name, list()).append(obj)
+
+        return objects
+
+    def hashes(self):
+        '''Returns the `SnapshotHashes` of the snapshot.
+
+        They are read from the `hashes_path()` of the snapshot, or worked
+        out from the snapshot and written there if it's missing or of
+        another snapshot.
+        '''
+        try:
+            with open(hashes_path(self.path), 'rb') as hashes_file:
+                hashes = self.codec.loads(hashes_file.read())
+            if hashes.get('created') == self.header.get('created'):
+                return merkle.SnapshotHashes.from_dict(hashes)
+        except (OSError, ValueError, KeyError):
+            pass
+
+        objects = dict()
+        for config_path, name, obj in self:
+            obj_hash = merkle.object_hash(obj)
+            objects.setdefault(config_path, dict()).setdefault(name, dict())[merkle.object_id(name, obj, obj_hash)] = obj_hash
+
+        paths = NodeTree(self.hierarchy).subtree(self.header['root'], include_devices=self.header.get('include_devices', True))
+        hashes = merkle.SnapshotHashes.build(self.header['root'], paths, objects, [error[:2] for error in self.errors])
+
+        try:
+            write_hashes(self.path, self.header, hashes)
+        except OSError as exc:
+            logger.warning("Could not write the hashes of %s: %s", self.path, exc)
+
+        return hashes
+
+
+def write_hashes(path, header, hashes):
+    '''Writes the `hashes` of the snapshot at `path` to its `hashes_path()`
+    '''
+    tmp_path = f'{hashes_path(path)}.tmp'
+
+    with open(tmp_path, 'w') as hashes_file:
+        json.dump({'created': header.get('created'), **hashes.to_dict()}, hashes_file)
+
+    os.replace(tmp_path, hashes_path(path))
+
+
+def drift(old, new, objects=False):
+    '''Finds the objects that differ between two snapshots.
+
+    Only the nodes and object types whose hashes differ are compared, see
+    `arubafi.merkle.drift()`.
+
+    Args:
+    -----
+    old: `str` or `SnapshotReader`
+        The earlier snapshot.
+    new: `str` or `SnapshotReader`
+        The later snapshot.
+    objects: bool, optional, default: False
+        Add the `old` and `new` object to every change, which reads both
+        snapshots through once.
+
+    Returns:
+    --------
+    The list of changes, each a dict with the `config_path`, object `name`,
+    object `id` and the `change`: 'added', 'removed', 'changed' or
+    'unknown' for object types that failed to be fetched.
+
+    Examples:
+    ---------
+    >>> drift('mm-2024-01-01.jsonl.gz', 'mm-2024-01-02.jsonl.gz')
+    [{'config_path': '/md/EU', 'name': 'netdst', 'id': 'dns', 'change': 'changed'}]
+    '''
+    old = old if isinstance(old, SnapshotReader) else SnapshotReader(old)
+    new = new if isinstance(new, SnapshotReader) else SnapshotReader(new)
+
+    changes = merkle.drift(old.hashes(), new.hashes())
+
+    if objects and changes:
+        changed = {(change['config_path'], change['name'], change['id']): change for change in changes}
+        changed_types = {key[:2] for key in changed}
+
+        for side, snapshot in (('old', old), ('new', new)):
+            for change in changes:
+                change[side] = None
+            for config_path, name, obj in snapshot:
+                if (config_path, name) in changed_types:
+                    change = changed.get((config_path, name, merkle.object_id(name, obj)))
+                    if change is not None:
+                        change[side] = obj
+
+    return changes
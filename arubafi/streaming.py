@@ -0,0 +1,141 @@
+import codecs
+import json
+
+# JSON whitespace characters
+_WS = ' \t\n\r'
+
+
+class _Reader:
+    """Buffered reader over an iterable of JSON text chunks.
+
+    Only the text from the current position onwards is kept, so memory is
+    bounded by the size of the largest single value read.
+    """
+
+    def __init__(self, chunks, encoding='utf-8'):
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder(encoding)()
+        self._json = json.JSONDecoder()
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self, at_least=1):
+        '''Reads chunks until at least `at_least` more characters are
+        buffered. Returns `False` if the end of input was reached first.
+        '''
+        # Drop what has already been read
+        if self.pos:
+            self.buf = self.buf[self.pos:]
+            self.pos = 0
+
+        target = len(self.buf) + at_least
+        while len(self.buf) < target:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                self.buf += self._decoder.decode(b'', final=True)
+                self.eof = True
+                return len(self.buf) >= target
+            self.buf += self._decoder.decode(chunk) if isinstance(chunk, bytes) else chunk
+
+        return True
+
+    def peek(self):
+        '''Returns the next non whitespace character without consuming it, or
+        an empty string at the end of input.
+        '''
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WS:
+                self.pos += 1
+            if self.pos < len(self.buf) or not self._fill():
+                return self.buf[self.pos:self.pos + 1]
+
+    def expect(self, char):
+        found = self.peek()
+        if found != char:
+            raise json.JSONDecodeError(f"Expecting '{char}'", self.buf, self.pos)
+        self.pos += 1
+
+    def value(self):
+        '''Decodes and consumes the next JSON value.
+
+        The value must be followed by at least one character before the end
+        of input, so a number split between chunks is not decoded early.
+        '''
+        self.peek()
+        while True:
+            try:
+                value, end = self._json.raw_decode(self.buf, self.pos)
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+
+            # Double what is buffered so long values are not decoded over
+            # and over again
+            self._fill(at_least=max(len(self.buf) - self.pos, 1))
+
+
+def iter_json_array(chunks, path, encoding='utf-8'):
+    '''Incrementally decodes the elements of a JSON array nested in objects.
+
+    Only one element is decoded and kept in memory at a time, so it can be
+    used with responses of any size.
+
+    Args:
+    -----
+    chunks: iterable
+        The JSON document as `bytes` or `str` chunks, ex. the output of a
+        streamed requests response's `iter_content()`.
+
+    path: `tuple`
+        The object keys leading to the array, ex. ('_data', 'netdst').
+
+    encoding: `str`, optional, default: 'utf-8'
+        Encoding of `bytes` chunks.
+
+    Returns:
+    --------
+    A generator of the array elements. Nothing is yielded if the path is not
+    in the document.
+
+    Raises:
+    -------
+    json.JSONDecodeError if the document is not valid JSON.
+    '''
+    reader = _Reader(chunks, encoding)
+
+    # Walk down the objects to the array, skipping every other key's value
+    for key in path:
+        reader.expect('{')
+
+        while True:
+            if reader.peek() == '}':
+                return
+
+            if reader.value() == key:
+                reader.expect(':')
+                break
+
+            reader.expect(':')
+            reader.value()
+
+            if reader.peek() == ',':
+                reader.pos += 1
+
+    if reader.peek() != '[':
+        return
+    reader.pos += 1
+
+    if reader.peek() == ']':
+        return
+
+    while True:
+        yield reader.value()
+
+        separator = reader.peek()
+        if separator == ']':
+            return
+        reader.expect(',')
@@ -0,0 +1,2 @@
+from .amp_server import AMPServer, generate_inventory
+from .mm_server import MMServer
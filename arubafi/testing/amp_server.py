@@ -0,0 +1,370 @@
+import gzip
+import random
+import re
+import secrets
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+from xml.sax.saxutils import escape, quoteattr
+
+from logzero import logger
+
+# The session cookie AirWave sets on login
+COOKIE = 'Mercury::Handler::AuthCookieHandler_AMPAuth'
+
+_XML_HEADER = '<?xml version="1.0" encoding="utf-8" ?>\n'
+_MAC_RE = re.compile(r'^([0-9A-F]{2}:){5}[0-9A-F]{2}$')
+
+AP_MODELS = ('AP 305', 'AP 315', 'AP 505', 'AP 515', 'AP 535')
+SSIDS = ('corp', 'guest', 'iot')
+
+
+def _mac(prefix, number):
+    return f'{prefix}:{number >> 16 & 0xff:02X}:{number >> 8 & 0xff:02X}:{number & 0xff:02X}'
+
+
+def generate_inventory(aps=100, controllers=4, iap_vcs=1, controllerless=2, clients=200, domain='example.com', seed=0):
+    '''Generates an AirWave inventory.
+
+    Args:
+    -----
+    aps: `int`, optional, default: 100
+        The number of APs managed by the controllers.
+    controllers: `int`, optional, default: 4
+        The number of controllers.
+    iap_vcs: `int`, optional, default: 1
+        The number of Instant AP virtual controllers.
+    controllerless: `int`, optional, default: 2
+        The number of APs without a controller.
+    clients: `int`, optional, default: 200
+        The number of clients associated to the APs.
+    domain: `str`, optional, default: 'example.com'
+        The domain of the FQDNs.
+    seed: `int`, optional, default: 0
+        Seeds the randomness, so the same arguments generate the same
+        inventory.
+
+    Returns:
+    --------
+    A dict with the `devices`, a list of dicts of their `ap_list.xml`
+    elements, and the `clients`, a dict of client MAC to the dict of its
+    `client_detail.xml` elements.
+    '''
+    rand = random.Random(seed)
+    devices = list()
+
+    def add(**device):
+        number = len(devices) + 1
+        device = dict(
+            id=str(number),
+            lan_ip=f'10.{number >> 16 & 0xff}.{number >> 8 & 0xff}.{number & 0xff}',
+            lan_mac=_mac('20:4C:03', number),
+            serial_number=f'CN{number:08d}',
+            mfgr='Aruba',
+            firmware='8.10.0.6',
+            client_count='0',
+            **device)
+        devices.append(device)
+        return device
+
+    controller_ids = [
+        add(name=f'mc{n:02d}', fqdn=f'mc{n:02d}.{domain}', device_category='controller', model='7220', operating_mode='controller')['id']
+        for n in range(1, controllers + 1)]
+
+    for n in range(1, iap_vcs + 1):
+        add(name=f'iapvc{n:02d}', fqdn=f'iapvc{n:02d}.{domain}', device_category='controller', model='Instant Virtual Controller', operating_mode='controller')
+
+    managed = list()
+    for n in range(1, aps + 1):
+        managed.append(add(
+            name=f'ap{n:05d}', fqdn=f'ap{n:05d}.{domain}', device_category='thin_ap', model=rand.choice(AP_MODELS),
+            operating_mode='ap', is_remote_ap='true' if rand.random() < 0.05 else 'false',
+            controller_id=controller_ids[n % len(controller_ids)] if controller_ids else None))
+
+    for n in range(1, controllerless + 1):
+        add(name=f'sap{n:03d}', fqdn=f'sap{n:03d}.{domain}', device_category='thin_ap', model=rand.choice(AP_MODELS), operating_mode='ap', is_remote_ap='false')
+
+    client_db = dict()
+    for n in range(1, clients + 1 if managed else 1):
+        ap = rand.choice(managed)
+        ap['client_count'] = str(int(ap['client_count']) + 1)
+        client_db[_mac('F0:18:98', n)] = {
+            'assoc_stat': 'true',
+            'ap_id': ap['id'],
+            'ap_name': ap['name'],
+            'radio_mode': rand.choice(('a', 'g')),
+            'ssid': rand.choice(SSIDS),
+            'vlan': str(rand.choice((10, 20, 30))),
+        }
+
+    for device in devices:
+        if device.get('controller_id') is None:
+            device.pop('controller_id', None)
+
+    return {'devices': devices, 'clients': client_db}
+
+
+def ap_xml(device):
+    '''Returns the `<ap>` element of the device, as in `ap_list.xml`
+    '''
+    elements = ''.join(
+        f'<model id="{device["id"]}">{escape(value)}</model>' if key == 'model' else f'<{key}>{escape(value)}</{key}>'
+        for key, value in sorted(device.items()) if key != 'id')
+
+    return f'<ap id={quoteattr(device["id"])}>{elements}</ap>\n'
+
+
+def client_xml(mac, client):
+    '''Returns the `<client>` element of the client, as in
+    `client_detail.xml`
+    '''
+    return (
+        f'<client mac={quoteattr(mac)}>'
+        f'<ap id={quoteattr(client["ap_id"])}>{escape(client["ap_name"])}</ap>'
+        + ''.join(f'<{key}>{escape(client[key])}</{key}>' for key in ('assoc_stat', 'radio_mode', 'ssid', 'vlan'))
+        + '</client>')
+
+
+class _Handler(BaseHTTPRequestHandler):
+    '''Hands every request to the `AMPServer` of the HTTP server
+    '''
+    protocol_version = 'HTTP/1.1'
+    # The headers and body are written separately, which Nagle's algorithm
+    # would hold back for a delayed ACK on every keep-alive request
+    disable_nagle_algorithm = True
+    server_version = 'arubafi-amp-server'
+
+    def do_GET(self):
+        self.server.amp.handle(self, 'GET')
+
+    def do_POST(self):
+        self.server.amp.handle(self, 'POST')
+
+    def log_message(self, format, *args):
+        logger.debug("AMPServer: " + format, *args)
+
+
+class AMPServer:
+    """Local stand-in for AirWave, serving `/LOGIN`, `/ap_list.xml`, with or
+    without an `id`, and `/client_detail.xml?mac=` over plain HTTP from a
+    generated inventory.
+
+    The XML of the whole inventory is rendered once, and again only when
+    the inventory is replaced with `set_inventory()`, so large inventories
+    are served as fast as the client can read them.
+
+    Params
+    ------
+    host: `str`, optional, default: '127.0.0.1'
+        The address to listen on.
+
+    port: `int`, optional, default: 0
+        The port to listen on, any free port if 0.
+
+    username: `str`, optional, default: 'admin'
+        The username to log in with.
+
+    password: `str`, optional, default: 'admin'
+        The password to log in with.
+
+    inventory: dict, optional, default: None
+        The inventory, as returned by `generate_inventory()`. Generated with
+        the `inventory_args` if `None`.
+
+    latency: `float`, optional, default: 0.0
+        Seconds every response is held back for.
+
+    jitter: `float`, optional, default: 0.0
+        Up to this many seconds are randomly added to the `latency`.
+
+    gzip: bool, optional, default: False
+        Gzip the responses to requests that accept it.
+
+    chunked: bool, optional, default: False
+        Send the responses with chunked transfer encoding.
+
+    chunk_size: `int`, optional, default: 65536
+        The size of the chunks, in bytes.
+
+    seed: `int`, optional, default: None
+        Seeds the randomness of the jitter.
+
+    **inventory_args:
+        Passed to `generate_inventory()`, ex. `aps=10000`.
+
+    Examples
+    --------
+    >>> with AMPServer(aps=10000, gzip=True, chunked=True) as server:
+            aw = AirWave(server.url, 'admin', 'admin')
+            aw.comms()
+            len(aw.get_all_items_inventory())
+    10007
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, username='admin', password='admin', inventory=None, latency=0.0, jitter=0.0, gzip=False, chunked=False, chunk_size=65536, seed=None, **inventory_args):
+        self.host = host
+        self.username = username
+        self.password = password
+        self.latency = latency
+        self.jitter = jitter
+        self.gzip = gzip
+        self.chunked = chunked
+        self.chunk_size = chunk_size
+
+        # 'METHOD path' to the number of requests, ex. 'GET /ap_list.xml'
+        self.requests = Counter()
+        # The session cookies of the logged in clients
+        self.sessions = set()
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.set_inventory(inventory or generate_inventory(**inventory_args))
+
+        self._httpd = ThreadingHTTPServer((host, port), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.amp = self
+        self.port = self._httpd.server_address[1]
+        self._thread = None
+
+    @property
+    def url(self):
+        '''The `aw_url` to create an `AirWave` with
+        '''
+        return f'http://{self.host}:{self.port}'
+
+    def set_inventory(self, inventory):
+        '''Replaces the inventory and renders its XML
+        '''
+        ap_list = ''.join(ap_xml(device) for device in inventory['devices'])
+        ap_list = f'{_XML_HEADER}<amp:amp_ap_list version="1" xmlns:amp="http://www.airwave.com">\n{ap_list}</amp:amp_ap_list>\n'.encode('utf-8')
+
+        with self._lock:
+            self.inventory = inventory
+            self.devices = {device['id']: device for device in inventory['devices']}
+            self.clients = inventory['clients']
+            self._ap_list = ap_list
+            self._ap_list_gzip = None
+
+    def start(self):
+        '''Starts serving in a background thread.
+
+        Returns:
+        --------
+        The server.
+        '''
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._httpd.serve_forever, name=f'AMPServer:{self.port}', daemon=True)
+            self._thread.start()
+
+        return self
+
+    def stop(self):
+        '''Stops serving and closes the socket
+        '''
+        if self._thread is not None:
+            self._httpd.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def handle(self, handler, method):
+        '''Answers the request of the `handler`
+        '''
+        url = urlsplit(handler.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        body = handler.rfile.read(int(handler.headers.get('Content-Length') or 0))
+
+        with self._lock:
+            self.requests[f'{method} {url.path}'] += 1
+
+        delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0)
+        if delay > 0:
+            time.sleep(delay)
+
+        headers = dict()
+        if url.path == '/LOGIN' and method == 'POST':
+            status, content = self._login(body, headers)
+        elif not self._authenticated(handler.headers.get('Cookie', '')):
+            status, content = 401, b'Unauthorized'
+        elif url.path == '/ap_list.xml':
+            status, content = 200, self._ap_list_xml(query, 'gzip' in handler.headers.get('Accept-Encoding', ''), headers)
+        elif url.path == '/client_detail.xml':
+            status, content = 200, self._client_detail_xml(query)
+        else:
+            status, content = 404, b'Not Found'
+
+        if self.gzip and 'Content-Encoding' not in headers and 'gzip' in handler.headers.get('Accept-Encoding', '') and len(content) > 0:
+            content = gzip.compress(content, compresslevel=1)
+            headers['Content-Encoding'] = 'gzip'
+
+        handler.send_response(status)
+        handler.send_header('Content-Type', 'text/xml' if status == 200 else 'text/plain')
+        for header, value in headers.items():
+            handler.send_header(header, value)
+
+        if not self.chunked:
+            handler.send_header('Content-Length', str(len(content)))
+            handler.end_headers()
+            handler.wfile.write(content)
+            return
+
+        handler.send_header('Transfer-Encoding', 'chunked')
+        handler.end_headers()
+        for start in range(0, len(content), self.chunk_size):
+            chunk = content[start:start + self.chunk_size]
+            handler.wfile.write(b'%x\r\n%s\r\n' % (len(chunk), chunk))
+        handler.wfile.write(b'0\r\n\r\n')
+
+    def _login(self, body, headers):
+        form = {key: values[0] for key, values in parse_qs(body.decode('utf-8')).items()}
+
+        if form.get('credential_0') != self.username or form.get('credential_1') != self.password:
+            return 401, b'Login failed'
+
+        token = secrets.token_hex(16)
+        with self._lock:
+            self.sessions.add(token)
+
+        headers['Set-Cookie'] = f'{COOKIE}={token}; Path=/; HttpOnly'
+        return 200, b'<html><body>Logged in</body></html>'
+
+    def _authenticated(self, cookie):
+        match = re.search(re.escape(COOKIE) + r'=(\w+)', cookie)
+        return match is not None and match.group(1) in self.sessions
+
+    def _ap_list_xml(self, query, accepts_gzip, headers):
+        if 'id' not in query:
+            if not (self.gzip and accepts_gzip):
+                return self._ap_list
+
+            # The whole inventory is only compressed once
+            with self._lock:
+                if self._ap_list_gzip is None:
+                    self._ap_list_gzip = gzip.compress(self._ap_list, compresslevel=1)
+            headers['Content-Encoding'] = 'gzip'
+            return self._ap_list_gzip
+
+        device = self.devices.get(query['id'])
+        aps = ap_xml(device) if device is not None else ''
+
+        return f'{_XML_HEADER}<amp:amp_ap_list version="1" xmlns:amp="http://www.airwave.com">\n{aps}</amp:amp_ap_list>\n'.encode('utf-8')
+
+    def _client_detail_xml(self, query):
+        mac = query.get('mac', '').upper()
+
+        if not _MAC_RE.match(mac):
+            detail = f'<error>Invalid MAC address {escape(mac)}</error>'
+        elif mac in self.clients:
+            detail = client_xml(mac, self.clients[mac])
+        else:
+            detail = ''
+
+        return f'{_XML_HEADER}<amp:amp_client_detail version="1" xmlns:amp="http://www.airwave.com">{detail}</amp:amp_client_detail>\n'.encode('utf-8')
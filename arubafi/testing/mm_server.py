@@ -0,0 +1,475 @@
+import copy
+import random
+import re
+import secrets
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from logzero import logger
+
+from .. import endpoints
+from .. import filters
+from ..codec import get_codec
+from ..hierarchy import NodeTree
+
+# The API version prefix and the resource after it, ex. '/v1/api/login'
+_PATH_RE = re.compile(r'^/v\d+/(.*)$')
+
+DEFAULT_HIERARCHY = {
+    'name': '/',
+    'type': 'root',
+    'childnodes': [
+        {'name': 'mm', 'type': 'system', 'childnodes': [], 'devices': []},
+        {'name': 'md', 'type': 'system', 'childnodes': [], 'devices': []},
+    ],
+    'devices': [],
+}
+
+
+def _result(status, status_str, **extra):
+    return {'_global_result': dict(status=status, status_str=status_str, **extra)}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    '''Hands every request to the `MMServer` of the HTTP server
+    '''
+    protocol_version = 'HTTP/1.1'
+    # The headers and body are written separately, which Nagle's algorithm
+    # would hold back for a delayed ACK on every keep-alive request
+    disable_nagle_algorithm = True
+    server_version = 'arubafi-mm-server'
+
+    def do_GET(self):
+        self.server.mm.handle(self, 'GET')
+
+    def do_POST(self):
+        self.server.mm.handle(self, 'POST')
+
+    def log_message(self, format, *args):
+        logger.debug("MMServer: " + format, *args)
+
+
+class MMServer:
+    """Local stand-in for a Mobility Master, serving the AOS8 API over plain
+    HTTP from an in-memory config tree.
+
+    It implements `/api/login`, `/api/logout`, `node_hierarchy`,
+    `write_memory` and the GET and POST of any `configuration/object/<name>`
+    with `config_path`, `filter`, `sort`, `limit` and `offset`. Objects are
+    inherited down the hierarchy like on a MM, and GETs return the inherited
+    ones with `_flags.inherited` set. POSTs are merged into the object with
+    the same name at the config path, or delete it with `"_action":
+    "delete"`.
+
+    Latency, errors and session limits can be set to see how a client
+    behaves against a slow or failing MM, without a MM.
+
+    Params
+    ------
+    host: `str`, optional, default: '127.0.0.1'
+        The address to listen on.
+
+    port: `int`, optional, default: 0
+        The port to listen on, any free port if 0.
+
+    username: `str`, optional, default: 'admin'
+        The username to log in with.
+
+    password: `str`, optional, default: 'admin'
+        The password to log in with.
+
+    hierarchy: dict, optional, default: None
+        The node hierarchy, as returned by the `node_hierarchy` endpoint.
+        Defaults to the `/mm` and `/md` nodes only.
+
+    latency: `float`, optional, default: 0.0
+        Seconds every response is held back for.
+
+    jitter: `float`, optional, default: 0.0
+        Up to this many seconds are randomly added to the `latency`.
+
+    error_rate: `float`, optional, default: 0.0
+        The share of config requests, from 0 to 1, answered with the
+        `error_status` instead.
+
+    error_status: `int`, optional, default: 503
+        The HTTP status of the injected errors.
+
+    max_sessions: `int`, optional, default: None
+        The number of sessions that can be logged in at the same time,
+        unlimited if `None`.
+
+    session_timeout: `float`, optional, default: None
+        Seconds a session can be idle before it expires and its `UIDARUBA`
+        is answered with a 401. Never expires if `None`.
+
+    seed: `int`, optional, default: None
+        Seeds the randomness of the jitter and the injected errors.
+
+    Examples
+    --------
+    >>> with MMServer(latency=0.01) as server:
+            server.add_node('/md/EU')
+            server.add('/md', 'netdst', {'dstname': 'dns'})
+            mmc = server.client()
+            mmc.netdst(config_path='/md/EU')
+    ({'_meta': {'total': 1, 'offset': 0}, '_data': {'netdst': [{'dstname': 'dns', '_flags': {'inherited': True}}]}}, None)
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, username='admin', password='admin', hierarchy=None, latency=0.0, jitter=0.0, error_rate=0.0, error_status=503, max_sessions=None, session_timeout=None, seed=None):
+        self.host = host
+        self.username = username
+        self.password = password
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.max_sessions = max_sessions
+        self.session_timeout = session_timeout
+
+        self.hierarchy = copy.deepcopy(hierarchy or DEFAULT_HIERARCHY)
+        if isinstance(self.hierarchy.get('_data'), dict):
+            self.hierarchy = self.hierarchy['_data'].get('node_hierarchy', self.hierarchy['_data'])
+        self.tree = NodeTree(self.hierarchy)
+
+        # Config path to object name to object id to the object
+        self.config = dict()
+        # Config paths POSTed to and not saved with `write_memory` yet
+        self.pending = set()
+        # Config path to the number of times it was saved
+        self.saved = Counter()
+        # 'METHOD resource' to the number of requests, ex.
+        # 'GET configuration/object/netdst'
+        self.requests = Counter()
+        # `UIDARUBA` to the time the session was last used
+        self.sessions = dict()
+
+        self.codec = get_codec()
+        self._random = random.Random(seed)
+        self._failures = list()
+        self._lock = threading.Lock()
+
+        self._httpd = ThreadingHTTPServer((host, port), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.mm = self
+        self.port = self._httpd.server_address[1]
+        self._thread = None
+
+    @property
+    def mm_host(self):
+        '''The `mm_host` to create an `MMClient` with
+        '''
+        return f'http://{self.host}'
+
+    @property
+    def url(self):
+        '''The base API URL, ex. 'http://127.0.0.1:41234/v1'
+        '''
+        return f'{self.mm_host}:{self.port}/v1'
+
+    def start(self):
+        '''Starts serving in a background thread.
+
+        Returns:
+        --------
+        The server.
+        '''
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._httpd.serve_forever, name=f'MMServer:{self.port}', daemon=True)
+            self._thread.start()
+
+        return self
+
+    def stop(self):
+        '''Stops serving and closes the socket
+        '''
+        if self._thread is not None:
+            self._httpd.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def client(self, **kwargs):
+        '''Returns an `MMClient` logged in to the server. The `kwargs` are
+        passed to the `MMClient`, and can override the `username` and
+        `password`.
+        '''
+        from ..mmclient import MMClient
+
+        kwargs.setdefault('username', self.username)
+        kwargs.setdefault('password', self.password)
+        mmc = MMClient(mm_host=self.mm_host, port=self.port, **kwargs)
+        mmc.comms()
+
+        return mmc
+
+    #
+    # Config
+    #
+    def add_node(self, path, type='group'):
+        '''Adds the node at the `path` and any missing nodes above it
+        '''
+        with self._lock:
+            node = self.hierarchy
+            for name in NodeTree.normalise(path).strip('/').split('/'):
+                for child in node.setdefault('childnodes', list()):
+                    if child['name'] == name:
+                        break
+                else:
+                    child = {'name': name, 'type': type, 'childnodes': [], 'devices': []}
+                    node['childnodes'].append(child)
+                node = child
+
+            self.tree = NodeTree(self.hierarchy)
+
+    def add_device(self, path, mac, name=None, model='A7005'):
+        '''Adds a device to the group node at the `path`, creating the node
+        if it's missing.
+        '''
+        if path not in self.tree:
+            self.add_node(path)
+
+        with self._lock:
+            node = self.hierarchy
+            for segment in NodeTree.normalise(path).strip('/').split('/'):
+                if segment:
+                    node = next(child for child in node['childnodes'] if child['name'] == segment)
+
+            node.setdefault('devices', list()).append({'mac': mac, 'name': name or mac, 'model': model})
+            self.tree = NodeTree(self.hierarchy)
+
+    def add(self, config_path, name, obj):
+        '''Adds or replaces the `name` object at the `config_path`, creating
+        the node if it's missing.
+        '''
+        if config_path not in self.tree:
+            self.add_node(config_path)
+
+        with self._lock:
+            self._objects(config_path, name)[self._object_id(name, obj)] = copy.deepcopy(obj)
+
+    def objects(self, config_path, name):
+        '''Returns the `name` objects at the `config_path`, the inherited ones
+        first, flagged with `_flags.inherited`, like a GET to the MM.
+        '''
+        with self._lock:
+            return self._effective(NodeTree.normalise(config_path), name)
+
+    def _objects(self, config_path, name):
+        return self.config.setdefault(NodeTree.normalise(config_path), dict()).setdefault(name, dict())
+
+    @staticmethod
+    def _object_id(name, obj):
+        key = endpoints.object_key(name)
+        return filters.text(obj.get(key)) if key is not None else ''
+
+    def _effective(self, config_path, name):
+        effective = dict()
+
+        for path in self.tree.ancestors(config_path):
+            for obj_id, obj in self.config.get(path, dict()).get(name, dict()).items():
+                effective[obj_id] = dict(obj, _flags={'inherited': True})
+
+        for obj_id, obj in self.config.get(config_path, dict()).get(name, dict()).items():
+            effective.pop(obj_id, None)
+            effective[obj_id] = obj
+
+        return list(effective.values())
+
+    #
+    # Faults
+    #
+    def fail_next(self, count=1, status=None):
+        '''Answers the next `count` config requests with the HTTP `status`,
+        the `error_status` if `None`.
+        '''
+        with self._lock:
+            self._failures.extend([status or self.error_status] * count)
+
+    def expire_sessions(self):
+        '''Expires all sessions, as if the MM was restarted
+        '''
+        with self._lock:
+            self.sessions.clear()
+
+    #
+    # Requests
+    #
+    def handle(self, handler, method):
+        '''Answers the request of the `handler`
+        '''
+        url = urlsplit(handler.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        body = handler.rfile.read(int(handler.headers.get('Content-Length') or 0))
+
+        match = _PATH_RE.match(url.path)
+        resource = match.group(1).rstrip('/') if match else url.path
+
+        with self._lock:
+            self.requests[f'{method} {resource}'] += 1
+
+        delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0)
+        if delay > 0:
+            time.sleep(delay)
+
+        headers = dict()
+        try:
+            if not match:
+                status, jresp = 404, _result(1, f"Unknown resource '{url.path}'")
+            elif resource == 'api/login':
+                status, jresp = self._login(query, body, headers)
+            elif resource == 'api/logout':
+                status, jresp = self._logout(query, handler.headers.get('Cookie', ''))
+            elif resource.startswith('configuration/object/'):
+                status, jresp = self._config(method, resource.rsplit('/', 1)[-1], query, body)
+            else:
+                status, jresp = 404, _result(1, f"Unknown resource '{resource}'")
+        except ValueError as exc:
+            status, jresp = 400, _result(1, str(exc))
+
+        content = self.codec.dumpb(jresp)
+
+        handler.send_response(status)
+        handler.send_header('Content-Type', 'application/json')
+        handler.send_header('Content-Length', str(len(content)))
+        for header, value in headers.items():
+            handler.send_header(header, value)
+        handler.end_headers()
+        handler.wfile.write(content)
+
+    def _login(self, query, body, headers):
+        try:
+            credentials = self.codec.loads(body) if body else dict()
+        except ValueError:
+            credentials = None
+        if not isinstance(credentials, dict):
+            # The client sends the credentials form encoded
+            credentials = {key: values[0] for key, values in parse_qs(body.decode('utf-8')).items()}
+        credentials = dict(query, **credentials)
+
+        if credentials.get('username') != self.username or credentials.get('password') != self.password:
+            return 200, _result('1', 'Authentication failed')
+
+        with self._lock:
+            self._expire()
+            if self.max_sessions is not None and len(self.sessions) >= self.max_sessions:
+                return 200, _result('1', 'Maximum number of sessions reached')
+
+            token = secrets.token_hex(16)
+            self.sessions[token] = time.monotonic()
+
+        headers['Set-Cookie'] = f'SESSION={token}; Path=/; HttpOnly'
+        return 200, _result('0', "You've been logged in successfully.", UIDARUBA=token)
+
+    def _logout(self, query, cookie):
+        token = query.get('UIDARUBA')
+        if token is None:
+            match = re.search(r'SESSION=(\w+)', cookie)
+            token = match.group(1) if match else None
+
+        with self._lock:
+            self.sessions.pop(token, None)
+
+        return 200, _result('0', "You've been logged out successfully.")
+
+    def _expire(self):
+        if self.session_timeout is None:
+            return
+
+        now = time.monotonic()
+        for token, last_used in list(self.sessions.items()):
+            if now - last_used >= self.session_timeout:
+                del self.sessions[token]
+
+    def _config(self, method, name, query, body):
+        with self._lock:
+            self._expire()
+            token = query.get('UIDARUBA')
+            if token not in self.sessions:
+                return 401, _result(1, 'Invalid session')
+            self.sessions[token] = time.monotonic()
+
+            failure = self._failures.pop(0) if self._failures else None
+            if failure is None and self.error_rate and self._random.random() < self.error_rate:
+                failure = self.error_status
+        if failure is not None:
+            return failure, _result(1, 'Injected error')
+
+        if name == 'node_hierarchy':
+            with self._lock:
+                return 200, copy.deepcopy(self.hierarchy)
+
+        config_path = NodeTree.normalise(query.get('config_path', '/md'))
+        if config_path not in self.tree:
+            return 200, _result(1, f"Invalid config_path '{config_path}'")
+
+        if method == 'POST':
+            return self._post(name, config_path, body)
+
+        return self._get(name, config_path, query)
+
+    def _get(self, name, config_path, query):
+        conditions = filters.parse(query['filter']) if 'filter' in query else list()
+
+        with self._lock:
+            objs = self._effective(config_path, name)
+
+        if conditions:
+            objs = [obj for obj in objs if filters.matches(obj, conditions)]
+
+        if 'sort' in query:
+            _, keys, descending = filters.sort_key(query['sort'])
+            values = [(filters.sort_value(obj, keys), obj) for obj in objs]
+            # Objects without the sort key go last whatever the order
+            objs = [obj for _, obj in sorted(
+                (value for value in values if value[0] is not None),
+                key=lambda value: value[0], reverse=descending)]
+            objs.extend(obj for value, obj in values if value is None)
+
+        offset = int(query.get('offset', 0))
+        limit = int(query['limit']) if 'limit' in query else None
+        total = len(objs)
+        objs = objs[offset:offset + limit if limit is not None else None]
+
+        return 200, {'_meta': {'total': total, 'offset': offset}, '_data': {name: objs}}
+
+    def _post(self, name, config_path, body):
+        if name == 'write_memory':
+            with self._lock:
+                self.pending.discard(config_path)
+                self.saved[config_path] += 1
+            return 200, _result(0, 'Success', _pending=False)
+
+        payload = self.codec.loads(body) if body else dict()
+        if not isinstance(payload, dict):
+            raise ValueError(f"The {name} payload must be an object")
+
+        action = payload.pop('_action', 'modify')
+        payload.pop('_flags', None)
+
+        key = endpoints.object_key(name)
+        if key is not None and key not in payload:
+            return 200, _result(1, f"Missing the '{key}' of the {name} object")
+
+        with self._lock:
+            objs = self._objects(config_path, name)
+            obj_id = self._object_id(name, payload)
+
+            if action == 'delete':
+                if objs.pop(obj_id, None) is None:
+                    return 200, _result(1, f"No {name} object '{obj_id}' at {config_path}")
+            else:
+                objs.setdefault(obj_id, dict()).update(payload)
+
+            self.pending.add(config_path)
+
+        return 200, _result(0, 'Success', _pending=True)
@@ -0,0 +1,122 @@
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from arubafi.airwave import AirWave, OnlyOneInstance
+from arubafi.governor import Governor
+from arubafi.retry import CircuitBreaker
+from arubafi.testing import AMPServer, generate_inventory
+
+
+class TestAirWave(unittest.TestCase):
+    '''Test class for testing AirWave against the local AirWave emulator.
+    '''
+    def setUp(self):
+        # AirWave only allows one instance
+        OnlyOneInstance._instances.clear()
+        self.addCleanup(OnlyOneInstance._instances.clear)
+        self.addCleanup(CircuitBreaker._registry.clear)
+        self.addCleanup(Governor._registry.clear)
+
+        self.server = AMPServer(aps=50, controllers=3, iap_vcs=1, controllerless=2, clients=20).start()
+        self.addCleanup(self.server.stop)
+
+    def airwave(self, **kwargs):
+        aw = AirWave(self.server.url, 'admin', 'admin', **kwargs)
+        aw.comms()
+        self.addCleanup(aw.close)
+        return aw
+
+    def test_login(self):
+        '''Only one instance is created and bad credentials exit, or return
+        the error in worker threads
+        '''
+        aw = self.airwave()
+        self.assertIs(aw, AirWave(self.server.url))
+        self.assertEqual(1, len(self.server.sessions))
+
+        OnlyOneInstance._instances.clear()
+        with self.assertRaises(SystemExit) as exited:
+            AirWave(self.server.url, 'admin', 'wrong').comms()
+        self.assertEqual(1, exited.exception.code)
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            err = executor.submit(AirWave(self.server.url, 'admin', 'wrong').comms).result()
+        self.assertEqual(-1, err['status'])
+        self.assertIn('HTTPError', err['status_str'])
+
+    def test_inventory(self):
+        '''The inventory is fetched once and split into its DBs
+        '''
+        aw = self.airwave()
+
+        self.assertEqual(56, len(aw.get_all_items_inventory()))
+        self.assertEqual({'mc01.example.com', 'mc02.example.com', 'mc03.example.com'}, aw.get_controller_fqdn_list())
+        self.assertEqual({'4': 'iapvc01.example.com'}, aw.get_iapvc_inventory())
+        self.assertEqual({'55': 'sap001', '56': 'sap002'}, aw.get_controllerless_ap_inventory())
+        self.assertEqual(50, len(aw.get_apname_to_controllerid_inventory()))
+        self.assertEqual('3', aw.get_aps_controller('ap00002'))
+        self.assertEqual({'1', '2'}, aw.get_multiple_aps_controllerid(['ap00003', 'ap00004', 'missing']))
+        self.assertEqual({'mc02.example.com', 'mc03.example.com', 'mc01.example.com'}, set(aw.get_controllers_aps()))
+
+        self.assertEqual(1, self.server.requests['GET /ap_list.xml'])
+
+    def test_users_ap_info(self):
+        '''Clients are looked up with their AP and controller
+        '''
+        aw = self.airwave()
+        mac, client = next(iter(self.server.clients.items()))
+
+        info = aw.get_users_ap_info(mac.lower())
+        self.assertEqual(client['ap_name'], info['name'])
+        self.assertEqual(client['ssid'], info['essid'])
+        self.assertEqual(self.server.devices[client['ap_id']]['controller_id'], info['controller_id'])
+        self.assertTrue(info['ap_aw_url'].endswith(f"/ap_list.xml?id={client['ap_id']}"))
+
+        controller = aw.get_users_controller_info(mac)
+        self.assertEqual('controller', controller['device_category'])
+
+        self.assertEqual({}, aw.get_users_ap_info('F0:18:98:FF:FF:FF'))
+        self.assertEqual({}, aw.get_users_ap_info('not-a-mac'))
+
+    def test_gzip_chunked(self):
+        '''Gzipped and chunked responses are read like plain ones
+        '''
+        self.server.gzip = True
+        self.server.chunked = True
+        self.server.chunk_size = 1024
+        aw = self.airwave()
+
+        response = aw._request('get', self.server.url + '/ap_list.xml')
+        self.assertEqual('gzip', response.headers['Content-Encoding'])
+        self.assertEqual('chunked', response.headers['Transfer-Encoding'])
+
+        self.assertEqual(56, len(aw.get_all_items_inventory()))
+        self.assertEqual(16, len(aw.get_users_ap_info(next(iter(self.server.clients)))))
+
+    def test_refresh(self):
+        '''A new inventory is served once it's set
+        '''
+        aw = self.airwave()
+        self.assertEqual(56, len(aw.get_all_items_inventory()))
+
+        self.server.set_inventory(generate_inventory(aps=10, controllers=1, iap_vcs=0, controllerless=0, clients=0))
+        aw._inventory = None
+        aw._all_items_db = None
+
+        self.assertEqual(11, len(aw.get_all_items_inventory()))
+
+    def test_latency(self):
+        '''Latency and jitter hold back the responses
+        '''
+        self.server.latency = 0.05
+        self.server.jitter = 0.01
+        aw = self.airwave()
+
+        start = time.perf_counter()
+        aw.get_all_items_inventory()
+        self.assertGreaterEqual(time.perf_counter() - start, 0.05)
+
+
+if __name__ == "__main__":
+    unittest.main()
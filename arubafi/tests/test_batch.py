@@ -0,0 +1,106 @@
+import responses
+import threading
+import unittest
+
+from arubafi.mmclient import MMClient
+from .test_data.mmclient_data import *
+
+BASE_URL = "https://test.arubamm.com"
+BASE_API_URL = BASE_URL + ":4343/v1"
+LOGIN_URL = BASE_API_URL + "/api/login"
+AP_GROUP_URL = BASE_API_URL + "/configuration/object/ap_group"
+WRITE_MEM_URL = BASE_API_URL + "/configuration/object/write_memory"
+
+POST_OK = {'_global_result': {'status': 0, 'status_str': 'Success', '_pending': True}}
+
+
+class TestWriteBatch(unittest.TestCase):
+    '''Test class for testing MMClient write batches.
+    '''
+    @responses.activate
+    def setUp(self):
+        responses.add(responses.POST, LOGIN_URL, status=200, json=login_resp)
+
+        self.mmc = MMClient(BASE_URL, "care", "pare")
+        self.mmc.comms()
+
+    def write_mem_paths(self):
+        return [
+            call.request.params['config_path'] for call in responses.calls
+            if call.request.url.startswith(WRITE_MEM_URL)]
+
+    @responses.activate
+    def test_coalesced(self):
+        '''Every written path is saved once, deepest first
+        '''
+        responses.add(responses.POST, AP_GROUP_URL, status=200, json=POST_OK)
+        responses.add(responses.POST, WRITE_MEM_URL, status=200, json={'_global_result': {'status': 0}})
+
+        with self.mmc.batch() as batch:
+            for config_path in ('/md/EU', '/md/EU/lab', '/md/EU/lab', '/md/US/lab'):
+                self.mmc.ap_group(data={'profile-name': 'x'}, config_path=config_path)
+                self.assertEqual((None, None), self.mmc.write_mem(config_path))
+
+        paths = self.write_mem_paths()
+        self.assertEqual({'/md/EU/lab', '/md/US/lab'}, set(paths[:2]))
+        self.assertEqual(['/md/EU'], paths[2:])
+        self.assertEqual({'/md/EU', '/md/EU/lab', '/md/US/lab'}, set(batch.results))
+        self.assertIsNone(self.mmc._batch)
+
+    @responses.activate
+    def test_not_pending_or_failed(self):
+        '''Failed POSTs and POSTs with nothing pending aren't saved
+        '''
+        responses.add(responses.POST, AP_GROUP_URL, status=200, json={'_global_result': {'status': 0, '_pending': False}})
+        responses.add(responses.POST, AP_GROUP_URL, status=200, json={'_global_result': {'status': 1}})
+
+        with self.mmc.batch():
+            self.mmc.ap_group(data={'profile-name': 'x'}, config_path='/md/EU')
+            self.mmc.ap_group(data={'profile-name': 'y'}, config_path='/md/US')
+
+        self.assertEqual([], self.write_mem_paths())
+
+    @responses.activate
+    def test_exception(self):
+        '''Nothing is saved if the batch raises
+        '''
+        responses.add(responses.POST, AP_GROUP_URL, status=200, json=POST_OK)
+
+        with self.assertRaises(KeyError):
+            with self.mmc.batch():
+                self.mmc.ap_group(data={'profile-name': 'x'}, config_path='/md/EU')
+                raise KeyError('x')
+
+        self.assertEqual([], self.write_mem_paths())
+        self.assertIsNone(self.mmc._batch)
+
+    @responses.activate
+    def test_other_threads(self):
+        '''Writes from other threads are not part of the batch, unless
+        handed over with `in_batch()`
+        '''
+        responses.add(responses.POST, AP_GROUP_URL, status=200, json=POST_OK)
+        responses.add(responses.POST, WRITE_MEM_URL, status=200, json={'_global_result': {'status': 0}})
+        results = dict()
+
+        def write(config_path):
+            self.mmc.ap_group(data={'profile-name': 'x'}, config_path=config_path)
+            results[config_path] = self.mmc.write_mem(config_path)
+
+        with self.mmc.batch() as batch:
+            other = threading.Thread(target=write, args=('/md/US',))
+            other.start()
+            other.join()
+            self.assertEqual(['/md/US'], self.write_mem_paths())
+
+            handed_over = threading.Thread(target=self.mmc.in_batch(write), args=('/md/EU',))
+            handed_over.start()
+            handed_over.join()
+            self.assertEqual((None, None), results['/md/EU'])
+
+        self.assertEqual(['/md/US', '/md/EU'], self.write_mem_paths())
+        self.assertEqual({'/md/EU'}, set(batch.results))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,138 @@
+import responses
+import unittest
+from mock import patch
+
+from arubafi.cache import ResponseCache
+from arubafi.mmclient import MMClient
+from .test_data.mmclient_data import *
+
+BASE_URL = "https://test.arubamm.com"
+BASE_API_URL = BASE_URL + ":4343/v1"
+LOGIN_URL = BASE_API_URL + "/api/login"
+AP_GROUP_URL = BASE_API_URL + "/configuration/object/ap_group"
+HIERARCHY_URL = BASE_API_URL + "/configuration/object/node_hierarchy"
+
+
+class TestResponseCache(unittest.TestCase):
+    '''Test class for testing ResponseCache on its own.
+    '''
+    def setUp(self):
+        self.cache = ResponseCache(ttl=60, maxsize=2)
+
+    def test_key_ignores_token_and_leading_slash(self):
+        '''The key must not depend on the UIDARUBA or the leading `/`
+        '''
+        key_a = self.cache.key('/configuration/object/ap_group', {'config_path': '/md', 'UIDARUBA': 'a'})
+        key_b = self.cache.key('configuration/object/ap_group', {'config_path': '/md', 'UIDARUBA': 'b'})
+
+        self.assertEqual(key_a, key_b)
+
+    def test_returns_copies(self):
+        '''Modifying a returned response must not change the cached one
+        '''
+        key = self.cache.key('configuration/object/ap_group', {'config_path': '/md'})
+        self.cache.set(key, {'a': [1]})
+        self.cache.get(key)['a'].append(2)
+
+        self.assertEqual({'a': [1]}, self.cache.get(key))
+
+    def test_expiry(self):
+        '''Expired entries must not be returned
+        '''
+        key = self.cache.key('configuration/object/ap_group', {'config_path': '/md'})
+
+        with patch('arubafi.cache.time.monotonic', return_value=0):
+            self.cache.set(key, {'a': 1})
+        with patch('arubafi.cache.time.monotonic', return_value=61):
+            self.assertIsNone(self.cache.get(key))
+
+    def test_maxsize(self):
+        '''The least recently used entry is dropped once full
+        '''
+        keys = [self.cache.key('e', {'config_path': f'/md/{i}'}) for i in range(3)]
+        self.cache.set(keys[0], 0)
+        self.cache.set(keys[1], 1)
+        self.cache.get(keys[0])
+        self.cache.set(keys[2], 2)
+
+        self.assertEqual(0, self.cache.get(keys[0]))
+        self.assertIsNone(self.cache.get(keys[1]))
+
+    def test_invalidate_subtree(self):
+        '''Invalidation drops the path and paths below it only
+        '''
+        cache = ResponseCache()
+        for path in ('/md', '/md/EU', '/md/EU/UK', '/md/EUX', '/mm'):
+            cache.set(cache.key('e', {'config_path': path}), path)
+        cache.set(cache.key('other', {'config_path': '/md/EU'}), 'other')
+
+        self.assertEqual(2, cache.invalidate('/e', '/md/EU'))
+        self.assertIsNone(cache.get(cache.key('e', {'config_path': '/md/EU/UK'})))
+        self.assertEqual('/md', cache.get(cache.key('e', {'config_path': '/md'})))
+        self.assertEqual('/md/EUX', cache.get(cache.key('e', {'config_path': '/md/EUX'})))
+        self.assertEqual('other', cache.get(cache.key('other', {'config_path': '/md/EU'})))
+
+
+class TestMMClientCache(unittest.TestCase):
+    '''Test class for testing the MMClient GET cache.
+    '''
+    @responses.activate
+    def setUp(self):
+        responses.add(responses.POST, LOGIN_URL, status=200, json=login_resp)
+
+        self.mmc = MMClient(BASE_URL, "care", "pare", cache_ttl=60)
+        self.mmc.comms()
+
+    @responses.activate
+    def test_get_cached(self):
+        '''A repeated GET must be served from the cache
+        '''
+        responses.add(responses.GET, AP_GROUP_URL, status=200, json={'_data': {'ap_group': []}})
+
+        first = self.mmc.ap_group(config_path='/md/EU')
+        second = self.mmc.ap_group(config_path='/md/EU')
+
+        self.assertEqual(first, second)
+        self.assertEqual(1, len(responses.calls))
+
+    @responses.activate
+    def test_post_invalidates(self):
+        '''A successful POST must make the next GET go to the MM
+        '''
+        responses.add(responses.GET, AP_GROUP_URL, status=200, json={'_data': {'ap_group': []}})
+        responses.add(responses.POST, AP_GROUP_URL, status=200, json={'_global_result': {'status': 0}})
+
+        self.mmc.ap_group(config_path='/md/EU/UK')
+        self.mmc.ap_group(data={'profile-name': 'new'}, config_path='/md/EU')
+        self.mmc.ap_group(config_path='/md/EU/UK')
+
+        self.assertEqual(3, len(responses.calls))
+
+    @responses.activate
+    def test_error_not_cached(self):
+        '''A GET the MM answered with an error must not be cached
+        '''
+        error = {'_global_result': {'status': 1, 'status_str': "Invalid config_path '/md/XX'"}}
+        responses.add(responses.GET, AP_GROUP_URL, status=200, json=error)
+        responses.add(responses.GET, AP_GROUP_URL, status=200, json={'_data': {'ap_group': []}})
+
+        self.assertEqual((error, None), self.mmc.ap_group(config_path='/md/XX'))
+        self.assertEqual(({'_data': {'ap_group': []}}, None), self.mmc.ap_group(config_path='/md/XX'))
+        self.assertEqual(2, len(responses.calls))
+
+    @responses.activate
+    def test_hierarchy_refresh(self):
+        '''Refreshing the hierarchy must not be served from the cache
+        '''
+        responses.add(responses.GET, HIERARCHY_URL, status=200, json=node_hierarchy)
+
+        self.mmc.hierarchy()
+        self.mmc.node_hierarchy()
+        self.assertEqual(1, len(responses.calls))
+
+        self.mmc.hierarchy(refresh=True)
+        self.assertEqual(2, len(responses.calls))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import json
+import responses
+import unittest
+
+from arubafi import codec
+from arubafi.codec import JSONCodec, OrjsonCodec, get_codec
+from arubafi.mmclient import MMClient
+from .test_data.mmclient_data import *
+
+BASE_URL = "https://test.arubamm.com"
+BASE_API_URL = BASE_URL + ":4343/v1"
+LOGIN_URL = BASE_API_URL + "/api/login"
+AP_GROUP_URL = BASE_API_URL + "/configuration/object/ap_group"
+
+PAYLOAD = {'profile-name': 'grp', 'virtual_ap': [{'profile-name': 'vap'}], 'count': 2 ** 70}
+
+
+class TestCodec(unittest.TestCase):
+    '''Test class for testing the JSON codecs.
+    '''
+    def test_get_codec(self):
+        '''Codecs are picked by name, instances are passed through and
+        orjson is the default only when installed
+        '''
+        self.assertIsInstance(get_codec('json'), JSONCodec)
+
+        stdlib = JSONCodec()
+        self.assertIs(stdlib, get_codec(stdlib))
+
+        expected = OrjsonCodec if codec.orjson is not None else JSONCodec
+        self.assertIs(expected, type(get_codec()))
+
+        with self.assertRaises(ValueError):
+            get_codec('yaml')
+
+    def test_json_round_trip(self):
+        stdlib = JSONCodec()
+
+        self.assertEqual(PAYLOAD, stdlib.loads(stdlib.dumpb(PAYLOAD)))
+        self.assertEqual(json.dumps(PAYLOAD), stdlib.dumps(PAYLOAD))
+
+    @unittest.skipIf(codec.orjson is None, 'orjson not installed')
+    def test_orjson_round_trip(self):
+        '''orjson must decode like json and fall back for what it can't encode
+        '''
+        fast = OrjsonCodec()
+
+        self.assertEqual(PAYLOAD, fast.loads(fast.dumpb(PAYLOAD)))
+        self.assertEqual(json.loads(json.dumps(PAYLOAD)), json.loads(fast.dumps(PAYLOAD)))
+
+        with self.assertRaises(json.JSONDecodeError):
+            fast.loads(b'<html>')
+
+
+class TestMMClientCodec(unittest.TestCase):
+    '''Test class for testing the codec used by MMClient.
+    '''
+    @responses.activate
+    def setUp(self):
+        responses.add(responses.POST, LOGIN_URL, status=200, json=login_resp)
+
+        self.mmc = MMClient(BASE_URL, "care", "pare")
+        self.mmc.comms()
+
+    @responses.activate
+    def test_payload_encoded(self):
+        '''POSTed data must be sent as a JSON body
+        '''
+        responses.add(responses.POST, AP_GROUP_URL, status=200, json={'_global_result': {'status': 0}})
+
+        jresp, jresp_err = self.mmc.ap_group(data=PAYLOAD)
+
+        self.assertIsNone(jresp_err)
+        self.assertEqual(PAYLOAD, json.loads(responses.calls[0].request.body))
+        self.assertEqual('application/json', responses.calls[0].request.headers['Content-Type'])
+
+    @responses.activate
+    def test_invalid_response(self):
+        '''A response that isn't JSON still returns None for both values
+        '''
+        responses.add(responses.GET, AP_GROUP_URL, status=200, body='<html>')
+
+        self.assertEqual((None, None), self.mmc.ap_group())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,3 +3,22 @@ login_resp = {'_global_result':
                     'status_str': "You've been logged in successfully.",
                     'UIDARUBA': 'fntoken'}
             }
+
+node_hierarchy = {
+    "name": "/",
+    "type": "root",
+    "childnodes": [
+        {"name": "mm", "type": "system", "childnodes": [], "devices": [{"mac": "00:0c:29:aa:bb:cc", "name": "mm-01"}]},
+        {"name": "md", "type": "system", "childnodes": [
+            {"name": "EU", "type": "group", "childnodes": [
+                {"name": "DE", "type": "group", "childnodes": [
+                    {"name": "site-01", "type": "group", "childnodes": [], "devices": [{"mac": "20:4c:03:00:00:01", "name": "md-de-01"}]},
+                ]},
+                {"name": "FR", "type": "group", "childnodes": [
+                    {"name": "site-01", "type": "group", "childnodes": []},
+                ]},
+                {"name": "lab", "type": "group", "childnodes": []},
+            ]},
+        ]},
+    ],
+}
@@ -0,0 +1,149 @@
+import json
+import re
+import responses
+import threading
+import unittest
+from urllib.parse import parse_qs, urlsplit
+
+from arubafi import depgraph
+from arubafi.depgraph import DependencyGraph
+from arubafi.mmclient import MMClient
+from arubafi.retry import CircuitBreaker
+from .test_data.mmclient_data import *
+
+BASE_URL = "https://test.arubamm.com"
+BASE_API_URL = BASE_URL + ":4343/v1"
+LOGIN_URL = BASE_API_URL + "/api/login"
+OBJECT_URL = re.compile(BASE_API_URL + r"/configuration/object/(\w+)")
+
+config = {
+    'virtual_ap': [{'profile-name': 'corp', 'ssid_prof': {'profile-name': 'corp'}, 'aaa_prof': {'profile-name': 'corp'}}],
+    'ssid_prof': [{'profile-name': 'corp', 'essid': {'essid': 'corp'}}],
+    'aaa_prof': [{'profile-name': 'corp', 'dot1x_server_group': {'srv-group': 'corp'}, 'default_user_role': {'role': 'guest'}}],
+    'server_group_prof': [{'sg_name': 'corp', 'auth_server': [{'name': 'radius1'}, {'name': 'radius2'}]}],
+    'rad_server': [{'rad_server_name': 'radius1'}, {'rad_server_name': 'radius2'}],
+    'role': [{'rname': 'guest', 'role__acl': [{'acl_type': 'session', 'pname': 'guest'}, {'acl_type': 'session', 'pname': 'logon-control'}]}],
+    'acl_sess': [
+        {'accname': 'guest', 'acl_sess__v4policy': [{'dst-alias': 'dns', 'service-name': 'svc-dns'}, {'src-alias': 'guests'}]},
+        {'accname': 'logon-control', '_flags': {'default': True}},
+    ],
+    'netdst': [{'dstname': 'dns'}, {'dstname': 'guests'}],
+    'netsvc': [{'name': 'svc-dns', '_flags': {'predefined': True}}],
+}
+
+
+class TestReferences(unittest.TestCase):
+    '''Test class for testing the references between objects.
+    '''
+    def test_references(self):
+        '''References are found in attributes and lists
+        '''
+        self.assertEqual(
+            [('acl_sess', 'guest'), ('acl_sess', 'logon-control')],
+            depgraph.references('role', config['role'][0]))
+        self.assertEqual(
+            [('netdst', 'guests'), ('netdst', 'dns'), ('netsvc', 'svc-dns')],
+            depgraph.references('acl_sess', config['acl_sess'][0]))
+        self.assertEqual([], depgraph.references('netdst', config['netdst'][0]))
+
+    def test_cycle(self):
+        '''Cycles are reported
+        '''
+        graph = DependencyGraph()
+        graph.add('role', {'rname': 'a', 'role__acl': [{'pname': 'b'}]})
+        graph.add('acl_sess', {'accname': 'b'})
+        self.assertEqual([[('acl_sess', 'b')], [('role', 'a')]], graph.levels())
+
+        depgraph.register_reference('acl_sess', 'role.name', 'role')
+        self.addCleanup(depgraph.REFERENCES['acl_sess'].pop)
+        graph.add('acl_sess', {'accname': 'b', 'role': {'name': 'a'}})
+
+        with self.assertRaises(ValueError):
+            graph.levels()
+
+
+class TestDependencyGraph(unittest.TestCase):
+    '''Test class for testing DependencyGraph.
+    '''
+    def setUp(self):
+        self.addCleanup(CircuitBreaker._registry.clear)
+        self.posted = list()
+        self.lock = threading.Lock()
+
+        responses.add(responses.POST, LOGIN_URL, status=200, json=login_resp)
+        responses.add_callback(responses.GET, OBJECT_URL, callback=self.get_callback)
+        responses.add_callback(responses.POST, OBJECT_URL, callback=self.post_callback)
+
+    def get_callback(self, request):
+        name = OBJECT_URL.match(request.url).group(1)
+        conditions = json.loads(parse_qs(urlsplit(request.url).query)['filter'][0])
+        (qualified_key, opers), = conditions[0].items()
+        key = qualified_key.split('.', 1)[1]
+
+        objs = [obj for obj in config.get(name, []) if obj.get(key) in opers['$eq']]
+        return (200, {}, json.dumps({'_data': {name: objs}}))
+
+    def post_callback(self, request):
+        name = OBJECT_URL.match(request.url).group(1)
+        with self.lock:
+            self.posted.append((name, json.loads(request.body)))
+
+        if name == 'ssid_prof':
+            return (200, {}, json.dumps({'_global_result': {'status': 1, 'status_str': 'Invalid ESSID'}}))
+        return (200, {}, json.dumps({'_global_result': {'status': 0}}))
+
+    @responses.activate
+    def test_fetch(self):
+        '''The closure is fetched with one GET per object name and level
+        '''
+        mmc = MMClient(BASE_URL, "care", "pare")
+        mmc.comms()
+
+        graph = mmc.dependencies('virtual_ap', 'corp', config_path='/md/EU')
+
+        self.assertEqual(12, len(graph))
+        self.assertIn(('netdst', 'dns'), graph)
+        self.assertEqual(set(), graph.missing)
+        # virtual_ap, ssid_prof and aaa_prof, server_group_prof and role,
+        # rad_server and acl_sess, netdst and netsvc
+        self.assertEqual(9, len([c for c in responses.calls if c.request.method == 'GET']))
+
+        self.assertEqual([
+            [('acl_sess', 'logon-control'), ('netdst', 'dns'), ('netdst', 'guests'), ('netsvc', 'svc-dns'), ('rad_server', 'radius1'), ('rad_server', 'radius2'), ('ssid_prof', 'corp')],
+            [('acl_sess', 'guest'), ('server_group_prof', 'corp')],
+            [('role', 'guest')],
+            [('aaa_prof', 'corp')],
+            [('virtual_ap', 'corp')],
+        ], graph.levels())
+
+    @responses.activate
+    def test_push(self):
+        '''Objects are POSTed after the objects they reference
+        '''
+        mmc = MMClient(BASE_URL, "care", "pare")
+        mmc.comms()
+
+        graph = mmc.dependencies('virtual_ap', 'corp')
+        report = graph.push(mmc, config_path='/md/US')
+
+        posted = [name for name, _ in self.posted]
+        self.assertLess(posted.index('netdst'), posted.index('acl_sess'))
+        self.assertLess(posted.index('acl_sess'), posted.index('role'))
+        self.assertLess(posted.index('rad_server'), posted.index('server_group_prof'))
+        self.assertLess(posted.index('role'), posted.index('aaa_prof'))
+        # Predefined objects aren't POSTed
+        self.assertNotIn('netsvc', posted)
+
+        self.assertEqual([('ssid_prof', 'corp')], [error[:2] for error in report['errors']])
+        self.assertEqual([('virtual_ap', 'corp')], report['skipped'])
+        self.assertNotIn('virtual_ap', posted)
+        self.assertEqual(8, len(report['posted']))
+
+        config_paths = {
+            parse_qs(urlsplit(call.request.url).query)['config_path'][0]
+            for call in responses.calls if call.request.method == 'POST' and OBJECT_URL.match(call.request.url)}
+        self.assertEqual({'/md/US'}, config_paths)
+
+
+if __name__ == "__main__":
+    unittest.main()
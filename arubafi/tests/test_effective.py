@@ -0,0 +1,98 @@
+import json
+import responses
+import unittest
+from urllib.parse import parse_qs, urlsplit
+
+from arubafi.mmclient import MMClient
+from .test_data.mmclient_data import *
+
+BASE_URL = "https://test.arubamm.com"
+BASE_API_URL = BASE_URL + ":4343/v1"
+LOGIN_URL = BASE_API_URL + "/api/login"
+HIERARCHY_URL = BASE_API_URL + "/configuration/object/node_hierarchy"
+AP_SYS_PROF_URL = BASE_API_URL + "/configuration/object/ap_sys_prof"
+
+# The ap_sys_prof objects configured at each config path
+local_ap_sys_profs = {
+    '/md': [{'profile-name': 'default', 'lms_ip': {'ipaddr': '10.0.0.1'}, 'ap_console_protect': {}}],
+    '/md/EU': [{'profile-name': 'default', 'lms_ip': {'ipaddr': '10.1.0.1'}}, {'profile-name': 'eu'}],
+    '/md/EU/DE/site-01': [{'profile-name': 'default', 'bkup_lms_ip': {'ipaddr': '10.1.1.2'}}],
+}
+
+
+def ap_sys_prof_callback(request):
+    '''Returns the local objects and, flagged as inherited, an out of date
+    copy of the objects of the nodes above.
+    '''
+    config_path = parse_qs(urlsplit(request.url).query)['config_path'][0]
+
+    if config_path == '/md/EU/lab':
+        return (200, {}, json.dumps({'_global_result': {'status': 1, 'status_str': 'Error'}}))
+
+    objs = list(local_ap_sys_profs.get(config_path, list()))
+    for path, path_objs in local_ap_sys_profs.items():
+        if config_path.startswith(path + '/'):
+            objs.extend({**obj, 'lms_ip': {'ipaddr': 'stale'}, '_flags': {'inherited': True}} for obj in path_objs)
+
+    return (200, {}, json.dumps({'_data': {'ap_sys_prof': objs}}))
+
+
+class TestEffectiveConfig(unittest.TestCase):
+    '''Test class for testing EffectiveConfig.
+    '''
+    def setUp(self):
+        responses.add(responses.POST, LOGIN_URL, status=200, json=login_resp)
+        responses.add(responses.GET, HIERARCHY_URL, status=200, json=node_hierarchy)
+        responses.add_callback(responses.GET, AP_SYS_PROF_URL, callback=ap_sys_prof_callback)
+
+    def ap_sys_prof_calls(self):
+        return len([c for c in responses.calls if c.request.url.startswith(AP_SYS_PROF_URL)])
+
+    @responses.activate
+    def test_effective(self):
+        '''Local objects are merged down the hierarchy with one GET per node
+        '''
+        mmc = MMClient(BASE_URL, "care", "pare")
+        mmc.comms()
+
+        config = mmc.effective_config(['ap_sys_prof'])
+        # /md, /md/EU, DE, DE/site-01 and its device, FR, FR/site-01 and lab
+        self.assertEqual(8, self.ap_sys_prof_calls())
+
+        self.assertEqual(
+            {'profile-name': 'default', 'lms_ip': {'ipaddr': '10.1.0.1'}, 'ap_console_protect': {}, 'bkup_lms_ip': {'ipaddr': '10.1.1.2'}},
+            config.get('/md/EU/DE/site-01/20:4c:03:00:00:01', 'ap_sys_prof', 'default'))
+        self.assertEqual({'ipaddr': '10.1.0.1'}, config.get('/md/EU/FR/site-01', 'ap_sys_prof', 'default')['lms_ip'])
+        self.assertEqual({'ipaddr': '10.0.0.1'}, config.get('/md', 'ap_sys_prof', 'default')['lms_ip'])
+        self.assertEqual(['default', 'eu'], sorted(config.effective('/md/EU/DE', 'ap_sys_prof')))
+        self.assertIsNone(config.get('/md', 'ap_sys_prof', 'eu'))
+        self.assertEqual(['/md', '/md/EU', '/md/EU/DE/site-01'], config.sources('/md/EU/DE/site-01', 'ap_sys_prof', 'default'))
+
+        # Nodes sharing their parent's config share its objects
+        self.assertIs(config.effective('/md/EU/FR', 'ap_sys_prof'), config.effective('/md/EU', 'ap_sys_prof'))
+        self.assertEqual(8, self.ap_sys_prof_calls())
+
+        self.assertEqual([('/md/EU/lab', 'ap_sys_prof')], list(config.errors))
+
+        with self.assertRaises(KeyError):
+            config.effective('/mm', 'ap_sys_prof')
+
+    @responses.activate
+    def test_root(self):
+        '''The objects inherited into the root are kept
+        '''
+        mmc = MMClient(BASE_URL, "care", "pare")
+        mmc.comms()
+
+        config = mmc.effective_config(['ap_sys_prof'], root='/md/EU/DE', include_devices=False)
+
+        self.assertEqual(2, self.ap_sys_prof_calls())
+        self.assertEqual({'ipaddr': 'stale'}, config.get('/md/EU/DE', 'ap_sys_prof', 'default')['lms_ip'])
+        self.assertIn('bkup_lms_ip', config.get('/md/EU/DE/site-01', 'ap_sys_prof', 'default'))
+
+        with self.assertRaises(ValueError):
+            mmc.effective_config(['node_hierarchy'])
+
+
+if __name__ == "__main__":
+    unittest.main()
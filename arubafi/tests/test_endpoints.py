@@ -0,0 +1,114 @@
+import json
+import responses
+import unittest
+
+from arubafi import endpoints
+from arubafi.endpoints import Endpoint, get_endpoint, object_key
+from arubafi.mmclient import MMClient
+from .test_data.mmclient_data import *
+
+BASE_URL = "https://test.arubamm.com"
+BASE_API_URL = BASE_URL + ":4343/v1"
+LOGIN_URL = BASE_API_URL + "/api/login"
+OBJECT_URL = BASE_API_URL + "/configuration/object/"
+
+
+class TestEndpoints(unittest.TestCase):
+    '''Test class for testing the endpoint registry.
+    '''
+    def test_endpoint(self):
+        '''Everything derived from the path is the same with or without the
+        leading /
+        '''
+        endpoint = Endpoint('/configuration/object/ap_group')
+
+        self.assertEqual('configuration/object/ap_group', endpoint.path)
+        self.assertEqual('/configuration/object/ap_group', endpoint.url_path)
+        self.assertEqual('ap_group', endpoint.search)
+        self.assertIs(get_endpoint('configuration/object/netdst'), get_endpoint('/configuration/object/netdst'))
+
+    def test_object_key(self):
+        '''Registered objects have their naming key, the rest profile-name
+        '''
+        self.assertEqual('accname', object_key('acl_sess'))
+        self.assertEqual('profile-name', object_key('not_registered'))
+        self.assertNotIn('node_hierarchy', endpoints.config_objects())
+
+
+class TestMMClientResourceMethods(unittest.TestCase):
+    '''Test class for testing the generated MMClient resource methods.
+    '''
+    @responses.activate
+    def setUp(self):
+        responses.add(responses.POST, LOGIN_URL, status=200, json=login_resp)
+
+        self.mmc = MMClient(BASE_URL, "care", "pare")
+        self.mmc.comms()
+
+    def test_methods_generated(self):
+        '''Every registered endpoint has its resource method with its docs
+        '''
+        for name, endpoint in endpoints.RESOURCE_METHODS.items():
+            method = getattr(MMClient, name)
+            self.assertEqual(name, method.__name__)
+            self.assertIn(f'`{endpoint.search}`', method.__doc__)
+
+    @responses.activate
+    def test_get(self):
+        '''A GET goes to the object's URL with its filter
+        '''
+        responses.add(responses.GET, OBJECT_URL + "netdst", status=200, json={'_data': {'netdst': []}})
+
+        jresp, err = self.mmc.netdst(config_path='/md', profile_name='dst1')
+
+        self.assertIsNone(err)
+        params = responses.calls[0].request.params
+        self.assertEqual(
+            [{'netdst.profile-name': {'$eq': ['dst1']}}],
+            json.loads(params['filter']))
+
+    @responses.activate
+    def test_post_alias(self):
+        '''Aliased methods POST to the object they're aliased to
+        '''
+        responses.add(responses.POST, OBJECT_URL + "ssid_prof", status=200, json={'_global_result': {'status': 0}})
+
+        jresp, err = self.mmc.wlan_ssid_profile(data={'profile-name': 'ssid1'}, config_path='/md')
+
+        self.assertIsNone(err)
+        self.assertEqual({'profile-name': 'ssid1'}, json.loads(responses.calls[0].request.body))
+
+    def test_data_required(self):
+        '''POST only endpoints can't be called without data
+        '''
+        with self.assertRaises(TypeError):
+            self.mmc.add_configuration_device()
+
+    @responses.activate
+    def test_register_endpoint(self):
+        '''A registered endpoint gets its resource method
+        '''
+        MMClient.register_endpoint('int_vlan', key='id')
+        self.addCleanup(delattr, MMClient, 'int_vlan')
+        self.addCleanup(endpoints.RESOURCE_METHODS.pop, 'int_vlan')
+
+        responses.add(responses.GET, OBJECT_URL + "int_vlan", status=200, json={'_data': {'int_vlan': []}})
+
+        jresp, err = self.mmc.int_vlan(config_path='/md')
+
+        self.assertEqual({'_data': {'int_vlan': []}}, jresp)
+        self.assertEqual('id', object_key('int_vlan'))
+
+    @responses.activate
+    def test_resource_path(self):
+        '''`resource` still takes a path string
+        '''
+        responses.add(responses.GET, OBJECT_URL + "vlan_id", status=200, json={'_data': {'vlan_id': []}})
+
+        jresp, err = self.mmc.resource('GET', '/configuration/object/vlan_id', config_path='/md')
+
+        self.assertEqual({'_data': {'vlan_id': []}}, jresp)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,139 @@
+import unittest
+
+from arubafi import filters
+
+netdst = {
+    'dstname': 'dns',
+    'netdst__host': [{'address': '10.0.0.53'}, {'address': '10.1.0.53'}],
+    'netdst__network': [{'address': '10.2.0.0', 'netmask': '255.255.255.0'}],
+    'invert': False,
+    '_flags': {'inherited': False},
+}
+
+
+class TestFilters(unittest.TestCase):
+    '''Test class for testing the filter evaluator.
+    '''
+    def match(self, filter):
+        return filters.matches(netdst, filters.parse(filter))
+
+    def test_eq(self):
+        '''$eq matches any value exactly and $neq none of them
+        '''
+        self.assertTrue(self.match([{"netdst.dstname": {"$eq": ["dhcp", "dns"]}}]))
+        self.assertFalse(self.match([{"netdst.dstname": {"$eq": ["dn"]}}]))
+        self.assertTrue(self.match([{"netdst.netdst__host.address": {"$eq": ["10.1.0.53"]}}]))
+        self.assertTrue(self.match([{"netdst.invert": {"$eq": ["false"]}}]))
+        self.assertTrue(self.match([{"netdst.dstname": {"$neq": ["dhcp"]}}]))
+        self.assertFalse(self.match([{"netdst.netdst__host.address": {"$neq": ["10.1.0.53"]}}]))
+        self.assertTrue(self.match([{"netdst.missing": {"$neq": ["dns"]}}]))
+
+    def test_in(self):
+        '''$in matches any value containing a pattern and $nin none
+        '''
+        self.assertTrue(self.match([{"netdst.dstname": {"$in": ["n"]}}]))
+        self.assertTrue(self.match([{"netdst.netdst__host.address": {"$in": ["10.1."]}}]))
+        self.assertFalse(self.match([{"netdst.dstname": {"$in": ["dhcp"]}}]))
+        self.assertTrue(self.match([{"netdst.dstname": {"$nin": ["dhcp"]}}]))
+        self.assertFalse(self.match([{"netdst.dstname": {"$nin": ["dhcp", "dn"]}}]))
+
+    def test_compare(self):
+        '''Numbers are compared as numbers and anything else as text
+        '''
+        obj = {'int_vlan_mtu': {'value': 9000}, 'id': '100'}
+
+        self.assertTrue(filters.matches(obj, filters.parse([{"int_vlan.int_vlan_mtu.value": {"$gt": ["1500"]}}])))
+        self.assertTrue(filters.matches(obj, filters.parse([{"int_vlan.int_vlan_mtu.value": {"$lte": [9000]}}])))
+        self.assertFalse(filters.matches(obj, filters.parse([{"int_vlan.int_vlan_mtu.value": {"$lt": [9000]}}])))
+        # 100 as a number, not '100' < '20' as text
+        self.assertTrue(filters.matches(obj, filters.parse([{"int_vlan.id": {"$gte": ["20"]}}])))
+        self.assertTrue(self.match([{"netdst.dstname": {"$lt": ["e"]}}]))
+
+    def test_parse(self):
+        '''Filters are parsed from JSON, and all conditions must match
+        '''
+        conditions = filters.parse('[{"netdst.dstname": {"$eq": ["dns"]}}, {"netdst.invert": {"$eq": [true]}}]')
+        self.assertEqual(2, len(conditions))
+        self.assertFalse(filters.matches(netdst, conditions))
+        self.assertTrue(filters.matches(netdst, conditions[:1]))
+        self.assertTrue(filters.matches(netdst, filters.parse(None)))
+
+        with self.assertRaises(ValueError):
+            filters.parse([{"netdst.dstname": {"$like": ["dns"]}}])
+        with self.assertRaises(ValueError):
+            filters.parse([{"dstname": {"$eq": ["dns"]}}])
+
+    def test_sort_key(self):
+        self.assertEqual(('netdst', ('dstname',), True), filters.sort_key('-netdst.dstname'))
+        self.assertEqual(('netdst', ('dstname',), False), filters.sort_key('+netdst.dstname'))
+        self.assertLess(filters.sort_value({'a': 2}, ('a',)), filters.sort_value({'a': 10}, ('a',)))
+        self.assertIsNone(filters.sort_value({}, ('a',)))
+
+
+class TestFilter(unittest.TestCase):
+    '''Test class for testing the Filter builder.
+    '''
+    def test_build(self):
+        '''Clauses are qualified, serialised once and don't change the filter
+        '''
+        base = filters.Filter('netdst')
+        dns = base.eq('dstname', 'dns', 'dhcp').contains('netdst.netdst__host.address', ['10.1.'])
+
+        self.assertEqual(0, len(base))
+        self.assertEqual(
+            [{'netdst.dstname': {'$eq': ['dns', 'dhcp']}}, {'netdst.netdst__host.address': {'$in': ['10.1.']}}],
+            dns.to_list())
+        self.assertEqual('[{"netdst.dstname":{"$eq":["dns","dhcp"]}},{"netdst.netdst__host.address":{"$in":["10.1."]}}]', dns.json)
+        self.assertIs(dns.json, dns.json)
+        self.assertEqual(dns, filters.Filter('netdst').eq('netdst.dstname', ['dns', 'dhcp']).contains('netdst__host.address', '10.1.'))
+
+        with self.assertRaises(ValueError):
+            base.where('dstname', '$like', 'dns')
+        with self.assertRaises(ValueError):
+            base.eq('dstname')
+        with self.assertRaises(ValueError):
+            base.eq('', 'dns')
+        with self.assertRaises(ValueError):
+            filters.Filter('netdst.dstname')
+
+    def test_foreign_keys(self):
+        '''Keys qualified with another object are rejected, and filters with
+        them can't be used
+        '''
+        with self.assertRaises(ValueError):
+            filters.Filter('netdst').eq('ap_group.profile-name', 'default')
+
+        virtual_ap = filters.Filter('ap_group').eq('ap_group.virtual_ap.profile-name', 'guest')
+        self.assertEqual([{'ap_group.virtual_ap.profile-name': {'$eq': ['guest']}}], virtual_ap.to_list())
+        virtual_ap.validate('ap_group')
+
+        with self.assertRaises(ValueError):
+            filters.Filter('netdst', [('ap_group.profile-name', '$eq', ('default',))]).validate('netdst')
+
+    def test_matches(self):
+        '''Filters match objects like the conditions they're made of
+        '''
+        self.assertTrue(filters.Filter('netdst').eq('dstname', 'dns').matches(netdst))
+        self.assertFalse(filters.Filter('netdst').eq('dstname', 'dns').gt('netdst__host.address', '10.2').matches(netdst))
+        self.assertTrue(filters.Filter('netdst').not_contains('dstname', 'dhcp').matches(netdst))
+        self.assertEqual(
+            [netdst],
+            filters.Filter('netdst').lte('netdst__network.netmask', '255.255.255.0').filter([netdst, {'dstname': 'ntp'}]))
+
+        conditions = filters.parse(filters.Filter('netdst').neq('dstname', 'dhcp'))
+        self.assertEqual('netdst.dstname', conditions[0].qualified_key)
+
+    def test_profile_name_filter(self):
+        '''profile_name filters are built once for the same names
+        '''
+        ap_group = filters.profile_name_filter('ap_group', '$eq', ('default',))
+        self.assertIs(ap_group, filters.profile_name_filter('ap_group', '$eq', ('default',)))
+        self.assertEqual('[{"ap_group.profile-name":{"$eq":["default"]}}]', ap_group.json)
+        ap_group.validate('ap_group')
+
+        with self.assertRaises(ValueError):
+            ap_group.validate('virtual_ap')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import responses
+import unittest
+
+from arubafi.fleet import MMFleet
+from .test_data.mmclient_data import *
+
+HOSTS = ["https://mm01.arubamm.com", "https://mm02.arubamm.com"]
+
+
+def api_url(host, endpoint):
+    return f"{host}:4343/v1/{endpoint}"
+
+
+class TestMMFleet(unittest.TestCase):
+    '''Test class for testing MMFleet.
+    '''
+    @responses.activate
+    def setUp(self):
+        '''MMFleet instance logged into both MMs.
+        '''
+        for host in HOSTS:
+            responses.add(responses.POST, api_url(host, "api/login"), status=200, json=login_resp)
+
+        self.fleet = MMFleet(HOSTS, "care", "pare")
+        self.login_errors = self.fleet.comms()
+
+    def test_comms(self):
+        '''Every host must get its own logged in client
+        '''
+        self.assertEqual({}, self.login_errors)
+        self.assertEqual(HOSTS, list(self.fleet.clients))
+
+        for host in HOSTS:
+            self.assertEqual('fntoken', self.fleet[host]._access_token)
+
+    @responses.activate
+    def test_comms_login_error(self):
+        '''A failed login must only be recorded for that host
+        '''
+        responses.add(responses.POST, api_url("https://mm03.arubamm.com", "api/login"), status=500)
+
+        fleet = MMFleet(HOSTS + ["https://mm03.arubamm.com"], "care", "pare")
+        fleet.clients = dict(self.fleet.clients)
+        login_errors = fleet.comms()
+
+        self.assertEqual(["https://mm03.arubamm.com"], list(login_errors))
+        self.assertEqual(HOSTS, list(fleet.clients))
+
+    @responses.activate
+    def test_run_all_hosts(self):
+        '''A resource method called on the fleet must run on every host
+        '''
+        for host in HOSTS:
+            responses.add(
+                responses.GET,
+                api_url(host, "configuration/object/ap_group"),
+                status=200,
+                json={'_data': {'ap_group': [{'profile-name': host}]}})
+
+        results, errors = self.fleet.ap_group(config_path='/md')
+
+        self.assertEqual({}, errors)
+        for host in HOSTS:
+            jresp, jresp_err = results[host]
+            self.assertEqual(host, jresp['_data']['ap_group'][0]['profile-name'])
+            self.assertIsNone(jresp_err)
+
+    @responses.activate
+    def test_run_subset(self):
+        '''Only the requested hosts are called and unknown hosts are errors
+        '''
+        responses.add(
+            responses.GET,
+            api_url(HOSTS[1], "configuration/object/ap_group"),
+            status=200,
+            json={'_data': {'ap_group': []}})
+
+        results, errors = self.fleet.run('ap_group', hosts=[HOSTS[1], "https://unknown.com"])
+
+        self.assertEqual([HOSTS[1]], list(results))
+        self.assertIsInstance(errors["https://unknown.com"], KeyError)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,136 @@
+import threading
+import time
+import responses
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from arubafi.governor import Governor
+from arubafi.mmclient import MMClient
+from .test_data.mmclient_data import *
+
+BASE_URL = "https://test.arubamm.com"
+BASE_API_URL = BASE_URL + ":4343/v1"
+LOGIN_URL = BASE_API_URL + "/api/login"
+AP_GROUP_URL = BASE_API_URL + "/configuration/object/ap_group"
+NETDST_URL = BASE_API_URL + "/configuration/object/netdst"
+
+
+class TestGovernor(unittest.TestCase):
+    '''Test class for testing the request Governor.
+    '''
+    def setUp(self):
+        self.addCleanup(Governor._registry.clear)
+
+    def test_rate(self):
+        '''Requests over the burst wait for their token
+        '''
+        governor = Governor(rate=50, burst=2)
+
+        start = time.monotonic()
+        for _ in range(6):
+            with governor.slot():
+                pass
+
+        # 2 requests go at once, the other 4 are 20ms apart
+        self.assertGreaterEqual(time.monotonic() - start, 0.07)
+        self.assertEqual(6, governor.stats()['requests'])
+        self.assertGreater(governor.stats()['queued_seconds'], 0)
+
+    def test_max_in_flight(self):
+        '''No more than `max_in_flight` requests are in flight at once
+        '''
+        governor = Governor(max_in_flight=2)
+        lock = threading.Lock()
+        in_flight = list()
+        peak = list()
+
+        def request():
+            with governor.slot():
+                with lock:
+                    in_flight.append(1)
+                    peak.append(len(in_flight))
+                time.sleep(0.01)
+                with lock:
+                    in_flight.pop()
+
+        with ThreadPoolExecutor(max_workers=6) as executor:
+            for _ in range(12):
+                executor.submit(request)
+
+        self.assertEqual(2, max(peak))
+        self.assertEqual(0, governor.stats()['in_flight'])
+
+    def test_for_host(self):
+        '''Clients of the same host share its governor
+        '''
+        governor = Governor.for_host('mm:4343', rate=10)
+
+        self.assertIs(governor, Governor.for_host('mm:4343', rate=10))
+        self.assertIsNot(governor, Governor.for_host('mm2:4343', rate=10))
+
+        Governor.for_host('mm:4343', rate=5, max_in_flight=3)
+        self.assertEqual((5, 3), (governor.rate, governor.max_in_flight))
+
+        # Looser or no limits don't lift the ones other clients rely on
+        Governor.for_host('mm:4343', rate=None, max_in_flight=8)
+        Governor.for_host('mm:4343', rate=50)
+        self.assertEqual((5, 3, 5), (governor.rate, governor.max_in_flight, governor.burst))
+
+        with self.assertRaises(ValueError):
+            Governor(rate=0)
+
+    def test_configure_keeps_tokens(self):
+        '''Changing the limits doesn't refill the token bucket
+        '''
+        governor = Governor(rate=1, burst=2)
+        for _ in range(2):
+            with governor.slot():
+                pass
+
+        Governor._registry['mm:4343'] = governor
+        Governor.for_host('mm:4343', rate=1, max_in_flight=4)
+        governor.configure(rate=1, burst=2)
+
+        self.assertLess(governor._tokens, 1)
+
+    @responses.activate
+    def test_stream_holds_slot(self):
+        '''A streamed GET holds its slot until its body is read
+        '''
+        responses.add(responses.POST, LOGIN_URL, status=200, json=login_resp)
+        responses.add(responses.GET, NETDST_URL, status=200, json={'_data': {'netdst': [{'dstname': 'a'}, {'dstname': 'b'}]}})
+
+        mmc = MMClient(BASE_URL, "care", "pare", max_in_flight=1)
+        mmc.comms()
+
+        netdsts, err = mmc.netdst(stream=True)
+        self.assertEqual({'dstname': 'a'}, next(netdsts))
+        self.assertEqual(1, mmc.governor.stats()['in_flight'])
+
+        self.assertEqual([{'dstname': 'b'}], list(netdsts))
+        self.assertEqual(0, mmc.governor.stats()['in_flight'])
+
+    @responses.activate
+    def test_mmclient(self):
+        '''Clients of the same MM share the governor and record the time
+        requests were queued
+        '''
+        responses.add(responses.POST, LOGIN_URL, status=200, json=login_resp)
+        responses.add(responses.GET, AP_GROUP_URL, status=200, json={'_data': {'ap_group': []}})
+
+        mmc = MMClient(BASE_URL, "care", "pare", max_in_flight=1)
+        mmc.comms()
+        other = MMClient(BASE_URL, "care", "pare", max_in_flight=1)
+        other.comms()
+
+        self.assertIs(mmc.governor, other.governor)
+
+        mmc.ap_group()
+
+        queued = mmc.metrics.snapshot()[BASE_URL]['queued']
+        self.assertEqual(2, queued['count'])
+        self.assertEqual(3, mmc.governor.stats()['requests'])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,138 @@
+import responses
+import unittest
+
+from arubafi.hierarchy import NodeTree
+from arubafi.mmclient import MMClient
+from .test_data.mmclient_data import *
+
+BASE_URL = "https://test.arubamm.com"
+BASE_API_URL = BASE_URL + ":4343/v1"
+LOGIN_URL = BASE_API_URL + "/api/login"
+HIERARCHY_URL = BASE_API_URL + "/configuration/object/node_hierarchy"
+AP_GROUP_URL = BASE_API_URL + "/configuration/object/ap_group"
+ADD_DEVICE_URL = BASE_API_URL + "/configuration/object/add_configuration_device"
+
+
+class TestNodeTree(unittest.TestCase):
+    '''Test class for testing NodeTree.
+    '''
+    def setUp(self):
+        self.tree = NodeTree(node_hierarchy)
+
+    def test_lookup(self):
+        '''Nodes and devices are indexed by config path
+        '''
+        self.assertIn('/md/EU/lab', self.tree)
+        self.assertIn('/md/EU/lab/', self.tree)
+        self.assertIn('/', self.tree)
+        self.assertNotIn('/md/US', self.tree)
+        self.assertEqual(11, len(self.tree))
+
+        device = self.tree.get('/md/EU/DE/site-01/20:4c:03:00:00:01')
+        self.assertEqual('device', device.type)
+        self.assertEqual('md-de-01', device.device['name'])
+        self.assertEqual('/md/EU/DE/site-01', device.parent.path)
+        self.assertIsNone(self.tree.get('/md/US'))
+
+        # The `node_hierarchy` response is accepted too
+        self.assertIn('/md/EU/lab', NodeTree({'_data': {'node_hierarchy': node_hierarchy}}))
+
+    def test_subtree(self):
+        '''Subtrees are listed parents first
+        '''
+        self.assertEqual(
+            ['/md/EU', '/md/EU/DE', '/md/EU/DE/site-01', '/md/EU/DE/site-01/20:4c:03:00:00:01',
+             '/md/EU/FR', '/md/EU/FR/site-01', '/md/EU/lab'],
+            self.tree.subtree('/md/EU'))
+        self.assertNotIn('/md/EU/DE/site-01/20:4c:03:00:00:01', self.tree.subtree('/md/EU', include_devices=False))
+        self.assertEqual(['/', '/mm', '/md'], self.tree.paths(include_devices=False)[:3])
+
+        with self.assertRaises(KeyError):
+            self.tree.subtree('/md/US')
+
+    def test_ancestors(self):
+        '''Ancestors are listed root first
+        '''
+        self.assertEqual(['/', '/md', '/md/EU', '/md/EU/DE'], self.tree.ancestors('/md/EU/DE/site-01'))
+        self.assertEqual([], self.tree.ancestors('/'))
+
+    def test_glob(self):
+        '''Wildcards match within a segment and ** across segments
+        '''
+        self.assertEqual(['/md/EU/DE/site-01', '/md/EU/FR/site-01'], self.tree.glob('/md/EU/*/site-*'))
+        self.assertEqual(['/md/EU/lab'], self.tree.glob('/md/*/lab'))
+        self.assertEqual([], self.tree.glob('/md/lab'))
+        self.assertEqual(['/md/EU/lab'], self.tree.glob('/md/**/lab'))
+        self.assertEqual(['/md/EU/DE/site-01', '/md/EU/FR/site-01'], self.tree.glob('/**/site-01'))
+        self.assertEqual(['/md/EU/DE', '/md/EU/FR'], self.tree.glob('/md/**/[DF]?'))
+
+    def test_validate(self):
+        '''Unknown config paths return an error like the MM's
+        '''
+        self.assertIsNone(self.tree.validate('/md/EU/lab'))
+        self.assertIsNone(self.tree.validate(None))
+        self.assertEqual(
+            {'status': -1, 'status_str': "Unknown config_path '/md/EU/lba'"},
+            self.tree.validate('/md/EU/lba'))
+
+    def test_deep(self):
+        '''Hierarchies deeper than the recursion limit are indexed
+        '''
+        root = {"name": "/", "type": "root", "childnodes": []}
+        node = root
+        for i in range(2000):
+            child = {"name": f"n{i}", "type": "group", "childnodes": []}
+            node["childnodes"].append(child)
+            node = child
+
+        tree = NodeTree(root)
+        self.assertEqual(2001, len(tree))
+        self.assertEqual(2000, len(tree.ancestors(tree.paths()[-1])))
+
+
+class TestMMClientHierarchy(unittest.TestCase):
+    '''Test class for testing the MMClient node hierarchy.
+    '''
+    def setUp(self):
+        responses.add(responses.POST, LOGIN_URL, status=200, json=login_resp)
+        responses.add(responses.GET, HIERARCHY_URL, status=200, json=node_hierarchy)
+
+    @responses.activate
+    def test_cached(self):
+        '''The hierarchy is fetched once, until it's refreshed or changed
+        '''
+        responses.add(responses.POST, ADD_DEVICE_URL, status=200, json={'_global_result': {'status': 0}})
+
+        mmc = MMClient(BASE_URL, "care", "pare")
+        mmc.comms()
+
+        tree = mmc.hierarchy()
+        self.assertIs(tree, mmc.hierarchy())
+        self.assertEqual(1, len([c for c in responses.calls if c.request.url.startswith(HIERARCHY_URL)]))
+
+        self.assertIsNot(tree, mmc.hierarchy(refresh=True))
+
+        mmc.add_configuration_device(data={'dev-model': 'A7010', 'mac-address': '20:4c:03:00:00:02', 'config-path': '/md/EU/lab'})
+        self.assertIsNone(mmc._hierarchy)
+
+    @responses.activate
+    def test_validate_config_path(self):
+        '''Requests to unknown config paths aren't sent
+        '''
+        responses.add(responses.GET, AP_GROUP_URL, status=200, json={'_data': {'ap_group': []}})
+
+        mmc = MMClient(BASE_URL, "care", "pare", validate_config_path=True)
+        mmc.comms()
+
+        jresp, err = mmc.ap_group(config_path='/md/EU/lba')
+        self.assertIsNone(jresp)
+        self.assertEqual(-1, err['status'])
+        self.assertFalse([c for c in responses.calls if c.request.url.startswith(AP_GROUP_URL)])
+
+        jresp, err = mmc.ap_group(config_path='/md/EU/lab')
+        self.assertIsNone(err)
+        self.assertEqual(1, len([c for c in responses.calls if c.request.url.startswith(AP_GROUP_URL)]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import unittest
+
+from arubafi import merkle
+
+paths = ['/md', '/md/EU', '/md/EU/DE', '/md/EU/FR', '/md/US']
+
+objects = {
+    '/md': {'netdst': {'dns': merkle.object_hash({'dstname': 'dns'})}},
+    '/md/EU/DE': {'ap_group': {'de': merkle.object_hash({'profile-name': 'de'})}},
+    '/md/US': {'ap_group': {'us': merkle.object_hash({'profile-name': 'us'})}},
+}
+
+
+def changed(changes):
+    return [(change['config_path'], change['name'], change['id'], change['change']) for change in changes]
+
+
+class TestMerkle(unittest.TestCase):
+    '''Test class for testing the snapshot hashes and drift.
+    '''
+    def test_object_hash(self):
+        '''Hashes ignore the key order, `_flags` and `_meta`
+        '''
+        self.assertEqual(
+            merkle.object_hash({'dstname': 'dns', 'invert': False}),
+            merkle.object_hash({'invert': False, 'dstname': 'dns', '_flags': {'inherited': False}}))
+        self.assertNotEqual(
+            merkle.object_hash({'dstname': 'dns', 'invert': False}),
+            merkle.object_hash({'dstname': 'dns', 'invert': True}))
+        self.assertEqual('dns', merkle.object_id('netdst', {'dstname': 'dns'}))
+        self.assertEqual(merkle.object_hash({'a': 1}), merkle.object_id('netdst', {'a': 1}))
+
+    def test_node_hashes(self):
+        '''A change changes the hashes of its node and the nodes above only
+        '''
+        old = merkle.SnapshotHashes.build('/md', paths, objects)
+        new_objects = dict(objects, **{'/md/EU/DE': {'ap_group': {'de': merkle.object_hash({'profile-name': 'de', 'ap_sys_prof': 'de'})}}})
+        new = merkle.SnapshotHashes.build('/md', paths, new_objects)
+
+        for path in ('/md', '/md/EU', '/md/EU/DE'):
+            self.assertNotEqual(old.nodes[path], new.nodes[path])
+        for path in ('/md/EU/FR', '/md/US'):
+            self.assertEqual(old.nodes[path], new.nodes[path])
+
+        self.assertEqual(old.type_hash('/md', 'netdst'), new.type_hash('/md', 'netdst'))
+        self.assertEqual(merkle.EMPTY, new.type_hash('/md/EU/FR', 'netdst'))
+
+        loaded = merkle.SnapshotHashes.from_dict(new.to_dict())
+        self.assertEqual(new.nodes, loaded.nodes)
+        self.assertEqual(new.children, loaded.children)
+
+    def test_drift(self):
+        '''Added, removed and changed objects and nodes are found
+        '''
+        old = merkle.SnapshotHashes.build('/md', paths, objects)
+        self.assertEqual([], merkle.drift(old, merkle.SnapshotHashes.build('/md', paths, objects)))
+
+        new_objects = {
+            '/md': {'netdst': {'dns': merkle.object_hash({'dstname': 'dns', 'invert': True}), 'ntp': merkle.object_hash({'dstname': 'ntp'})}},
+            '/md/EU/DE': {'ap_group': {'de': objects['/md/EU/DE']['ap_group']['de']}},
+            '/md/EU/IT': {'ap_group': {'it': merkle.object_hash({'profile-name': 'it'})}},
+        }
+        new = merkle.SnapshotHashes.build('/md', paths[:4] + ['/md/EU/IT'], new_objects)
+
+        self.assertEqual([
+            ('/md', 'netdst', 'dns', 'changed'),
+            ('/md', 'netdst', 'ntp', 'added'),
+            ('/md/EU/IT', 'ap_group', 'it', 'added'),
+            ('/md/US', 'ap_group', 'us', 'removed'),
+        ], changed(merkle.drift(old, new)))
+
+        with self.assertRaises(ValueError):
+            merkle.drift(old, merkle.SnapshotHashes.build('/md/EU', paths[1:], objects))
+
+    def test_errors(self):
+        '''Object types that failed to be fetched are unknown
+        '''
+        old = merkle.SnapshotHashes.build('/md', paths, objects)
+        new = merkle.SnapshotHashes.build('/md', paths, objects, errors=[('/md/EU/FR', 'netdst')])
+
+        self.assertEqual([('/md/EU/FR', 'netdst', None, 'unknown')], changed(merkle.drift(old, new)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+import os
+import tempfile
+import responses
+import unittest
+
+from arubafi.metrics import Histogram, Metrics, MetricsSink, PrometheusTextSink
+from arubafi.mmclient import MMClient
+from .test_data.mmclient_data import *
+
+BASE_URL = "https://test.arubamm.com"
+BASE_API_URL = BASE_URL + ":4343/v1"
+LOGIN_URL = BASE_API_URL + "/api/login"
+AP_GROUP_URL = BASE_API_URL + "/configuration/object/ap_group"
+
+
+class TestMetrics(unittest.TestCase):
+    '''Test class for testing Metrics and its sinks.
+    '''
+    def test_histogram(self):
+        '''Bucket counts are cumulative and values over the last bound land
+        in +Inf
+        '''
+        hist = Histogram(buckets=(0.1, 1))
+        for value in (0.05, 0.1, 0.5, 5):
+            hist.observe(value)
+
+        self.assertEqual(
+            {'buckets': [(0.1, 2), (1, 3), (float('inf'), 4)], 'sum': 5.65, 'count': 4},
+            hist.snapshot())
+
+    def test_snapshot(self):
+        '''Requests, bytes, retries, errors and relogins are kept per host
+        and endpoint
+        '''
+        metrics = Metrics()
+        metrics.observe('mm', '/ep', 0.1, nbytes=10)
+        metrics.observe('mm', '/ep', 0.2, nbytes=5, status=500, retries=2)
+        metrics.inc_relogins('mm')
+
+        stats = metrics.snapshot()['mm']
+
+        self.assertEqual(1, stats['relogins'])
+        self.assertEqual(2, stats['endpoints']['/ep']['requests'])
+        self.assertEqual(15, stats['endpoints']['/ep']['response_bytes'])
+        self.assertEqual(2, stats['endpoints']['/ep']['retries'])
+        self.assertEqual({'500': 1}, stats['endpoints']['/ep']['errors'])
+
+    def test_prometheus_sink(self):
+        '''The text format must have every sample with escaped labels and be
+        written to the file
+        '''
+        metrics = Metrics(buckets=(1,))
+        metrics.observe('mm', '/e"p', 0.5, nbytes=10, status='mm:1')
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'arubafi.prom')
+            text = metrics.export(PrometheusTextSink(path))
+
+            with open(path) as prom_file:
+                self.assertEqual(text, prom_file.read())
+
+        self.assertIn('# TYPE arubafi_request_duration_seconds histogram', text)
+        self.assertIn('arubafi_requests_total{host="mm",endpoint="/e\\"p"} 1', text)
+        self.assertIn('arubafi_request_duration_seconds_bucket{host="mm",endpoint="/e\\"p",le="+Inf"} 1', text)
+        self.assertIn('arubafi_errors_total{host="mm",endpoint="/e\\"p",status="mm:1"} 1', text)
+
+    def test_custom_sink(self):
+        '''Sinks must implement `export()`, which gets the snapshot
+        '''
+        class ListSink(MetricsSink):
+            def export(self, snapshot):
+                return list(snapshot)
+
+        class NoExportSink(MetricsSink):
+            pass
+
+        metrics = Metrics()
+        metrics.observe('mm', '/ep', 0.5)
+
+        self.assertEqual(['mm'], metrics.export(ListSink()))
+        with self.assertRaises(TypeError):
+            NoExportSink()
+
+
+class TestMMClientMetrics(unittest.TestCase):
+    '''Test class for testing the metrics recorded by MMClient.
+    '''
+    @responses.activate
+    def setUp(self):
+        responses.add(responses.POST, LOGIN_URL, status=200, json=login_resp)
+
+        self.mmc = MMClient(BASE_URL, "care", "pare")
+        self.mmc.comms()
+
+    @responses.activate
+    def test_requests_recorded(self):
+        '''Requests are recorded per endpoint and MM errors by their status
+        '''
+        responses.add(responses.GET, AP_GROUP_URL, status=200, json={'_data': {'ap_group': []}})
+        responses.add(responses.POST, AP_GROUP_URL, status=200, json={'_global_result': {'status': 1}})
+
+        self.mmc.ap_group(config_path='/md')
+        self.mmc.ap_group(config_path='/md/EU')
+        self.mmc.ap_group(data={'profile-name': 'x'})
+
+        endpoints = self.mmc.metrics.snapshot()[BASE_URL]['endpoints']
+
+        self.assertEqual(1, endpoints['/api/login']['requests'])
+        self.assertEqual(3, endpoints['/configuration/object/ap_group']['requests'])
+        self.assertEqual({'mm:1': 1}, endpoints['/configuration/object/ap_group']['errors'])
+        self.assertGreater(endpoints['/configuration/object/ap_group']['response_bytes'], 0)
+
+    @responses.activate
+    def test_http_error_recorded(self):
+        '''HTTP errors are recorded by their status code
+        '''
+        responses.add(responses.GET, AP_GROUP_URL, status=500)
+
+        with self.assertRaises(Exception):
+            self.mmc.ap_group()
+
+        endpoints = self.mmc.metrics.snapshot()[BASE_URL]['endpoints']
+        self.assertEqual({'500': 1}, endpoints['/configuration/object/ap_group']['errors'])
+
+
+if __name__ == "__main__":
+    unittest.main()
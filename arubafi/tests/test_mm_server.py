@@ -0,0 +1,138 @@
+import requests
+import time
+import unittest
+
+from arubafi.governor import Governor
+from arubafi.retry import CircuitBreaker, RetryPolicy
+from arubafi.testing import MMServer
+from .test_data.mmclient_data import *
+
+
+class TestMMServer(unittest.TestCase):
+    '''Test class for testing MMClient against the local MM emulator.
+    '''
+    def setUp(self):
+        self.addCleanup(CircuitBreaker._registry.clear)
+        self.addCleanup(Governor._registry.clear)
+
+        self.server = MMServer(hierarchy=node_hierarchy).start()
+        self.addCleanup(self.server.stop)
+
+        self.server.add('/md', 'netdst', {'dstname': 'dns', 'invert': False})
+        self.server.add('/md/EU', 'netdst', {'dstname': 'ntp'})
+        self.server.add('/md/EU/DE', 'netdst', {'dstname': 'dns', 'invert': True})
+
+    def test_login_logout(self):
+        '''Sessions are opened on login and closed on logout
+        '''
+        mmc = self.server.client()
+
+        self.assertTrue(mmc.mm_base_api_url.startswith('http://127.0.0.1'))
+        self.assertIn(mmc._access_token, self.server.sessions)
+
+        _, err = mmc.logout()
+        self.assertIsNone(err)
+        self.assertEqual({}, self.server.sessions)
+
+        mmc = self.server.client(password='wrong')
+        self.assertFalse(mmc._access_token)
+        self.assertEqual('Authentication failed', mmc._login()['status_str'])
+
+    def test_get(self):
+        '''Objects are inherited down the hierarchy and overridden locally
+        '''
+        mmc = self.server.client()
+
+        jresp, err = mmc.netdst(config_path='/md/EU/DE/site-01')
+        self.assertIsNone(err)
+        self.assertEqual([
+            {'dstname': 'dns', 'invert': True, '_flags': {'inherited': True}},
+            {'dstname': 'ntp', '_flags': {'inherited': True}},
+        ], jresp['_data']['netdst'])
+
+        jresp, _ = mmc.netdst(config_path='/md/EU/DE')
+        self.assertEqual({'dstname': 'dns', 'invert': True}, jresp['_data']['netdst'][1])
+
+        self.assertIn('/md/EU/DE/site-01/20:4c:03:00:00:01', mmc.hierarchy())
+
+    def test_filter_sort_limit(self):
+        '''Filters, sorts, limits and offsets are applied to the objects
+        '''
+        for name in ('a', 'b', 'c', 'd'):
+            self.server.add('/md/US', 'netdst', {'dstname': f'host-{name}'})
+        mmc = self.server.client()
+
+        jresp, _ = mmc.resource(
+            'GET', 'configuration/object/netdst', config_path='/md/US',
+            filter=[{'netdst.dstname': {'$in': ['host']}}], sort='-netdst.dstname', limit=2, offset=1)
+        self.assertEqual(['host-c', 'host-b'], [obj['dstname'] for obj in jresp['_data']['netdst']])
+        self.assertEqual(4, jresp['_meta']['total'])
+
+        objs, _ = mmc.resource('GET', 'configuration/object/netdst', config_path='/md/US', stream=True)
+        self.assertEqual(5, len(list(objs)))
+
+    def test_post_write_mem(self):
+        '''POSTs are merged into the objects and saved with write_memory
+        '''
+        mmc = self.server.client()
+
+        _, err = mmc.netdst(data={'dstname': 'ntp', 'invert': True}, config_path='/md/EU')
+        self.assertIsNone(err)
+        self.assertEqual([{'dstname': 'ntp', 'invert': True}], self.server.objects('/md/EU', 'netdst')[1:])
+        self.assertEqual({'/md/EU'}, self.server.pending)
+
+        _, err = mmc.write_mem('/md/EU')
+        self.assertIsNone(err)
+        self.assertEqual(set(), self.server.pending)
+        self.assertEqual(1, self.server.saved['/md/EU'])
+
+        _, err = mmc.netdst(data={'dstname': 'ntp', '_action': 'delete'}, config_path='/md/EU')
+        self.assertIsNone(err)
+        self.assertEqual(['dns'], [obj['dstname'] for obj in self.server.objects('/md/EU', 'netdst')])
+
+        _, err = mmc.netdst(data={'invert': True}, config_path='/md/EU')
+        self.assertEqual(1, err['status'])
+
+    def test_sessions(self):
+        '''Expired sessions are logged in again and the session limit is kept
+        '''
+        mmc = self.server.client()
+        self.server.expire_sessions()
+
+        jresp, err = mmc.netdst(config_path='/md')
+        self.assertIsNone(err)
+        self.assertEqual(1, len(jresp['_data']['netdst']))
+        self.assertEqual(1, mmc.relogins)
+        self.assertEqual(2, self.server.requests['POST api/login'])
+
+        self.server.max_sessions = 1
+        other = self.server.client()
+        self.assertFalse(other._access_token)
+        self.assertEqual('Maximum number of sessions reached', other._login()['status_str'])
+
+        self.server.session_timeout = 0.05
+        time.sleep(0.1)
+        self.assertIsNotNone(self.server.client()._access_token)
+
+    def test_faults(self):
+        '''Injected errors are retried and latency is added
+        '''
+        mmc = self.server.client(retry_policy=RetryPolicy(backoff=0, jitter=False))
+
+        self.server.fail_next(1)
+        jresp, err = mmc.netdst(config_path='/md')
+        self.assertEqual('dns', jresp['_data']['netdst'][0]['dstname'])
+        self.assertEqual(2, self.server.requests['GET configuration/object/netdst'])
+
+        self.server.fail_next(1, status=500)
+        with self.assertRaises(requests.HTTPError):
+            mmc.netdst(data={'dstname': 'ntp'}, config_path='/md')
+
+        self.server.latency = 0.05
+        start = time.perf_counter()
+        mmc.netdst(config_path='/md/EU')
+        self.assertGreaterEqual(time.perf_counter() - start, 0.05)
+
+
+if __name__ == "__main__":
+    unittest.main()
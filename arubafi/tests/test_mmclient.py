@@ -10,7 +10,8 @@ from mock import patch
 sys.path.append(os.path.dirname(__file__) + "/../")
 #print(sys.path)
 
-from mmclient import MMClient
+from arubafi.filters import Filter
+from arubafi.mmclient import MMClient
 from .test_data.mmclient_data import *
 
 BASE_URL = "https://test.arubamm.com"
@@ -93,6 +94,11 @@ class TestMMClient(unittest.TestCase):
             profile_name='test-01.ap_sys_prof',
             **modified_kwargs)
 
+        # The filter JSON is compared decoded, as its spacing depends on the
+        # client's codec
+        self.assertEqual(
+            json.loads(expected_params.pop('filter')),
+            json.loads(actual_params.pop('filter')))
         self.assertEqual(
             expected_params,
             actual_params,
@@ -112,6 +118,11 @@ class TestMMClient(unittest.TestCase):
                 profile_name='test-01.ap_sys_prof',
                 config_path='/md/Test',
                 **modified_kwargs)
+        # The filter JSON is compared decoded, as its spacing depends on the
+        # client's codec
+        self.assertEqual(
+            json.loads(expected_params.pop('filter')),
+            json.loads(actual_params.pop('filter')))
         self.assertEqual(
             expected_params,
             actual_params,
@@ -148,6 +159,11 @@ class TestMMClient(unittest.TestCase):
                 filter=[{"ap_sys_prof.profile-name":{"$in": ["a_profile"]}}],
                 config_path='/md/Test',
                 **modified_kwargs)
+        # The filter JSON is compared decoded, as its spacing depends on the
+        # client's codec
+        self.assertEqual(
+            json.loads(expected_params.pop('filter')),
+            json.loads(actual_params.pop('filter')))
         self.assertEqual(
             expected_params,
             actual_params,
@@ -173,6 +189,65 @@ class TestMMClient(unittest.TestCase):
             actual_params,
             f'\nExp params = {expected_params}\nAct params = {actual_params}')
 
+    def test_params_6(self):
+        '''Testing _params() by passing in a `Filter`, which must be of the
+        endpoint's objects
+        '''
+        expected_params = {
+            'config_path': '/md/Test',
+            'UIDARUBA': 'fntoken',
+            'filter': '[{"ap_sys_prof.profile-name":{"$in":["a_profile"]}}]'
+            }
+
+        modified_kwargs = self.mmc._kwargs_modify('configuration/object/ap_sys_prof')
+        actual_params = self.mmc._params(
+                filter=Filter('ap_sys_prof').contains('profile-name', 'a_profile'),
+                config_path='/md/Test',
+                **modified_kwargs)
+        self.assertEqual(
+            expected_params,
+            actual_params,
+            f'\nExp params = {expected_params}\nAct params = {actual_params}')
+
+        with self.assertRaises(ValueError):
+            self.mmc._params(filter=Filter('ap_group').eq('profile-name', 'default'), **modified_kwargs)
+
+    def test_params_7(self):
+        '''`profile_name` filters the cache can't build are sent as they are,
+        for the MM to answer
+        '''
+        modified_kwargs = self.mmc._kwargs_modify('configuration/object/ap_group')
+
+        unknown_oper = self.mmc._params(profile_name='default', filter_oper='$like', **modified_kwargs)
+        self.assertEqual([{'ap_group.profile-name': {'$like': ['default']}}], json.loads(unknown_oper['filter']))
+
+        unhashable = self.mmc._params(profile_name=[['default']], **modified_kwargs)
+        self.assertEqual([{'ap_group.profile-name': {'$eq': [['default']]}}], json.loads(unhashable['filter']))
+
+    @responses.activate
+    def test_stream_not_json(self):
+        '''A streamed GET of a response that isn't JSON returns an error and
+        records it, and one cut off after its first object raises
+        '''
+        netdst_url = BASE_API_URL + "/configuration/object/netdst"
+        responses.add(responses.GET, netdst_url, status=200, body='<html>Service Unavailable</html>')
+        responses.add(responses.GET, netdst_url, status=200, body='{"_data": {"netdst": [{"dstname": "dns"}, {"dstn')
+
+        netdsts, err = self.mmc.netdst(config_path='/md', stream=True)
+        self.assertIsNone(netdsts)
+        self.assertEqual(-1, err['status'])
+        self.assertTrue(err['status_str'].startswith('JSONDecodeError'))
+
+        netdsts, err = self.mmc.netdst(config_path='/md', stream=True)
+        self.assertIsNone(err)
+        self.assertEqual({'dstname': 'dns'}, next(netdsts))
+        with self.assertRaises(json.JSONDecodeError):
+            next(netdsts)
+
+        endpoint = self.mmc.metrics.snapshot()[BASE_URL]['endpoints']['/configuration/object/netdst']
+        self.assertEqual(2, endpoint['requests'])
+        self.assertEqual({'JSONDecodeError': 2}, endpoint['errors'])
+
 
 if __name__ == "__main__":
     unittest.main()
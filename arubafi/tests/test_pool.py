@@ -0,0 +1,114 @@
+import ssl
+import threading
+import time
+import requests
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from arubafi.mmclient import MMClient
+from arubafi.pool import PoolingAdapter, TLSSessionContext
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        if self.path == '/slow':
+            time.sleep(0.5)
+
+        body = b'{}'
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestPoolingAdapter(unittest.TestCase):
+    '''Test class for testing PoolingAdapter.
+    '''
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), KeepAliveHandler)
+        cls.server.daemon_threads = True
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.url = f'http://127.0.0.1:{cls.server.server_port}'
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def session(self, **kwargs):
+        adapter = PoolingAdapter(**kwargs)
+        session = requests.Session()
+        session.mount(self.url, adapter)
+        self.addCleanup(session.close)
+        return session, adapter
+
+    def test_connections_reused(self):
+        '''Requests reuse the open connection and are counted
+        '''
+        session, adapter = self.session()
+
+        for _ in range(5):
+            session.get(self.url + '/')
+
+        stats = adapter.stats.snapshot()
+        self.assertEqual(5, stats['requests'])
+        self.assertEqual(1, stats['new_connections'])
+        self.assertEqual(4, stats['reused_connections'])
+        self.assertGreater(stats['connect_seconds'], 0)
+
+    def test_read_timeout(self):
+        '''The adapter's timeouts are used for requests without their own
+        '''
+        session, adapter = self.session(connect_timeout=1, read_timeout=0.1)
+
+        with self.assertRaises(requests.ReadTimeout):
+            session.get(self.url + '/slow')
+
+        session.get(self.url + '/slow', timeout=2)
+
+    def test_tls_context(self):
+        '''Connections with different TLS settings get their own context
+        '''
+        adapter = PoolingAdapter()
+        request = requests.Request('GET', 'https://mm:4343/').prepare()
+
+        insecure = adapter.build_connection_pool_key_attributes(request, False)[1]['ssl_context']
+        verified = adapter.build_connection_pool_key_attributes(request, True)[1]['ssl_context']
+
+        self.assertIsInstance(insecure, TLSSessionContext)
+        self.assertIsNot(insecure, verified)
+        self.assertIs(verified, adapter.build_connection_pool_key_attributes(request, True)[1]['ssl_context'])
+        self.assertNotIn('ssl_context', PoolingAdapter(tls_session_reuse=False).build_connection_pool_key_attributes(request, True)[1])
+
+        # With urllib3's hardening
+        self.assertGreaterEqual(verified.minimum_version, ssl.TLSVersion.TLSv1_2)
+        self.assertTrue(verified.options & ssl.OP_NO_COMPRESSION)
+        self.assertFalse(verified.check_hostname)
+
+
+class TestMMClientPool(unittest.TestCase):
+    '''Test class for testing the MMClient connection pool options.
+    '''
+    def test_options(self):
+        '''The pool and timeout options are set on the session's adapter
+        '''
+        mmc = MMClient("https://test.arubamm.com", "care", "pare", timeout=5, read_timeout=60, pool_size=32, pool_block=True)
+        mmc._login = lambda: None
+        mmc.comms()
+
+        adapter = mmc.session.get_adapter(mmc.mm_base_api_url + '/api/login')
+
+        self.assertIs(mmc.adapter, adapter)
+        self.assertEqual((5, 60), (adapter.connect_timeout, adapter.read_timeout))
+        self.assertEqual((32, True), (adapter._pool_maxsize, adapter._pool_block))
+        self.assertEqual(0, mmc.connection_stats()['requests'])
+
+
+if __name__ == "__main__":
+    unittest.main()
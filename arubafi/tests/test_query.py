@@ -0,0 +1,91 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from arubafi import snapshot
+from arubafi.query import SnapshotQuery
+from .test_data.mmclient_data import *
+
+objects = [
+    ('/md', 'netdst', {'dstname': 'dns', 'netdst__host': [{'address': '10.0.0.53'}]}),
+    ('/md', 'netdst', {'dstname': 'ntp', 'netdst__host': [{'address': '10.0.0.123'}]}),
+    ('/md/EU', 'netdst', {'dstname': 'dns', 'netdst__host': [{'address': '10.1.0.53'}]}),
+    ('/md/EU/DE/site-01', 'netdst', {'dstname': 'printers'}),
+    ('/md', 'acl_sess', {'accname': 'guest', 'acl_sess__v4policy': [{'dst-alias': 'dns'}, {'dst-alias': 'ntp'}]}),
+    ('/md', 'acl_sess', {'accname': 'staff', 'acl_sess__v4policy': [{'dst-alias': 'printers'}]}),
+    ('/md', 'ap_group', {'profile-name': 'default'}),
+]
+
+
+class TestSnapshotQuery(unittest.TestCase):
+    '''Test class for testing SnapshotQuery.
+    '''
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_dir = tempfile.mkdtemp()
+        path = os.path.join(cls.tmp_dir, 'mm.jsonl.gz')
+
+        with gzip.open(path, 'wt') as snapshot_file:
+            header = {'format': snapshot.FORMAT, 'version': snapshot.VERSION, 'root': '/md', 'hierarchy': node_hierarchy}
+            snapshot_file.write(json.dumps(header) + '\n')
+            for config_path, name, obj in objects:
+                snapshot_file.write(json.dumps({'config_path': config_path, 'name': name, 'object': obj}) + '\n')
+            snapshot_file.write(json.dumps({'config_path': '/md/EU/lab', 'name': 'netdst', 'error': '500'}) + '\n')
+
+        cls.snapshot = SnapshotQuery(path, index_keys=['acl_sess.acl_sess__v4policy.dst-alias'])
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmp_dir)
+
+    def names(self, results, key='dstname'):
+        return [(config_path, obj[key]) for config_path, obj in results]
+
+    def test_query(self):
+        '''Objects are filtered like the MM filters them
+        '''
+        self.assertEqual(
+            [('/md', 'dns'), ('/md/EU', 'dns')],
+            self.names(self.snapshot.query('netdst', filter=[{"netdst.dstname": {"$eq": ["dns"]}}])))
+        self.assertEqual(
+            [('/md/EU', 'dns')],
+            self.names(self.snapshot.query('netdst', filter='[{"netdst.netdst__host.address": {"$in": ["10.1."]}}]')))
+        self.assertEqual(
+            ['guest'],
+            [obj['accname'] for _, obj in self.snapshot.query('acl_sess', filter=[{"acl_sess.acl_sess__v4policy.dst-alias": {"$eq": ["ntp"]}}])])
+        self.assertEqual(4, self.snapshot.count('netdst'))
+        self.assertEqual([], self.snapshot.query('role'))
+        self.assertEqual([('/md/EU/lab', 'netdst', '500')], self.snapshot.errors)
+
+        with self.assertRaises(ValueError):
+            self.snapshot.query('netdst', filter=[{"role.rname": {"$eq": ["dns"]}}])
+
+    def test_config_path(self):
+        '''Config paths are matched with wildcards
+        '''
+        self.assertEqual(['dns', 'printers'], [obj['dstname'] for _, obj in self.snapshot.query('netdst', config_path='/md/EU/**')])
+        self.assertEqual(['dns', 'ntp'], [obj['dstname'] for _, obj in self.snapshot.query('netdst', config_path='/md')])
+        self.assertEqual(
+            [('/md/EU', 'dns')],
+            self.names(self.snapshot.query('netdst', filter=[{"netdst.dstname": {"$eq": ["dns"]}}], config_path='/md/*')))
+
+    def test_sort(self):
+        '''Objects are sorted, then the limit and offset applied
+        '''
+        results = self.snapshot.query('netdst', sort='-netdst.dstname')
+        self.assertEqual(['printers', 'ntp', 'dns', 'dns'], [obj['dstname'] for _, obj in results])
+        # Objects with the same value keep their order
+        self.assertEqual(['/md', '/md/EU'], [config_path for config_path, _ in results[2:]])
+
+        results = self.snapshot.query('netdst', sort='+netdst.netdst__host.address', limit=2, offset=1)
+        self.assertEqual(['10.0.0.53', '10.1.0.53'], [obj['netdst__host'][0]['address'] for _, obj in results])
+
+        # Objects without the key are last
+        self.assertEqual('printers', self.snapshot.query('netdst', sort='+netdst.netdst__host.address')[-1][1]['dstname'])
+
+
+if __name__ == "__main__":
+    unittest.main()
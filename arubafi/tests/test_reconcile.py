@@ -0,0 +1,164 @@
+import json
+import responses
+import unittest
+
+from arubafi.governor import Governor
+from arubafi.mmclient import MMClient
+from arubafi.reconcile import contains, diff, normalise
+from arubafi.retry import CircuitBreaker
+from arubafi.testing import MMServer
+from .test_data.mmclient_data import *
+
+BASE_URL = "https://test.arubamm.com"
+BASE_API_URL = BASE_URL + ":4343/v1"
+LOGIN_URL = BASE_API_URL + "/api/login"
+AP_GROUP_URL = BASE_API_URL + "/configuration/object/ap_group"
+NETDST_URL = BASE_API_URL + "/configuration/object/netdst"
+
+CURRENT_AP_GROUPS = {
+    '_data': {
+        'ap_group': [
+            {'profile-name': 'lab', 'dot11a_prof': {'profile-name': 'lab'}, '_flags': {'local': True}},
+            {'profile-name': 'office', 'dot11a_prof': {'profile-name': 'default'}},
+        ]
+    }
+}
+
+
+class TestReconcile(unittest.TestCase):
+    '''Test class for testing the desired state diff.
+    '''
+    def test_normalise(self):
+        '''`_flags` and `_meta` are dropped at any depth
+        '''
+        self.assertEqual(
+            {'a': [{'b': 1}]},
+            normalise({'a': [{'b': 1, '_flags': {'inherited': True}}], '_meta': ['a']}))
+
+    def test_contains(self):
+        '''Only the desired attributes are compared
+        '''
+        self.assertTrue(contains({'a': 1, 'default': 2}, {'a': 1}))
+        self.assertFalse(contains({'a': 1}, {'a': 2}))
+        self.assertFalse(contains({'a': [{'b': 1}]}, {'a': [{'b': 1}, {'b': 2}]}))
+
+    def test_contains_lists(self):
+        '''List items are matched whatever their order, except in the
+        lists the MM acts on in order
+        '''
+        current = {'netdst__host': [{'address': '10.0.0.2', 'a': 1}, {'address': '10.0.0.1', 'a': 1}]}
+        self.assertTrue(contains(current, {'netdst__host': [{'address': '10.0.0.1'}, {'address': '10.0.0.2'}]}))
+        self.assertTrue(contains(current, {'netdst__host': [{'a': 1}, {'address': '10.0.0.2'}]}))
+        self.assertFalse(contains(current, {'netdst__host': [{'address': '10.0.0.1'}, {'address': '10.0.0.1'}]}))
+
+        acl = {'acl_sess__v4policy': [{'dst-alias': 'dns'}, {'dst-alias': 'ntp'}]}
+        self.assertTrue(contains(acl, {'acl_sess__v4policy': [{'dst-alias': 'dns'}, {'dst-alias': 'ntp'}]}))
+        self.assertFalse(contains(acl, {'acl_sess__v4policy': [{'dst-alias': 'ntp'}, {'dst-alias': 'dns'}]}))
+
+    def test_diff(self):
+        '''Desired objects are split into create, update and unchanged
+        '''
+        current = CURRENT_AP_GROUPS['_data']['ap_group']
+        desired = [
+            {'profile-name': 'lab', 'dot11a_prof': {'profile-name': 'lab'}},
+            {'profile-name': 'office', 'dot11a_prof': {'profile-name': 'office'}},
+            {'profile-name': 'new'},
+        ]
+
+        plan = diff(desired, current)
+
+        self.assertEqual([desired[2]], plan['create'])
+        self.assertEqual([desired[1]], plan['update'])
+        self.assertEqual([desired[0]], plan['unchanged'])
+
+        with self.assertRaises(ValueError):
+            diff([{'name': 'x'}], current)
+
+
+class TestMMClientReconcile(unittest.TestCase):
+    '''Test class for testing MMClient.reconcile.
+    '''
+    @responses.activate
+    def setUp(self):
+        responses.add(responses.POST, LOGIN_URL, status=200, json=login_resp)
+
+        self.mmc = MMClient(BASE_URL, "care", "pare")
+        self.mmc.comms()
+
+        self.desired = {
+            '/md/EU': {
+                'ap_group': [
+                    {'profile-name': 'lab', 'dot11a_prof': {'profile-name': 'lab'}},
+                    {'profile-name': 'office', 'dot11a_prof': {'profile-name': 'office'}},
+                ],
+                'netdst': [{'dstname': 'dns'}],
+            }
+        }
+
+    @responses.activate
+    def test_dry_run(self):
+        '''A dry run makes one GET per object type and no POSTs
+        '''
+        responses.add(responses.GET, AP_GROUP_URL, status=200, json=CURRENT_AP_GROUPS)
+        responses.add(responses.GET, NETDST_URL, status=200, json={'_data': {'netdst': []}})
+
+        report = self.mmc.reconcile(self.desired, dry_run=True)
+
+        self.assertEqual(2, len(responses.calls))
+        self.assertEqual([('/md/EU', 'netdst', 'dns')], report['create'])
+        self.assertEqual([('/md/EU', 'ap_group', 'office')], report['update'])
+        self.assertEqual([('/md/EU', 'ap_group', 'lab')], report['unchanged'])
+        self.assertEqual([], report['errors'])
+
+    @responses.activate
+    def test_only_changes_posted(self):
+        '''Only the objects that differ are POSTed and failed POSTs reported
+        '''
+        responses.add(responses.GET, AP_GROUP_URL, status=200, json=CURRENT_AP_GROUPS)
+        responses.add(responses.GET, NETDST_URL, status=200, json={'_data': {'netdst': []}})
+        responses.add(responses.POST, AP_GROUP_URL, status=200, json={'_global_result': {'status': 0}})
+        responses.add(responses.POST, NETDST_URL, status=200, json={'_global_result': {'status': 1}})
+
+        report = self.mmc.reconcile(self.desired)
+
+        posts = [call.request for call in responses.calls if call.request.method == 'POST']
+        self.assertEqual(
+            [{'profile-name': 'office', 'dot11a_prof': {'profile-name': 'office'}}, {'dstname': 'dns'}],
+            [json.loads(request.body) for request in posts])
+        self.assertEqual([('/md/EU', 'netdst', 'dns', {'status': 1})], report['errors'])
+
+
+class TestMMServerReconcile(unittest.TestCase):
+    '''Test class for testing MMClient.reconcile against the local MM
+    emulator.
+    '''
+    def setUp(self):
+        self.addCleanup(CircuitBreaker._registry.clear)
+        self.addCleanup(Governor._registry.clear)
+
+        self.server = MMServer().start()
+        self.addCleanup(self.server.stop)
+
+        self.server.add_node('/md/EU')
+        self.server.add('/md', 'netdst', {'dstname': 'dns', 'invert': False})
+        self.server.add('/md', 'netdst', {'dstname': 'ntp', 'invert': False})
+        self.mmc = self.server.client()
+
+    def test_inherited_created(self):
+        '''Objects only inherited from above the config path are created
+        at it, whether they differ from the inherited ones or not
+        '''
+        desired = {'/md/EU': {'netdst': [{'dstname': 'dns'}, {'dstname': 'ntp', 'invert': True}]}}
+
+        report = self.mmc.reconcile(desired, dry_run=True)
+        self.assertEqual([('/md/EU', 'netdst', 'dns'), ('/md/EU', 'netdst', 'ntp')], report['create'])
+        self.assertEqual([], report['update'])
+        self.assertEqual([], report['unchanged'])
+
+        self.mmc.reconcile(desired)
+        report = self.mmc.reconcile(desired, dry_run=True)
+        self.assertEqual([('/md/EU', 'netdst', 'dns'), ('/md/EU', 'netdst', 'ntp')], report['unchanged'])
+
+
+if __name__ == "__main__":
+    unittest.main()
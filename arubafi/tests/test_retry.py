@@ -0,0 +1,199 @@
+import time
+import requests
+import responses
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from urllib3.exceptions import MaxRetryError, NewConnectionError
+
+from arubafi import retry
+from arubafi.mmclient import MMClient
+from arubafi.retry import CircuitBreaker, CircuitOpenError, RetryPolicy
+from .test_data.mmclient_data import *
+
+BASE_URL = "https://test.arubamm.com"
+BASE_API_URL = BASE_URL + ":4343/v1"
+LOGIN_URL = BASE_API_URL + "/api/login"
+AP_GROUP_URL = BASE_API_URL + "/configuration/object/ap_group"
+
+
+def response(status, headers=None):
+    resp = requests.Response()
+    resp.status_code = status
+    resp.headers.update(headers or {})
+    return resp
+
+
+class TestRetryPolicy(unittest.TestCase):
+    '''Test class for testing RetryPolicy.
+    '''
+    def test_should_retry(self):
+        '''Only GETs are retried on retryable statuses, until out of retries
+        '''
+        policy = RetryPolicy(retries=2)
+
+        self.assertTrue(policy.should_retry('get', 0, response=response(503)))
+        self.assertFalse(policy.should_retry('POST', 0, response=response(503)))
+        self.assertFalse(policy.should_retry('GET', 0, response=response(500)))
+        self.assertFalse(policy.should_retry('GET', 2, response=response(503)))
+        self.assertTrue(policy.should_retry('GET', 0, exc=requests.ReadTimeout()))
+        self.assertFalse(policy.should_retry('POST', 0, exc=requests.ReadTimeout()))
+        self.assertTrue(policy.should_retry('POST', 0, exc=requests.ConnectTimeout()))
+        self.assertFalse(policy.should_retry('GET', 0, exc=CircuitOpenError()))
+
+        # Never sent, so retried whatever the method
+        refused = requests.ConnectionError(MaxRetryError(None, '/', NewConnectionError(None, 'refused')))
+        self.assertTrue(policy.should_retry('POST', 0, exc=refused))
+        self.assertFalse(policy.should_retry('POST', 0, exc=requests.ConnectionError('reset')))
+
+    def test_delay(self):
+        '''The backoff doubles up to its maximum and Retry-After is respected
+        '''
+        policy = RetryPolicy(backoff=1, max_backoff=3, jitter=False)
+
+        self.assertEqual([1, 2, 3], [policy.delay(attempt) for attempt in range(3)])
+        self.assertEqual(7, policy.delay(0, response(429, {'Retry-After': '7'})))
+        self.assertLessEqual(RetryPolicy(backoff=1).delay(0), 1)
+
+        # Longer than the maximum backoff isn't waited for
+        self.assertFalse(policy.should_retry('GET', 0, response=response(429, {'Retry-After': '60'})))
+        self.assertEqual(0, policy.delay(0, response(503, {'Retry-After': 'Wed, 21 Oct 2015 07:28:00 GMT'})))
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    '''Test class for testing CircuitBreaker.
+    '''
+    def test_states(self):
+        '''The circuit opens after the failures, lets one trial through once
+        the timeout passed and closes if it succeeds
+        '''
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+
+        breaker.record_failure()
+        breaker.before_request()
+        breaker.record_failure()
+        self.assertEqual('open', breaker.state)
+
+        with self.assertRaises(CircuitOpenError):
+            breaker.before_request()
+
+        time.sleep(0.05)
+        breaker.before_request()
+        self.assertEqual('half-open', breaker.state)
+        # Only one trial at a time
+        with self.assertRaises(CircuitOpenError):
+            breaker.before_request()
+
+        breaker.record_success()
+        self.assertEqual('closed', breaker.state)
+
+    def test_trial_error(self):
+        '''A trial that fails with an unexpected error lets another trial
+        through
+        '''
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+        breaker.record_failure()
+
+        def request():
+            raise KeyError('unexpected')
+
+        with self.assertRaises(KeyError):
+            retry.send('GET', request, breaker=breaker)
+
+        self.assertTrue(breaker.before_request())
+
+
+class TestMMClientRetries(unittest.TestCase):
+    '''Test class for testing MMClient retries and the circuit breaker.
+    '''
+    @responses.activate
+    def setUp(self):
+        self.addCleanup(CircuitBreaker._registry.clear)
+        responses.add(responses.POST, LOGIN_URL, status=200, json=login_resp)
+
+        self.mmc = MMClient(BASE_URL, "care", "pare", retry_policy=RetryPolicy(backoff=0), circuit_breaker=True)
+        self.mmc.comms()
+
+    @responses.activate
+    def test_get_retried(self):
+        '''GETs are retried and the retries recorded
+        '''
+        responses.add(responses.GET, AP_GROUP_URL, status=503)
+        responses.add(responses.GET, AP_GROUP_URL, status=200, json={'_data': {'ap_group': []}})
+
+        self.assertEqual(({'_data': {'ap_group': []}}, None), self.mmc.ap_group())
+
+        stats = self.mmc.metrics.snapshot()[BASE_URL]['endpoints']['/configuration/object/ap_group']
+        self.assertEqual(1, stats['retries'])
+        self.assertEqual({'503': 1}, stats['errors'])
+
+    @responses.activate
+    def test_post_not_retried(self):
+        '''POSTs that reached the MM are not retried
+        '''
+        responses.add(responses.POST, AP_GROUP_URL, status=503)
+
+        with self.assertRaises(requests.HTTPError):
+            self.mmc.ap_group(data={'profile-name': 'x'})
+
+        self.assertEqual(1, len(responses.calls))
+
+    @responses.activate
+    def test_circuit_opens(self):
+        '''Once open, requests fail without being sent
+        '''
+        responses.add(responses.GET, AP_GROUP_URL, status=503)
+
+        with self.assertRaises(requests.HTTPError):
+            self.mmc.ap_group()
+
+        # The 5th failed attempt opens the circuit, so it isn't retried
+        for _ in range(2):
+            with self.assertRaises(CircuitOpenError):
+                self.mmc.ap_group()
+
+        self.assertEqual(5, len(responses.calls))
+        self.assertEqual('open', self.mmc.circuit_breaker.state)
+
+    def test_relogin_circuit_open(self):
+        '''Logging in again in a worker thread while the circuit is open
+        returns an error instead of exiting
+        '''
+        self.mmc.circuit_breaker.failure_threshold = 1
+
+        def relogin():
+            # Opens the circuit before the login
+            self.mmc.circuit_breaker.record_failure()
+            return self.mmc._relogin(self.mmc._access_token, {})
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            self.assertEqual({}, executor.submit(relogin).result())
+            err = executor.submit(self.mmc._login).result()
+
+        self.assertEqual(-1, err['status'])
+        self.assertIn('CircuitOpenError', err['status_str'])
+
+        # The main thread still exits, with an error status
+        with self.assertRaises(SystemExit) as exited:
+            self.mmc._login()
+        self.assertEqual(1, exited.exception.code)
+
+    @responses.activate
+    def test_no_circuit_breaker(self):
+        '''Clients don't fail fast unless asked to
+        '''
+        responses.add(responses.POST, LOGIN_URL, status=200, json=login_resp)
+        responses.add(responses.GET, AP_GROUP_URL, status=503)
+
+        mmc = MMClient(BASE_URL, "care", "pare", retry_policy=False)
+        mmc.comms()
+
+        for _ in range(6):
+            with self.assertRaises(requests.HTTPError):
+                mmc.ap_group()
+
+        self.assertIsNone(mmc.circuit_breaker)
+        self.assertEqual('closed', self.mmc.circuit_breaker.state)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,140 @@
+import json
+import responses
+import unittest
+from urllib.parse import parse_qs, urlsplit
+
+from arubafi.mmclient import MMClient
+from arubafi.showcommand import to_columns
+from .test_data.mmclient_data import *
+
+BASE_URL = "https://test.arubamm.com"
+BASE_API_URL = BASE_URL + ":4343/v1"
+LOGIN_URL = BASE_API_URL + "/api/login"
+SHOW_URL = BASE_API_URL + "/configuration/showcommand"
+
+AP_DATABASE = {
+    'AP Database': [
+        {'Name': 'ap01', 'Group': 'default', 'Status': 'Up 1d'},
+        {'Name': 'ap02', 'Group': 'lab', 'Status': 'Down', 'Flags': '2'},
+    ],
+    '_meta': ['Name', 'Group', 'Status', 'Flags'],
+    '_data': ['Flags: 2 = Using 802.1x'],
+}
+
+USER_TABLE = {
+    'Users': [{'IP': '10.0.0.1', 'Role': 'guest'}],
+    '_meta': ['IP', 'Role'],
+}
+
+
+def command_callback(request):
+    '''Returns the output of the requested show command
+    '''
+    command = parse_qs(urlsplit(request.url).query)['command'][0]
+    outputs = {
+        'show ap database': AP_DATABASE,
+        'show user-table': USER_TABLE,
+    }
+    if command in outputs:
+        return 200, {}, json.dumps(outputs[command])
+    return 200, {}, json.dumps({'_global_result': {'status': 1, 'status_str': 'Invalid command'}})
+
+
+
+
+class TestToColumns(unittest.TestCase):
+    '''Test class for testing the columnar show command output.
+    '''
+    def test_to_columns(self):
+        '''Tables become columns in `_meta` order and the rest is kept
+        '''
+        columnar = to_columns(AP_DATABASE)
+
+        self.assertEqual(
+            {
+                'Name': ['ap01', 'ap02'],
+                'Group': ['default', 'lab'],
+                'Status': ['Up 1d', 'Down'],
+                'Flags': [None, '2'],
+            },
+            columnar['AP Database'])
+        self.assertEqual(['Name', 'Group', 'Status', 'Flags'], list(columnar['AP Database']))
+        self.assertEqual(AP_DATABASE['_data'], columnar['_data'])
+
+    def test_multiple_tables(self):
+        '''Every table only gets the `_meta` columns of its own rows
+        '''
+        columnar = to_columns({
+            'Users': [{'IP': '10.0.0.1', 'Role': 'guest'}],
+            'Summary': [{'Total': 1}],
+            '_meta': ['IP', 'Role', 'Total'],
+        })
+
+        self.assertEqual({'IP': ['10.0.0.1'], 'Role': ['guest']}, columnar['Users'])
+        self.assertEqual({'Total': [1]}, columnar['Summary'])
+        self.assertEqual(['IP', 'Role', 'Total'], columnar['_meta'])
+
+    def test_no_meta(self):
+        '''Columns are taken from the rows without `_meta`
+        '''
+        self.assertEqual(
+            {'T': {'a': [1, None], 'b': [None, 2]}},
+            to_columns({'T': [{'a': 1}, {'b': 2}]}))
+
+
+class TestMMClientShowCommand(unittest.TestCase):
+    '''Test class for testing show commands with MMClient.
+    '''
+    @responses.activate
+    def setUp(self):
+        responses.add(responses.POST, LOGIN_URL, status=200, json=login_resp)
+
+        self.mmc = MMClient(BASE_URL, "care", "pare")
+        self.mmc.comms()
+
+    @responses.activate
+    def test_show_command(self):
+        '''The command must be sent to the showcommand endpoint
+        '''
+        responses.add_callback(responses.GET, SHOW_URL, callback=command_callback)
+
+        jresp, err = self.mmc.show_command('show ap database')
+
+        self.assertIsNone(err)
+        self.assertEqual(['ap01', 'ap02'], jresp['AP Database']['Name'])
+        self.assertEqual(
+            {'command': ['show ap database'], 'UIDARUBA': ['fntoken']},
+            parse_qs(urlsplit(responses.calls[0].request.url).query))
+
+    @responses.activate
+    def test_show_command_rows(self):
+        responses.add_callback(responses.GET, SHOW_URL, callback=command_callback)
+
+        jresp, err = self.mmc.show_command('show ap database', columnar=False)
+
+        self.assertEqual(AP_DATABASE, jresp)
+
+    @responses.activate
+    def test_show_command_error(self):
+        '''An MM error is returned as the error
+        '''
+        responses.add_callback(responses.GET, SHOW_URL, callback=command_callback)
+
+        jresp, err = self.mmc.show_command('show nonsense')
+
+        self.assertEqual('Invalid command', err['status_str'])
+
+    @responses.activate
+    def test_show_commands(self):
+        '''Every command's output is returned
+        '''
+        responses.add_callback(responses.GET, SHOW_URL, callback=command_callback)
+
+        outputs = self.mmc.show_commands(['show ap database', 'show user-table'])
+
+        self.assertEqual(['ap01', 'ap02'], outputs['show ap database'][0]['AP Database']['Name'])
+        self.assertEqual({'IP': ['10.0.0.1'], 'Role': ['guest']}, outputs['show user-table'][0]['Users'])
+
+
+if __name__ == "__main__":
+    unittest.main()
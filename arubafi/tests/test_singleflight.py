@@ -0,0 +1,107 @@
+import threading
+import time
+import responses
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from arubafi.mmclient import MMClient
+from arubafi.singleflight import SingleFlight
+from .test_data.mmclient_data import *
+
+BASE_URL = "https://test.arubamm.com"
+BASE_API_URL = BASE_URL + ":4343/v1"
+LOGIN_URL = BASE_API_URL + "/api/login"
+AP_GROUP_URL = BASE_API_URL + "/configuration/object/ap_group"
+
+
+def wait_for(condition, timeout=5):
+    '''Waits until `condition()` is true'''
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.001)
+
+
+class TestSingleFlight(unittest.TestCase):
+    '''Test class for testing SingleFlight.
+    '''
+    def run_concurrently(self, flights, func, callers=4):
+        '''Calls `func` through `flights` from many threads, releasing the
+        first call once the others are waiting for it
+        '''
+        release = threading.Event()
+
+        def call():
+            release.wait()
+            return func()
+
+        with ThreadPoolExecutor(max_workers=callers) as executor:
+            futures = [executor.submit(flights.do, 'key', call) for _ in range(callers)]
+            wait_for(lambda: flights.shared == callers - 1)
+            release.set()
+
+        return futures
+
+    def test_shared(self):
+        '''Concurrent callers share one call and get their own copies
+        '''
+        flights = SingleFlight()
+        calls = list()
+
+        futures = self.run_concurrently(flights, lambda: calls.append(1) or {'a': [1]})
+        results = [future.result() for future in futures]
+
+        self.assertEqual(1, len(calls))
+        self.assertEqual([{'a': [1]}] * 4, results)
+        self.assertEqual(4, len({id(result) for result in results}))
+
+        # Nothing is kept once the call is done
+        flights.do('key', calls.append, 2)
+        self.assertEqual([1, 2], calls)
+
+    def test_exception(self):
+        '''Every concurrent caller gets the exception
+        '''
+        def fail():
+            raise ValueError('x')
+
+        for future in self.run_concurrently(SingleFlight(), fail):
+            with self.assertRaises(ValueError):
+                future.result()
+
+
+class TestMMClientSingleFlight(unittest.TestCase):
+    '''Test class for testing the single flight GETs of MMClient.
+    '''
+    @responses.activate
+    def setUp(self):
+        responses.add(responses.POST, LOGIN_URL, status=200, json=login_resp)
+
+        self.mmc = MMClient(BASE_URL, "care", "pare")
+        self.mmc.comms()
+
+    @responses.activate
+    def test_concurrent_gets(self):
+        '''Concurrent identical GETs make one request, different ones don't
+        share it
+        '''
+        release = threading.Event()
+
+        def callback(request):
+            release.wait()
+            return 200, {}, '{"_data": {"ap_group": []}}'
+
+        responses.add_callback(responses.GET, AP_GROUP_URL, callback=callback)
+
+        with ThreadPoolExecutor(max_workers=5) as executor:
+            futures = [executor.submit(self.mmc.ap_group, config_path='/md') for _ in range(4)]
+            futures.append(executor.submit(self.mmc.ap_group, config_path='/md/EU'))
+            wait_for(lambda: self.mmc.singleflight.shared == 3)
+            release.set()
+
+        for future in futures:
+            self.assertEqual(({'_data': {'ap_group': []}}, None), future.result())
+        self.assertEqual(2, len(responses.calls))
+
+
+if __name__ == "__main__":
+    unittest.main()
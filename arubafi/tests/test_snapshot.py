@@ -0,0 +1,172 @@
+import gzip
+import json
+import os
+import re
+import responses
+import shutil
+import tempfile
+import unittest
+from urllib.parse import parse_qs, urlsplit
+
+from arubafi.mmclient import MMClient
+from arubafi.retry import CircuitBreaker
+from arubafi import snapshot as snapshots
+from arubafi.snapshot import SnapshotReader
+from .test_data.mmclient_data import *
+
+BASE_URL = "https://test.arubamm.com"
+BASE_API_URL = BASE_URL + ":4343/v1"
+LOGIN_URL = BASE_API_URL + "/api/login"
+HIERARCHY_URL = BASE_API_URL + "/configuration/object/node_hierarchy"
+AP_GROUP_URL = BASE_API_URL + "/configuration/object/ap_group"
+NETDST_URL = BASE_API_URL + "/configuration/object/netdst"
+
+
+def ap_group_callback(request):
+    '''Returns the `default` group, inherited below /md, and a local group
+    named after every node
+    '''
+    config_path = parse_qs(urlsplit(request.url).query)['config_path'][0]
+
+    if config_path == '/md/EU/lab':
+        return (500, {}, '')
+
+    objs = [{'profile-name': 'default', '_flags': {'inherited': config_path != '/md'}}]
+    if config_path.startswith('/md/'):
+        objs.append({'profile-name': config_path.rsplit('/', 1)[1]})
+
+    return (200, {}, json.dumps({'_data': {'ap_group': objs}}))
+
+
+class TestSnapshot(unittest.TestCase):
+    '''Test class for testing SnapshotWriter and SnapshotReader.
+    '''
+    def setUp(self):
+        self.addCleanup(CircuitBreaker._registry.clear)
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        self.path = os.path.join(tmp_dir, 'mm.jsonl.gz')
+
+        responses.add(responses.POST, LOGIN_URL, status=200, json=login_resp)
+        responses.add(responses.GET, HIERARCHY_URL, status=200, json=node_hierarchy)
+        responses.add(responses.GET, NETDST_URL, status=200, json={'_data': {'netdst': []}})
+        responses.add_callback(responses.GET, AP_GROUP_URL, callback=ap_group_callback)
+
+    @responses.activate
+    def test_export(self):
+        '''Only local objects are exported and failed requests recorded
+        '''
+        mmc = MMClient(BASE_URL, "care", "pare")
+        mmc.comms()
+
+        summary = mmc.snapshot(self.path, names=['ap_group', 'netdst'], root='/md', include_devices=False)
+
+        # /md, /md/EU, DE, DE/site-01, FR, FR/site-01 and lab
+        self.assertEqual(14, summary['requests'])
+        self.assertEqual(6, summary['objects'])
+        self.assertEqual([('/md/EU/lab', 'ap_group')], [error[:2] for error in summary['errors']])
+        self.assertFalse(os.path.exists(self.path + '.tmp'))
+
+        snapshot = SnapshotReader(self.path)
+        self.assertEqual('/md', snapshot.header['root'])
+        self.assertEqual(['ap_group', 'netdst'], snapshot.header['names'])
+        self.assertEqual(node_hierarchy, snapshot.hierarchy)
+
+        objects = snapshot.load()
+        self.assertEqual([{'profile-name': 'default', '_flags': {'inherited': False}}], objects['/md']['ap_group'])
+        self.assertEqual([{'profile-name': 'site-01'}], objects['/md/EU/FR/site-01']['ap_group'])
+        self.assertNotIn('/md/EU/lab', objects)
+        self.assertEqual(['/md/EU/lab'], [error[0] for error in snapshot.errors])
+
+    @responses.activate
+    def test_export_mm_error(self):
+        '''Errors the MM returns with an HTTP 200 are recorded as errors, not
+        as nodes without objects
+        '''
+        responses.replace(responses.GET, NETDST_URL, status=200, json={'_global_result': {'status': 1, 'status_str': 'Error'}})
+        mmc = MMClient(BASE_URL, "care", "pare")
+        mmc.comms()
+
+        summary = mmc.snapshot(self.path, names=['netdst'], root='/md/EU/FR', include_devices=False)
+
+        self.assertEqual(['/md/EU/FR', '/md/EU/FR/site-01'], sorted(error[0] for error in summary['errors']))
+        snapshot = SnapshotReader(self.path)
+        self.assertEqual({}, snapshot.load())
+        self.assertEqual(2, len(snapshot.errors))
+
+    @responses.activate
+    def test_all_objects(self):
+        '''All registered config objects are exported by default
+        '''
+        def callback(request):
+            name = urlsplit(request.url).path.rsplit('/', 1)[1]
+            return (200, {}, json.dumps({'_data': {'role': [{'rname': 'guest'}]} if name == 'role' else {}}))
+
+        # Responses matching more than one URL are used once each in turn,
+        # so the others are left to this one
+        responses.add_callback(responses.GET, re.compile(BASE_API_URL + r"/configuration/object/(?!node_hierarchy)\w+"), callback=callback)
+
+        mmc = MMClient(BASE_URL, "care", "pare")
+        mmc.comms()
+
+        summary = mmc.snapshot(self.path, root='/md/EU/DE/site-01', max_workers=4)
+
+        self.assertIn('role', SnapshotReader(self.path).header['names'])
+        self.assertNotIn('node_hierarchy', SnapshotReader(self.path).header['names'])
+        self.assertIn(('/md/EU/DE/site-01/20:4c:03:00:00:01', 'role', {'rname': 'guest'}), list(SnapshotReader(self.path)))
+        self.assertEqual(2 * len(SnapshotReader(self.path).header['names']), summary['requests'])
+        self.assertEqual([], summary['errors'])
+
+    @responses.activate
+    def test_drift(self):
+        '''Drift from a snapshot is found from the hashes written with it
+        '''
+        mmc = MMClient(BASE_URL, "care", "pare")
+        mmc.comms()
+        mmc.snapshot(self.path, names=['ap_group', 'netdst'], root='/md', include_devices=False)
+
+        self.assertTrue(os.path.exists(snapshots.hashes_path(self.path)))
+        hashes = SnapshotReader(self.path).hashes()
+
+        # Without its hashes file they are worked out from the snapshot
+        os.remove(snapshots.hashes_path(self.path))
+        self.assertEqual(hashes.nodes, SnapshotReader(self.path).hashes().nodes)
+
+        def netdst_callback(request):
+            config_path = parse_qs(urlsplit(request.url).query)['config_path'][0]
+            netdsts = [{'dstname': 'dns'}] if config_path == '/md/EU' else []
+            return (200, {}, json.dumps({'_data': {'netdst': netdsts}}))
+
+        responses.remove(responses.GET, NETDST_URL)
+        responses.add_callback(responses.GET, NETDST_URL, callback=netdst_callback)
+
+        changes = mmc.drift(self.path, objects=True)
+
+        self.assertEqual([
+            {'config_path': '/md/EU', 'name': 'netdst', 'id': 'dns', 'change': 'added', 'old': None, 'new': {'dstname': 'dns'}},
+            {'config_path': '/md/EU/lab', 'name': 'ap_group', 'id': None, 'change': 'unknown', 'old': None, 'new': None},
+        ], changes)
+        self.assertEqual([self.path, snapshots.hashes_path(self.path)], sorted(os.path.join(os.path.dirname(self.path), name) for name in os.listdir(os.path.dirname(self.path))))
+
+    @responses.activate
+    def test_failed_export(self):
+        '''A failed export leaves no file behind
+        '''
+        mmc = MMClient(BASE_URL, "care", "pare")
+        mmc.comms()
+
+        with self.assertRaises(KeyError):
+            mmc.snapshot(self.path, root='/md/US')
+
+        self.assertFalse(os.path.exists(self.path))
+        self.assertFalse(os.path.exists(self.path + '.tmp'))
+
+        with gzip.open(self.path, 'wb') as snapshot:
+            snapshot.write(b'{"format": "other"}\n')
+
+        with self.assertRaises(ValueError):
+            SnapshotReader(self.path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,143 @@
+import json
+import responses
+import unittest
+
+from arubafi.mmclient import MMClient
+from arubafi.streaming import iter_json_array
+from .test_data.mmclient_data import *
+
+BASE_URL = "https://test.arubamm.com"
+BASE_API_URL = BASE_URL + ":4343/v1"
+LOGIN_URL = BASE_API_URL + "/api/login"
+NETDST_URL = BASE_API_URL + "/configuration/object/netdst"
+
+NETDSTS = [
+    {'dstname': f'dst-{i}', 'netdst__host': [{'address': f'10.0.0.{i}'}], 'weight': 12345 + i, 'ü': 'ünïcödé'}
+    for i in range(50)
+]
+
+DOC = {
+    '_meta': ['dstname', {'nested': [1, 2, {'_data': 'decoy'}]}],
+    '_data': {'other': [{'x': 1}], 'netdst': NETDSTS, 'after': True},
+    '_global_result': {'status': 0},
+}
+
+
+def chunked(data, size):
+    return (data[i:i + size] for i in range(0, len(data), size))
+
+
+class TestIterJsonArray(unittest.TestCase):
+    '''Test class for testing the incremental JSON array decoder.
+    '''
+    def test_chunk_sizes(self):
+        '''Elements must decode the same whatever the chunk size, including
+        multi byte characters and numbers split between chunks
+        '''
+        body = json.dumps(DOC, ensure_ascii=False, indent=1).encode('utf-8')
+
+        for size in (1, 2, 7, 64, len(body)):
+            self.assertEqual(NETDSTS, list(iter_json_array(chunked(body, size), ('_data', 'netdst'))))
+
+    def test_compact_document(self):
+        body = json.dumps(DOC, separators=(',', ':')).encode('utf-8')
+
+        self.assertEqual(NETDSTS, list(iter_json_array(chunked(body, 3), ('_data', 'netdst'))))
+
+    def test_empty_and_missing(self):
+        '''An empty list or a missing path yield nothing
+        '''
+        self.assertEqual([], list(iter_json_array([b'{"_data": {"netdst": []}}'], ('_data', 'netdst'))))
+        self.assertEqual([], list(iter_json_array([b'{"_data": {"role": [1]}}'], ('_data', 'netdst'))))
+        self.assertEqual([], list(iter_json_array([b'{}'], ('_data', 'netdst'))))
+
+    def test_invalid(self):
+        with self.assertRaises(json.JSONDecodeError):
+            list(iter_json_array([b'{"_data": {"netdst": [{"a": 1}, {"a": '], ('_data', 'netdst')))
+
+    def test_lazy(self):
+        '''Elements are yielded before the rest of the input is read
+        '''
+        def chunks():
+            yield b'{"_data": {"netdst": [{"a": 1}, '
+            raise AssertionError("Read too far")
+
+        self.assertEqual({'a': 1}, next(iter_json_array(chunks(), ('_data', 'netdst'))))
+
+
+class TestMMClientStream(unittest.TestCase):
+    '''Test class for testing streamed GETs with MMClient.
+    '''
+    @responses.activate
+    def setUp(self):
+        responses.add(responses.POST, LOGIN_URL, status=200, json=login_resp)
+
+        self.mmc = MMClient(BASE_URL, "care", "pare")
+        self.mmc.comms()
+
+    @responses.activate
+    def test_stream(self):
+        '''The resource method must return a generator of the objects
+        '''
+        responses.add(responses.GET, NETDST_URL, status=200, json=DOC)
+
+        netdsts, err = self.mmc.netdst(config_path='/md', stream=True)
+
+        self.assertIsNone(err)
+        self.assertEqual(NETDSTS, list(netdsts))
+
+        endpoint = self.mmc.metrics.snapshot()[BASE_URL]['endpoints']['/configuration/object/netdst']
+        self.assertEqual(1, endpoint['requests'])
+        self.assertEqual(len(json.dumps(DOC)), endpoint['response_bytes'])
+
+    @responses.activate
+    def test_stream_relogin(self):
+        '''An expired session is logged into again before streaming
+        '''
+        responses.add(responses.POST, LOGIN_URL, status=200, json=login_resp)
+        responses.add(responses.GET, NETDST_URL, status=401)
+        responses.add(responses.GET, NETDST_URL, status=200, json=DOC)
+
+        netdsts, err = self.mmc.netdst(stream=True)
+
+        self.assertEqual(NETDSTS, list(netdsts))
+        self.assertEqual(1, self.mmc.relogins)
+
+    @responses.activate
+    def test_stream_session_expired(self):
+        '''A session the MM says has expired is logged into again, like
+        with `_api_call`
+        '''
+        responses.add(responses.POST, LOGIN_URL, status=200, json=login_resp)
+        responses.add(responses.GET, NETDST_URL, status=200, json={'_global_result': {'status': '1', 'status_str': 'Invalid session id'}})
+        responses.add(responses.GET, NETDST_URL, status=200, json=DOC)
+
+        netdsts, err = self.mmc.netdst(stream=True)
+
+        self.assertIsNone(err)
+        self.assertEqual(NETDSTS, list(netdsts))
+        self.assertEqual(1, self.mmc.relogins)
+
+    @responses.activate
+    def test_stream_error(self):
+        '''A response without objects returns the MM's error, and an empty
+        list no objects and no error
+        '''
+        error = {'status': 1, 'status_str': "Invalid config_path '/md/EU'"}
+        responses.add(responses.GET, NETDST_URL, status=200, json={'_global_result': error})
+        responses.add(responses.GET, NETDST_URL, status=200, json={'_data': {'netdst': []}, '_global_result': {'status': 0}})
+
+        self.assertEqual((None, error), self.mmc.netdst(config_path='/md/EU', stream=True))
+
+        netdsts, err = self.mmc.netdst(config_path='/md', stream=True)
+        self.assertIsNone(err)
+        self.assertEqual([], list(netdsts))
+
+        endpoint = self.mmc.metrics.snapshot()[BASE_URL]['endpoints']['/configuration/object/netdst']
+        self.assertEqual(2, endpoint['requests'])
+        self.assertEqual({'mm:1': 1}, endpoint['errors'])
+        self.assertEqual(0, self.mmc.relogins)
+
+
+if __name__ == "__main__":
+    unittest.main()
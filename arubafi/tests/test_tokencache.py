@@ -0,0 +1,186 @@
+import os
+import stat
+import tempfile
+import responses
+import unittest
+from mock import patch
+
+from arubafi.mmclient import MMClient
+from arubafi.tokencache import TokenCache
+from .test_data.mmclient_data import *
+
+BASE_URL = "https://test.arubamm.com"
+BASE_API_URL = BASE_URL + ":4343/v1"
+LOGIN_URL = BASE_API_URL + "/api/login"
+LOGOUT_URL = BASE_API_URL + "/api/logout"
+AP_GROUP_URL = BASE_API_URL + "/configuration/object/ap_group"
+
+
+class TestTokenCache(unittest.TestCase):
+    '''Test class for testing TokenCache on its own.
+    '''
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'arubafi', 'tokens.json')
+        self.cache = TokenCache(self.path, max_age=60)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_set_get_delete(self):
+        '''Tokens are stored per host, port and username
+        '''
+        self.cache.set('mm', 4343, 'care', 'tok')
+
+        self.assertEqual('tok', self.cache.get('mm', 4343, 'care'))
+        self.assertIsNone(self.cache.get('mm', 4343, 'other'))
+
+        self.cache.delete('mm', 4343, 'care')
+        self.assertIsNone(self.cache.get('mm', 4343, 'care'))
+
+    def test_file_is_private(self):
+        '''The cache file must only be accessible by its owner
+        '''
+        self.cache.set('mm', 4343, 'care', 'tok')
+
+        self.assertEqual(0o600, stat.S_IMODE(os.stat(self.path).st_mode))
+
+    @unittest.skipUnless(os.name == 'posix', 'POSIX permissions only')
+    def test_ignores_public_file(self):
+        '''A cache file readable by others must not be used
+        '''
+        self.cache.set('mm', 4343, 'care', 'tok')
+        os.chmod(self.path, 0o644)
+
+        self.assertIsNone(self.cache.get('mm', 4343, 'care'))
+
+    def test_max_age(self):
+        '''Tokens older than `max_age` are not returned
+        '''
+        with patch('arubafi.tokencache.time.time', return_value=0):
+            self.cache.set('mm', 4343, 'care', 'tok')
+        with patch('arubafi.tokencache.time.time', return_value=61):
+            self.assertIsNone(self.cache.get('mm', 4343, 'care'))
+
+    def test_touch(self):
+        '''Touching a token restarts its `max_age`, at most once every tenth
+        of it, and only for the stored token
+        '''
+        with patch('arubafi.tokencache.time.time', return_value=0):
+            self.cache.set('mm', 4343, 'care', 'tok')
+        with patch('arubafi.tokencache.time.time', return_value=5):
+            self.cache.touch('mm', 4343, 'care', 'tok')
+        with patch('arubafi.tokencache.time.time', return_value=62):
+            self.assertIsNone(self.cache.get('mm', 4343, 'care'))
+
+        with patch('arubafi.tokencache.time.time', return_value=100):
+            self.cache.set('mm', 4343, 'care', 'tok')
+        with patch('arubafi.tokencache.time.time', return_value=150):
+            self.cache.touch('mm', 4343, 'care', 'tok')
+            self.cache.touch('mm', 4343, 'care', 'other')
+        with patch('arubafi.tokencache.time.time', return_value=200):
+            self.assertEqual('tok', self.cache.get('mm', 4343, 'care'))
+
+        self.cache.delete('mm', 4343, 'care')
+        self.cache.touch('mm', 4343, 'care', 'tok')
+        self.assertIsNone(self.cache.get('mm', 4343, 'care'))
+
+
+class TestMMClientRelogin(unittest.TestCase):
+    '''Test class for testing token reuse and logging in again.
+    '''
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.cache = TokenCache(os.path.join(self.tmpdir.name, 'tokens.json'))
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    @responses.activate
+    def test_comms_reuses_token(self):
+        '''A second client must reuse the stored token without logging in
+        '''
+        responses.add(responses.POST, LOGIN_URL, status=200, json=login_resp)
+
+        MMClient(BASE_URL, "care", "pare", token_cache=self.cache).comms()
+        mmc = MMClient(BASE_URL, "care", "pare", token_cache=self.cache)
+        mmc.comms()
+
+        self.assertEqual('fntoken', mmc._access_token)
+        self.assertEqual(1, len(responses.calls))
+
+    @responses.activate
+    def test_use_refreshes_token(self):
+        '''A token in use must keep being reused past `max_age` from its
+        login
+        '''
+        responses.add(responses.POST, LOGIN_URL, status=200, json=login_resp)
+        responses.add(responses.GET, AP_GROUP_URL, status=200, json={'_data': {'ap_group': []}})
+
+        with patch('arubafi.tokencache.time.time', return_value=0):
+            MMClient(BASE_URL, "care", "pare", token_cache=self.cache).comms()
+        with patch('arubafi.tokencache.time.time', return_value=800):
+            mmc = MMClient(BASE_URL, "care", "pare", token_cache=self.cache)
+            mmc.comms()
+            mmc.ap_group()
+        with patch('arubafi.tokencache.time.time', return_value=1600):
+            mmc = MMClient(BASE_URL, "care", "pare", token_cache=self.cache)
+            mmc.comms()
+
+        self.assertEqual('fntoken', mmc._access_token)
+        self.assertEqual(1, len([call for call in responses.calls if call.request.url.startswith(LOGIN_URL)]))
+
+    @responses.activate
+    def test_logout_forgets_token(self):
+        '''Logging out must remove the stored token
+        '''
+        responses.add(responses.POST, LOGIN_URL, status=200, json=login_resp)
+        responses.add(responses.GET, LOGOUT_URL, status=200, json={'_global_result': {'status': '0'}})
+
+        mmc = MMClient(BASE_URL, "care", "pare", token_cache=self.cache)
+        mmc.comms()
+        mmc.logout()
+
+        self.assertIsNone(self.cache.get(BASE_URL, 4343, "care"))
+
+    @responses.activate
+    def test_relogin_on_401(self):
+        '''An expired session is logged into again and the request replayed
+        with the new token
+        '''
+        responses.add(responses.POST, LOGIN_URL, status=200, json=login_resp)
+        responses.add(responses.GET, AP_GROUP_URL, status=401)
+        responses.add(responses.GET, AP_GROUP_URL, status=200, json={'_data': {'ap_group': []}})
+
+        mmc = MMClient(BASE_URL, "care", "pare", token_cache=self.cache)
+        mmc.comms()
+        mmc._access_token = 'expired'
+
+        jresp, jresp_err = mmc.ap_group()
+
+        self.assertEqual({'_data': {'ap_group': []}}, jresp)
+        self.assertEqual(1, mmc.relogins)
+        self.assertIn('UIDARUBA=fntoken', responses.calls[-1].request.url)
+
+    @responses.activate
+    def test_relogin_only_once(self):
+        '''A request that keeps failing must not log in again more than once
+        '''
+        responses.add(responses.POST, LOGIN_URL, status=200, json=login_resp)
+        responses.add(
+            responses.GET,
+            AP_GROUP_URL,
+            status=200,
+            json={'_global_result': {'status': '1', 'status_str': 'Invalid session id'}})
+
+        mmc = MMClient(BASE_URL, "care", "pare")
+        mmc.comms()
+
+        jresp, jresp_err = mmc.ap_group()
+
+        self.assertEqual(1, mmc.relogins)
+        self.assertEqual(4, len(responses.calls))
+
+
+if __name__ == "__main__":
+    unittest.main()
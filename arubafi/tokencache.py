@@ -0,0 +1,145 @@
+import json
+import os
+import tempfile
+import threading
+import time
+
+from logzero import logger
+
+
+class TokenCache:
+    """A file backed store of Mobility Master `UIDARUBA` tokens.
+
+    Lets short lived scripts reuse the API session of a previous run instead
+    of logging in, and using up one of the MM's API sessions, every time.
+    Tokens are stored per MM host, port and username. Passwords are never
+    stored.
+
+    The cache file is only readable and writable by its owner. A file that
+    can be read by anyone else is ignored.
+
+    Params
+    ------
+    path: `str`, optional, default: None
+        Path to the cache file. Defaults to `arubafi/tokens.json` in
+        `$XDG_CACHE_HOME` or `~/.cache`.
+
+    max_age: `int`, optional, default: 900
+        Number of seconds a stored token is reused for after it was last
+        used. Should not be longer than the MM's API session idle timeout.
+
+    Examples
+    --------
+    >>> mmc = MMClient(mm_host="arubamm.domain.com", token_cache=TokenCache())
+    >>> mmc.comms()  # Only logs in if no valid token is stored
+    """
+
+    def __init__(self, path=None, max_age=900):
+        if not path:
+            cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+            path = os.path.join(cache_home, 'arubafi', 'tokens.json')
+
+        self.path = path
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        # Key to when its token was last touched, so a token in constant
+        # use doesn't rewrite the file on every request
+        self._touched = dict()
+
+    @staticmethod
+    def _key(host, port, username):
+        return f"{username}@{host}:{port}"
+
+    def _read(self):
+        '''Returns the stored tokens or an empty dict if there are none or the
+        file is not private.
+        '''
+        try:
+            with open(self.path) as token_file:
+                if os.name == 'posix' and os.fstat(token_file.fileno()).st_mode & 0o077:
+                    logger.warning("Ignoring token cache %s as it is accessible by other users", self.path)
+                    return dict()
+                return json.load(token_file)
+        except FileNotFoundError:
+            return dict()
+        except (OSError, ValueError) as exc:
+            logger.warning("Ignoring unreadable token cache %s: %s", self.path, exc)
+            return dict()
+
+    def _write(self, tokens):
+        '''Atomically replaces the cache file with only owner access to it
+        '''
+        directory = os.path.dirname(self.path) or '.'
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+
+        # mkstemp creates the file with 0600 permissions
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tokens-')
+        try:
+            with os.fdopen(fd, 'w') as token_file:
+                json.dump(tokens, token_file)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def get(self, host, port, username):
+        '''Returns the stored token or `None` if there is none or it wasn't
+        used for longer than `max_age`.
+        '''
+        with self._lock:
+            entry = self._read().get(self._key(host, port, username))
+
+        if not entry or time.time() - entry.get('saved', 0) > self.max_age:
+            return None
+
+        return entry.get('token')
+
+    def set(self, host, port, username, token):
+        '''Stores the `token` for the MM host, port and username
+        '''
+        with self._lock:
+            tokens = self._read()
+
+            # Don't carry over the tokens that can't be used anymore
+            now = time.time()
+            tokens = {k: v for k, v in tokens.items() if now - v.get('saved', 0) <= self.max_age}
+            key = self._key(host, port, username)
+            tokens[key] = {'token': token, 'saved': now}
+            self._touched[key] = now
+
+            self._write(tokens)
+
+    def touch(self, host, port, username, token):
+        '''Restarts the `max_age` of the stored token after it was used
+        successfully, as using it also keeps the MM's API session alive.
+
+        The file is rewritten at most once every tenth of `max_age` for the
+        same token.
+        '''
+        key = self._key(host, port, username)
+        now = time.time()
+
+        with self._lock:
+            if now - self._touched.get(key, -self.max_age) < self.max_age / 10:
+                return
+
+            tokens = self._read()
+            entry = tokens.get(key)
+            # Don't bring back a token that was replaced or deleted
+            if not entry or entry.get('token') != token:
+                return
+
+            entry['saved'] = now
+            self._touched[key] = now
+            self._write(tokens)
+
+    def delete(self, host, port, username):
+        '''Removes the stored token for the MM host, port and username
+        '''
+        key = self._key(host, port, username)
+
+        with self._lock:
+            self._touched.pop(key, None)
+            tokens = self._read()
+            if tokens.pop(key, None) is not None:
+                self._write(tokens)
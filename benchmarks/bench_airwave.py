@@ -0,0 +1,56 @@
+"""Measures how long AirWave takes to fetch and build its inventory DBs, and
+to look up clients, against a local AirWave emulator with a large
+inventory.
+
+Run from the repository root with:
+
+    python -m benchmarks.bench_airwave [number of APs]
+"""
+import sys
+import time
+
+import logging
+import logzero
+
+from arubafi.airwave import AirWave, OnlyOneInstance
+from arubafi.testing import AMPServer
+
+
+def timed(label, func, number=1):
+    start = time.perf_counter()
+    for _ in range(number):
+        func()
+    seconds = (time.perf_counter() - start) / number
+    print(f"{label:<50} {seconds * 1e3:>10.2f} ms")
+    return seconds
+
+
+def main(aps=20000):
+    logzero.loglevel(logging.ERROR)
+
+    for gzip in (False, True):
+        with AMPServer(aps=aps, controllers=40, iap_vcs=5, controllerless=50, clients=aps * 2, gzip=gzip, chunked=gzip) as server:
+            OnlyOneInstance._instances.clear()
+            aw = AirWave(server.url, 'admin', 'admin')
+            aw.comms()
+            mode = 'gzip, chunked' if gzip else 'plain'
+
+            def refresh():
+                aw._inventory = None
+                aw._all_items_db = None
+                aw.get_all_items_inventory()
+
+            timed(f"inventory of {aps} APs ({mode})", refresh, 3)
+
+            macs = list(server.clients)[:200]
+            seconds = timed(f"get_users_ap_info() x {len(macs)} ({mode})", lambda: [aw.get_users_ap_info(mac) for mac in macs])
+            print(f"{'  per client':<50} {seconds / len(macs) * 1e3:>10.2f} ms")
+
+            aps_names = [device['name'] for device in server.inventory['devices'] if device['device_category'] == 'thin_ap'][:5000]
+            timed(f"get_multiple_aps_controllerid() x {len(aps_names)} APs", lambda: aw.get_multiple_aps_controllerid(aps_names), 10)
+
+            aw.close()
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
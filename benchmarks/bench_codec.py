@@ -0,0 +1,63 @@
+"""Measures the throughput of the JSON codecs on a large, full configuration
+like MM response.
+
+Run from the repository root with:
+
+    python -m benchmarks.bench_codec [number of objects]
+"""
+import sys
+import timeit
+
+from arubafi.codec import CODECS
+
+
+def config_payload(count):
+    '''Returns a `netdst` GET response with `count` objects, similar to
+    what the MM returns for a full config pull at `/md`.
+    '''
+    return {
+        '_data': {
+            'netdst': [
+                {
+                    'dstname': f'netdst-{i}',
+                    '_flags': {'inherited': i % 2 == 0, 'default': False},
+                    'netdst__host': [
+                        {'address': f'10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}', '_flags': {}},
+                        {'address': f'172.16.{i // 256 % 256}.{i % 256}', '_flags': {}},
+                    ],
+                    'netdst__network': [
+                        {'address': '192.168.0.0', 'netmask': '255.255.0.0', '_flags': {}},
+                    ],
+                    'description': {'desc': 'x' * 40},
+                }
+                for i in range(count)
+            ]
+        },
+        '_global_result': {'status': 0, 'status_str': 'Success', '_pending': False},
+    }
+
+
+def main(count=20000):
+    payload = config_payload(count)
+
+    for name, codec_cls in CODECS.items():
+        try:
+            codec = codec_cls()
+        except ImportError:
+            print(f"{name:<8} not installed")
+            continue
+
+        body = codec.dumpb(payload)
+        size = len(body) / 1e6
+
+        decode = min(timeit.repeat(lambda: codec.loads(body), number=1, repeat=5))
+        encode = min(timeit.repeat(lambda: codec.dumpb(payload), number=1, repeat=5))
+
+        print(
+            f"{name:<8} {size:6.1f} MB  "
+            f"decode {decode * 1e3:7.1f} ms ({size / decode:6.0f} MB/s)  "
+            f"encode {encode * 1e3:7.1f} ms ({size / encode:6.0f} MB/s)")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
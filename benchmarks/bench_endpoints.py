@@ -0,0 +1,48 @@
+"""Measures the client side cost of a resource method call, with the network
+call stubbed out, and the cost of registering many endpoints.
+
+Run from the repository root with:
+
+    python -m benchmarks.bench_endpoints
+"""
+import timeit
+
+import logging
+import logzero
+
+from arubafi import MMClient
+
+
+def bench(label, stmt, number):
+    # Best of 5 runs, reported per call
+    best = min(timeit.repeat(stmt, number=number, repeat=5)) / number
+    print(f"{label:<50} {best * 1e9:>10.0f} ns/call")
+    return best
+
+
+def main():
+    logzero.loglevel(logging.ERROR)
+
+    mmc = MMClient("bench.arubamm.com", "user", "pass", codec='json')
+    mmc.mm_base_api_url = "https://bench.arubamm.com:4343/v1"
+    mmc._access_token = "token"
+
+    # Stub out the request so only the client side work is measured
+    mmc._api_call = lambda method, url, **kwargs: ({}, None)
+
+    bench("ap_group() GET", lambda: mmc.ap_group(), 50000)
+    bench("ap_group(profile_name=...) filtered GET", lambda: mmc.ap_group(profile_name='default'), 50000)
+    bench("ap_group(data=...) POST", lambda: mmc.ap_group(data={'profile-name': 'default'}), 50000)
+    bench(
+        "resource('GET', 'configuration/object/ap_group')",
+        lambda: mmc.resource('GET', 'configuration/object/ap_group'),
+        50000)
+
+    if hasattr(MMClient, 'register_endpoint'):
+        names = [f'bench_obj_{i}' for i in range(500)]
+        seconds = timeit.timeit(lambda: [MMClient.register_endpoint(name) for name in names], number=1)
+        print(f"{'register_endpoint() x 500':<50} {seconds * 1e3:>10.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Measures the client side cost of the `@log` decorator and of the debug
+logging on the hot request path, with logging at the default ERROR level.
+
+Run from the repository root with:
+
+    python -m benchmarks.bench_logging
+"""
+import timeit
+
+import logging
+import logzero
+
+from arubafi import AirWave, MMClient
+from arubafi.mmclient import log
+
+
+def noop(*args, **kwargs):
+    return None
+
+
+def bench(label, stmt, number):
+    # Best of 5 runs, reported per call
+    best = min(timeit.repeat(stmt, number=number, repeat=5)) / number
+    print(f"{label:<45} {best * 1e9:>10.0f} ns/call")
+    return best
+
+
+def main():
+    logzero.loglevel(logging.ERROR)
+
+    mmc = MMClient("bench.arubamm.com", "user", "pass")
+    mmc.mm_base_api_url = "https://bench.arubamm.com:4343/v1"
+    mmc._access_token = "token"
+
+    wrapped_noop = log(noop)
+    bare = bench("bare function", lambda: noop(config_path='/md'), 200000)
+    wrapped = bench("@log wrapped function", lambda: wrapped_noop(config_path='/md'), 200000)
+    print(f"{'@log decorator overhead':<45} {(wrapped - bare) * 1e9:>10.0f} ns/call")
+
+    bench("MMClient._kwargs_modify()", lambda: mmc._kwargs_modify('configuration/object/ap_group'), 50000)
+    bench(
+        "MMClient._params() with profile_name",
+        lambda: mmc._params(search='ap_group', config_path='/md', profile_name='default'),
+        50000)
+    bench("MMClient._resource_url()", lambda: mmc._resource_url('configuration/object/ap_group'), 50000)
+
+    # An AirWave with a prebuilt 20k item inventory DB
+    aw = AirWave("bench.airwave.com", "user", "pass")
+    aw._all_items_db = {
+        str(i): {'name': f'ap{i}', 'lan_ip': '10.0.0.1', 'model': 'AP 305'}
+        for i in range(20000)
+    }
+    bench("AirWave.get_all_items_inventory() (20k items)", aw.get_all_items_inventory, 20)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""Measures the client side overhead of MMClient calls against a local,
+zero latency MM emulator, in calls per second and memory allocated per
+call, and how much of a call goes to each step of the client.
+
+The emulator runs in its own process, so neither its CPU time nor its
+allocations are counted with the client's.
+
+Run from the repository root with:
+
+    python -m benchmarks.bench_mmclient [number of objects in the large GET]
+"""
+import multiprocessing
+import statistics
+import sys
+import timeit
+import tracemalloc
+
+import logging
+import logzero
+import requests
+
+from arubafi import Filter, MMClient
+from arubafi.codec import orjson
+from arubafi.governor import Governor
+from arubafi.retry import CircuitBreaker
+from arubafi.testing import MMServer
+
+FILTER = [{'netdst.dstname': {'$in': ['host-1']}}]
+FILTER_OBJECT = Filter('netdst').contains('dstname', 'host-1')
+
+
+def serve(conn, count):
+    '''Runs the emulator with `count` netdst objects at /md/large, and
+    /md/EU to POST to, until the `conn` is closed.
+    '''
+    logzero.loglevel(logging.ERROR)
+
+    with MMServer() as server:
+        server.add_node('/md/large')
+        server.add_node('/md/EU')
+        for i in range(count):
+            server.add('/md/large', 'netdst', {
+                'dstname': f'host-{i}',
+                'netdst__host': [{'address': f'10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}'}],
+                'description': {'desc': 'x' * 40},
+            })
+        for i in range(20):
+            server.add('/md', 'netdst', {'dstname': f'host-{i}'})
+
+        conn.send(server.port)
+        # Blocks until the benchmark is done
+        conn.recv()
+
+
+def client(port, **kwargs):
+    '''Returns an `MMClient` logged in to the emulator at the `port`
+    '''
+    mmc = MMClient(mm_host='http://127.0.0.1', port=port, username='admin', password='admin', **kwargs)
+    mmc.comms()
+    return mmc
+
+
+def allocated(func, number):
+    '''Returns the median number of bytes allocated at the peak of a call
+    '''
+    func()
+    tracemalloc.start()
+    peaks = list()
+
+    for _ in range(number):
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        func()
+        peaks.append(tracemalloc.get_traced_memory()[1] - before)
+
+    tracemalloc.stop()
+    return statistics.median(peaks)
+
+
+def bench(label, func, number, alloc_number=200):
+    # Best of 5 runs, reported per call
+    best = min(timeit.repeat(func, number=number, repeat=5)) / number
+    alloc = allocated(func, min(number, alloc_number))
+    print(f"{label:<45} {1 / best:>10.0f} calls/s {best * 1e6:>10.1f} us/call {alloc / 1024:>10.1f} KiB/call")
+    return best
+
+
+def step(label, func, number, total):
+    best = min(timeit.repeat(func, number=number, repeat=5)) / number
+    print(f"{label:<45} {best * 1e6:>10.2f} us/call {best / total * 100:>9.1f}%")
+    return best
+
+
+def main(count=20000):
+    logzero.loglevel(logging.ERROR)
+
+    parent, child = multiprocessing.Pipe()
+    process = multiprocessing.Process(target=serve, args=(child, count), daemon=True)
+    process.start()
+    port = parent.recv()
+
+    try:
+        mmc = client(port, codec='json')
+        mmc_orjson = client(port, codec='orjson') if orjson is not None else None
+
+        print("End to end, against the emulator")
+        get = bench("netdst() GET", lambda: mmc.netdst(config_path='/md'), 500)
+        bench("netdst(filter=...) filtered GET", lambda: mmc.netdst(config_path='/md', filter=FILTER), 500)
+        bench("netdst(filter=Filter(...)) filtered GET", lambda: mmc.netdst(config_path='/md', filter=FILTER_OBJECT), 500)
+        bench("netdst(profile_name=...) filtered GET", lambda: mmc.netdst(config_path='/md', profile_name='host-1'), 500)
+        bench("netdst(data=...) POST", lambda: mmc.netdst(data={'dstname': 'bench'}, config_path='/md/EU'), 500)
+        bench(f"netdst() GET of {count} objects (json)", lambda: mmc.netdst(config_path='/md/large'), 3, 3)
+        if mmc_orjson is not None:
+            bench(f"netdst() GET of {count} objects (orjson)", lambda: mmc_orjson.netdst(config_path='/md/large'), 3, 3)
+        bench(
+            f"netdst(stream=True) GET of {count} objects",
+            lambda: sum(1 for _ in mmc.netdst(config_path='/md/large', stream=True)[0]), 3, 3)
+
+        # The steps of a GET, without the network
+        response = requests.get(f'{mmc.mm_base_api_url}/configuration/object/netdst', params={'config_path': '/md', 'UIDARUBA': mmc._access_token})
+        content = response.content
+
+        print()
+        print(f"Steps of a GET, of the {get * 1e6:.1f} us end to end")
+        step("@log and _kwargs_modify()", lambda: mmc._kwargs_modify('configuration/object/netdst'), 50000, get)
+        step("_params()", lambda: mmc._params(search='netdst', config_path='/md'), 50000, get)
+        step("_params() with profile_name", lambda: mmc._params(search='netdst', config_path='/md', profile_name='host-1'), 50000, get)
+        step("_params() with filter", lambda: mmc._params(search='netdst', config_path='/md', filter=FILTER), 50000, get)
+        step("_params() with a Filter", lambda: mmc._params(search='netdst', config_path='/md', filter=FILTER_OBJECT), 50000, get)
+        step("_resource_url()", lambda: mmc._resource_url('configuration/object/netdst'), 50000, get)
+        step("decoding the response", lambda: mmc.codec.loads(content), 50000, get)
+
+        send = mmc._send
+        mmc._send = lambda method, url, **kwargs: (response, 0.0)
+        stubbed = step("all of the client, with the request stubbed", lambda: mmc.netdst(config_path='/md'), 20000, get)
+        mmc._send = send
+        print(f"{'the network, requests and the emulator':<45} {(get - stubbed) * 1e6:>10.2f} us/call {(get - stubbed) / get * 100:>9.1f}%")
+    finally:
+        parent.send(None)
+        process.join(5)
+        CircuitBreaker._registry.clear()
+        Governor._registry.clear()
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
@@ -23,10 +23,13 @@ setup(
     packages             = find_packages(),
     include_package_data = True,
     install_requires     = [
-        'requests',
+        'requests>=2.32',
         'logzero',
         'xmltodict',
     ],
+    extras_require       = {
+        'fast': ['orjson'],
+    },
     tests_require        = [
         'responses',
         'pytest',